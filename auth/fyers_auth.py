@@ -55,6 +55,11 @@ URL_VALIDATE_AUTH_CODE = BASE_URL_2 + "/validate-authcode"
 SUCCESS = 1
 ERROR = -1
 
+HTTP_TIMEOUT = 10
+
+# One pooled session for the whole login flow (and repeat logins in-process).
+http = requests.Session()
+
 
 # =========================
 # FUNCTIONS
@@ -62,7 +67,7 @@ ERROR = -1
 def verify_client_id(client_id):
     try:
         payload = {"fy_id": client_id, "app_id": "2"}
-        r = requests.post(URL_VERIFY_CLIENT_ID, json=payload)
+        r = http.post(URL_VERIFY_CLIENT_ID, json=payload, timeout=HTTP_TIMEOUT)
         if r.status_code != 200:
             return [ERROR, r.text]
         return [SUCCESS, r.json()["request_key"]]
@@ -80,7 +85,7 @@ def generate_totp(secret):
 def verify_totp(request_key, totp):
     try:
         payload = {"request_key": request_key, "otp": totp}
-        r = requests.post(URL_VERIFY_TOTP, json=payload)
+        r = http.post(URL_VERIFY_TOTP, json=payload, timeout=HTTP_TIMEOUT)
         if r.status_code != 200:
             return [ERROR, r.text]
         return [SUCCESS, r.json()["request_key"]]
@@ -95,7 +100,7 @@ def verify_PIN(request_key, pin):
             "identity_type": "pin",
             "identifier": pin
         }
-        r = requests.post(URL_VERIFY_PIN, json=payload)
+        r = http.post(URL_VERIFY_PIN, json=payload, timeout=HTTP_TIMEOUT)
         if r.status_code != 200:
             return [ERROR, r.text]
         return [SUCCESS, r.json()["data"]["access_token"]]
@@ -115,7 +120,7 @@ def token(client_id, app_id, redirect_uri, app_type, access_token):
             "create_cookie": True
         }
         headers = {"Authorization": f"Bearer {access_token}"}
-        r = requests.post(URL_TOKEN, json=payload, headers=headers)
+        r = http.post(URL_TOKEN, json=payload, headers=headers, timeout=HTTP_TIMEOUT)
 
         if r.status_code != 308:
             return [ERROR, r.text]
@@ -140,7 +145,7 @@ def validate_authcode(auth_code):
             "appIdHash": app_id_hash,
             "code": auth_code
         }
-        r = requests.post(URL_VALIDATE_AUTH_CODE, json=payload)
+        r = http.post(URL_VALIDATE_AUTH_CODE, json=payload, timeout=HTTP_TIMEOUT)
         if r.status_code != 200:
             return [ERROR, r.text]
         return [SUCCESS, r.json()["access_token"]]
@@ -151,49 +156,35 @@ def validate_authcode(auth_code):
 # =========================
 # MAIN FLOW
 # =========================
-def main():
-    step1 = verify_client_id(CLIENT_ID)
-    if step1[0] != SUCCESS:
-        print("verify_client_id failed:", step1[1])
-        sys.exit()
-    print("verify_client_id success")
+def login(save=True):
+    """Run the full login flow and return the access token.
+    Raises RuntimeError naming the step that failed."""
+    def step(name, result):
+        if result[0] != SUCCESS:
+            raise RuntimeError(f"{name} failed: {result[1]}")
+        return result[1]
+
+    request_key = step("verify_client_id", verify_client_id(CLIENT_ID))
+    totp = step("generate_totp", generate_totp(TOTP_SECRET_KEY))
+    request_key = step("verify_totp", verify_totp(request_key, totp))
+    pin_token = step("verify_PIN", verify_PIN(request_key, PIN))
+    auth_code = step("token", token(CLIENT_ID, APP_ID, REDIRECT_URI, APP_TYPE, pin_token))
+    access_token = step("validate_authcode", validate_authcode(auth_code))
+
+    if save:
+        with open(ACCESS_TOKEN_PATH, "w") as f:
+            f.write(access_token)
+    return access_token
 
-    step2 = generate_totp(TOTP_SECRET_KEY)
-    if step2[0] != SUCCESS:
-        print("generate_totp failed:", step2[1])
-        sys.exit()
-    print("generate_totp success")
-
-    step3 = verify_totp(step1[1], step2[1])
-    if step3[0] != SUCCESS:
-        print("verify_totp failed:", step3[1])
-        sys.exit()
-    print("verify_totp success")
 
-    step4 = verify_PIN(step3[1], PIN)
-    if step4[0] != SUCCESS:
-        print("verify_PIN failed:", step4[1])
-        sys.exit()
-    print("verify_PIN success")
-
-    step5 = token(CLIENT_ID, APP_ID, REDIRECT_URI, APP_TYPE, step4[1])
-    if step5[0] != SUCCESS:
-        print("token failed:", step5[1])
-        sys.exit()
-    print("token success")
-
-    step6 = validate_authcode(step5[1])
-    if step6[0] != SUCCESS:
-        print("validate_authcode failed:", step6[1])
+def main():
+    try:
+        access_token = login()
+    except RuntimeError as e:
+        print(e)
         sys.exit()
-    print("validate_authcode success")
 
-    access_token = step6[1]
     print("ACCESS TOKEN:", access_token)
-
-    with open(ACCESS_TOKEN_PATH, "w") as f:
-        f.write(access_token)
-
     print(f"Token saved at: {ACCESS_TOKEN_PATH}")
 
 
@@ -0,0 +1,136 @@
+"""
+token_manager.py
+
+In-process Fyers access token, instead of shelling out to fyers_auth.py.
+
+    tokens = TokenManager()
+    tokens.on_refresh(lambda token: ...)   # push into live FyersModel / feeds
+    tokens.start()                         # background refresh before open
+    token = tokens.token()                 # cached; file / login only if needed
+
+A token counts as valid if its JWT `exp` is after today's market close, so
+a token that would die mid-session is refreshed ahead of time (from
+REFRESH_AT IST on weekdays) rather than at the first failed call.
+"""
+
+import os
+import json
+import time
+import base64
+import threading
+from datetime import datetime, timedelta, timezone, time as dtime
+
+from auth import fyers_auth
+
+IST = timezone(timedelta(hours=5, minutes=30))
+
+REFRESH_AT = dtime(8, 45)       # background refresh window opens (IST)
+VALID_UNTIL = dtime(15, 30)     # a token must outlive today's close
+POLL_SEC = 60
+
+
+def token_expiry(token):
+    """`exp` (epoch seconds) from the JWT payload, or None if unreadable."""
+    try:
+        payload = token.split(".")[1]
+        payload += "=" * (-len(payload) % 4)
+        return int(json.loads(base64.urlsafe_b64decode(payload))["exp"])
+    except (IndexError, KeyError, ValueError, TypeError, AttributeError):
+        return None
+
+
+class TokenManager:
+
+    def __init__(self, path=fyers_auth.ACCESS_TOKEN_PATH,
+                 refresh_at=REFRESH_AT, valid_until=VALID_UNTIL):
+        self.path = path
+        self.refresh_at = refresh_at
+        self.valid_until = valid_until
+        self._token = None
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._thread = None
+
+    # ================= VALIDITY =================
+
+    def _needed_until(self):
+        """Epoch the token has to last: today's close, or an hour from now."""
+        now = datetime.now(IST)
+        close = datetime.combine(now.date(), self.valid_until, IST)
+        if now >= close:
+            close = now + timedelta(hours=1)
+        return close.timestamp()
+
+    def is_valid(self, token):
+        if not token:
+            return False
+        exp = token_expiry(token)
+        # Unreadable exp: trust it rather than re-login in a loop.
+        return exp is None or exp > self._needed_until()
+
+    def _read_file(self):
+        try:
+            with open(self.path) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    # ================= ACCESS =================
+
+    def token(self):
+        """A token valid through today's close; logs in only if needed."""
+        with self._lock:
+            if self.is_valid(self._token):
+                return self._token
+            cached = self._read_file()
+            if self.is_valid(cached):
+                self._token = cached
+                return cached
+            return self.refresh()
+
+    def refresh(self):
+        """Log in now, save the token and notify listeners."""
+        with self._lock:
+            token = fyers_auth.login(save=False)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w") as f:
+                f.write(token)
+            os.replace(tmp, self.path)
+            self._token = token
+            listeners = list(self._listeners)
+
+        for cb in listeners:
+            try:
+                cb(token)
+            except Exception as e:
+                print(f"Token listener failed: {e}")
+        return token
+
+    def on_refresh(self, callback):
+        self._listeners.append(callback)
+
+    # ================= BACKGROUND =================
+
+    def _due(self):
+        now = datetime.now(IST)
+        if now.weekday() >= 5 or now.time() < self.refresh_at:
+            return False
+        with self._lock:
+            if self._token is None:
+                self._token = self._read_file()
+            return not self.is_valid(self._token)
+
+    def _run(self):
+        while True:
+            try:
+                if self._due():
+                    self.refresh()
+            except Exception as e:
+                print(f"Token refresh failed, retrying: {e}")
+            time.sleep(POLL_SEC)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+        return self
@@ -0,0 +1,196 @@
+"""
+bar_log.py
+
+Append-only binary log of a bot's per-bar view (OHLC, Heikin-Ashi,
+indicators, signals), one file per symbol, tailed by the dashboards.
+
+    log = BarLogWriter(os.path.join(SAVE_DIR, "BTCUSD_bars.bin"), COLUMNS)
+    log.publish(view)                  # frame indexed by bar time
+
+    reader = BarLogReader(path)
+    frame, new = reader.read()         # new: only records appended since
+
+File layout: b"BARLOG1\\n", a little-endian uint32 header length, a JSON
+header {"columns": [...], "time_unit": "us"}, then fixed-size records of
+float64 (bar time first, then the columns). A forming bar is re-appended
+whenever its values change; readers keep the last record per bar time.
+The writer only appends records that are new or changed, and once the log
+holds `max_records` it is compacted (last record per bar, written to a
+temp file and swapped in); readers notice the new file and start over.
+"""
+
+import os
+import json
+import struct
+import threading
+
+import numpy as np
+import pandas as pd
+
+MAGIC = b"BARLOG1\n"
+MAX_RECORDS = 20000
+
+
+def _header_bytes(columns, time_unit):
+    header = json.dumps({"columns": list(columns), "time_unit": time_unit}).encode()
+    return MAGIC + struct.pack("<I", len(header)) + header
+
+
+class BarLogWriter:
+
+    def __init__(self, path, columns, time_unit="us", max_records=MAX_RECORDS):
+        self.path = path
+        self.columns = list(columns)
+        self.time_unit = time_unit
+        self.max_records = max_records
+        self.width = len(self.columns) + 1
+        self.lock = threading.Lock()
+        self.records = 0
+        self.last = None                # last record written (float64 row)
+        self._open()
+
+    def _open(self):
+        header = _header_bytes(self.columns, self.time_unit)
+        try:
+            with open(self.path, "rb") as f:
+                reusable = f.read(len(header)) == header
+                size = os.fstat(f.fileno()).st_size
+        except FileNotFoundError:
+            reusable, size = False, 0
+
+        if reusable:
+            body = size - len(header)
+            self.records = body // (8 * self.width)
+            if body % (8 * self.width):            # torn last record
+                with open(self.path, "r+b") as f:
+                    f.truncate(len(header) + self.records * 8 * self.width)
+            if self.records:
+                with open(self.path, "rb") as f:
+                    f.seek(len(header) + (self.records - 1) * 8 * self.width)
+                    self.last = np.frombuffer(f.read(8 * self.width), dtype="<f8")
+        else:
+            # missing, or written with other columns: start a new log
+            self._replace(header, np.empty((0, self.width)))
+
+    def _replace(self, header, rows):
+        tmp = self.path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(header)
+            f.write(np.ascontiguousarray(rows, dtype="<f8").tobytes())
+        os.replace(tmp, self.path)
+        self.records = len(rows)
+        self.last = rows[-1].copy() if len(rows) else None
+
+    def _rows(self, view):
+        times = pd.Index(view.index)
+        if isinstance(times, pd.DatetimeIndex):
+            times = times.as_unit(self.time_unit).asi8
+        values = view.reindex(columns=self.columns).to_numpy(dtype=float)
+        return np.column_stack([np.asarray(times, dtype=float), values])
+
+    def publish(self, view):
+        """Append the rows of `view` not already in the log (by bar time,
+        or the last bar if its values changed). Returns rows written."""
+        rows = self._rows(view)
+        with self.lock:
+            if self.last is not None:
+                t_last = self.last[0]
+                rows = rows[rows[:, 0] >= t_last]
+                if len(rows) and rows[0, 0] == t_last and \
+                        np.array_equal(rows[0], self.last, equal_nan=True):
+                    rows = rows[1:]
+            if not len(rows):
+                return 0
+
+            with open(self.path, "ab") as f:
+                f.write(rows.astype("<f8").tobytes())
+            self.records += len(rows)
+            self.last = rows[-1].copy()
+
+            if self.records >= self.max_records:
+                self.compact()
+            return len(rows)
+
+    def compact(self):
+        """Rewrite the log with one record per bar time."""
+        header = _header_bytes(self.columns, self.time_unit)
+        with open(self.path, "rb") as f:
+            f.seek(len(header))
+            rows = np.frombuffer(f.read(), dtype="<f8")
+        rows = rows[:len(rows) // self.width * self.width].reshape(-1, self.width)
+        # last record for each bar time, in time order
+        last = len(rows) - 1 - np.unique(rows[::-1, 0], return_index=True)[1]
+        self._replace(header, rows[np.sort(last)])
+
+
+class BarLogReader:
+
+    def __init__(self, path):
+        self.path = path
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.ident = None               # (st_dev, st_ino) of the file being tailed
+        self.offset = 0
+        self.columns = None
+        self.time_unit = "us"
+        self.width = 0
+        self.frame = pd.DataFrame()
+
+    def _read_header(self, f):
+        if f.read(len(MAGIC)) != MAGIC:
+            return False
+        raw = f.read(4)
+        if len(raw) < 4:
+            return False
+        (length,) = struct.unpack("<I", raw)
+        header = f.read(length)
+        if len(header) < length:
+            return False
+        meta = json.loads(header)
+        self.columns = meta["columns"]
+        self.time_unit = meta.get("time_unit", "us")
+        self.width = len(self.columns) + 1
+        self.offset = len(MAGIC) + 4 + length
+        return True
+
+    def _frame(self, rows):
+        index = pd.to_datetime(rows[:, 0].astype("int64"), unit=self.time_unit)
+        frame = pd.DataFrame(rows[:, 1:], index=index, columns=self.columns)
+        frame.index.name = "time"
+        return frame[~frame.index.duplicated(keep="last")]
+
+    def read(self):
+        """(frame with one row per bar, rows appended since the last read)."""
+        with self.lock:
+            try:
+                f = open(self.path, "rb")
+            except FileNotFoundError:
+                self._reset()
+                return self.frame, self.frame
+            with f:
+                st = os.fstat(f.fileno())
+                ident = (st.st_dev, st.st_ino)
+                if ident != self.ident or st.st_size < self.offset:
+                    self._reset()           # new, compacted or rewritten log
+                    if not self._read_header(f):
+                        return self.frame, self.frame
+                    self.ident = ident
+
+                record = 8 * self.width
+                count = (st.st_size - self.offset) // record
+                if not count:
+                    return self.frame, self.frame.iloc[:0]
+                f.seek(self.offset)
+                rows = np.frombuffer(f.read(count * record), dtype="<f8")
+
+            self.offset += count * record
+            new = self._frame(rows.reshape(count, self.width))
+            if self.frame.empty:
+                self.frame = new
+            else:
+                # a re-published forming bar replaces the row we already have
+                kept = self.frame[self.frame.index < new.index[0]]
+                self.frame = pd.concat([kept, new])
+            return self.frame, new
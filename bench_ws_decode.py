@@ -0,0 +1,137 @@
+"""
+bench_ws_decode.py
+
+Microbenchmark: the old json.loads + if/elif on_message against
+ws_decode.FrameRouter, on recorded Delta traffic.
+
+    WS_RECORD_PATH=data/ws_frames.txt python trend_following_strategy.py   # record
+    python bench_ws_decode.py data/ws_frames.txt
+
+Without a recording it builds a synthetic mix: the bot's own channels for
+subscribed and unsubscribed symbols plus L2 book, trades and heartbeats,
+the traffic a wider subscription would add.
+"""
+
+import sys
+import json
+import time
+import random
+
+from ws_decode import FrameRouter, _HAS_ORJSON
+
+SYMBOLS = ["BTCUSD", "ETHUSD", "SOLUSD"]
+OTHERS = ["XRPUSD", "DOGEUSD", "BNBUSD", "AVAXUSD", "LTCUSD"]
+TIMEFRAMES = ["1d"]
+REPEAT = 5
+
+
+def synthetic(n=50_000, seed=7):
+    rnd = random.Random(seed)
+    frames = []
+    for _ in range(n):
+        sym = rnd.choice(SYMBOLS + OTHERS)
+        px = round(rnd.uniform(1, 70_000), 2)
+        kind = rnd.random()
+        if kind < 0.15:
+            msg = {"type": "candlestick_1d", "symbol": sym, "resolution": "1d",
+                   "candle_start_time": 1760745600000000, "open": px,
+                   "high": px + 5, "low": px - 5, "close": px, "volume": 12}
+        elif kind < 0.30:
+            msg = {"type": "mark_price", "symbol": f"MARK:{sym}", "price": str(px)}
+        elif kind < 0.45:
+            msg = {"type": "v2/ticker", "symbol": sym, "mark_price": str(px),
+                   "quotes": {"best_bid": str(px - 0.5), "best_ask": str(px + 0.5)},
+                   "volume": 1234.5, "oi": "5678"}
+        elif kind < 0.75:
+            msg = {"type": "l2_orderbook", "symbol": sym,
+                   "buy": [{"limit_price": str(px - i), "size": i} for i in range(20)],
+                   "sell": [{"limit_price": str(px + i), "size": i} for i in range(20)]}
+        elif kind < 0.95:
+            msg = {"type": "all_trades", "symbol": sym, "price": str(px),
+                   "size": rnd.randint(1, 50), "buyer_role": "taker"}
+        else:
+            msg = {"type": "heartbeat"}
+        frames.append(json.dumps(msg, separators=(",", ":")))
+    return frames
+
+
+def baseline(frames):
+    """The previous on_message, with the state updates as no-ops."""
+    routed = 0
+    tfs = set(TIMEFRAMES)
+    market = set(SYMBOLS)
+    for message in frames:
+        try:
+            msg = json.loads(message)
+        except Exception:
+            continue
+        msg_type = msg.get("type")
+        if msg_type and msg_type.startswith("candlestick"):
+            symbol = msg.get("symbol")
+            if symbol not in market:
+                continue
+            suffix = msg_type.split("candlestick_", 1)[-1]
+            if suffix not in tfs:
+                continue
+            routed += 1
+        elif msg_type == "mark_price":
+            symbol = msg.get("symbol", "").replace("MARK:", "")
+            if symbol in market:
+                routed += 1
+        elif msg_type == "v2/ticker":
+            if msg.get("symbol") in market and msg.get("mark_price") is not None:
+                routed += 1
+    return routed
+
+
+def make_router():
+    hits = []
+    sink = lambda name, msg: hits.append(1)
+    router = FrameRouter()
+    for tf in TIMEFRAMES:
+        router.route(f"candlestick_{tf}", SYMBOLS, sink)
+    router.route("mark_price", {f"MARK:{s}": s for s in SYMBOLS}, sink)
+    router.route("v2/ticker", SYMBOLS,
+                 lambda name, msg: msg.get("mark_price") is not None and hits.append(1))
+    return router, hits
+
+
+def routed(frames):
+    router, hits = make_router()
+    for message in frames:
+        router.dispatch(message)
+    return len(hits)
+
+
+def best_of(fn, frames):
+    best = float("inf")
+    for _ in range(REPEAT):
+        t0 = time.perf_counter()
+        out = fn(frames)
+        best = min(best, time.perf_counter() - t0)
+    return best, out
+
+
+def main():
+    if len(sys.argv) > 1:
+        with open(sys.argv[1]) as f:
+            frames = [line.rstrip("\n") for line in f if line.strip()]
+        source = sys.argv[1]
+    else:
+        frames = synthetic()
+        source = "synthetic"
+
+    t_old, n_old = best_of(baseline, frames)
+    t_new, n_new = best_of(routed, frames)
+    assert n_old == n_new, f"routing differs: {n_old} vs {n_new}"
+
+    n = len(frames)
+    print(f"{n} frames ({source}), {n_new} routed to handlers, "
+          f"parser: {'orjson' if _HAS_ORJSON else 'json'}")
+    print(f"  json.loads + if/elif : {t_old / n * 1e6:7.2f} us/frame")
+    print(f"  FrameRouter          : {t_new / n * 1e6:7.2f} us/frame "
+          f"({t_old / t_new:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
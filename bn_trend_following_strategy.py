@@ -17,15 +17,24 @@ import os, sys
 import time as t
 import pandas as pd
 import numpy as np
-import pandas_ta as ta
 from fyers_apiv3 import fyersModel
+from fyers_feed import FyersQuoteFeed
+from candle_store import CandleStore
+from indicators import HaSupertrendAdx, IndicatorBook
+from nse_calendar import NseCalendar
+from option_greeks import strike_for_delta
+from trade_analytics import TradeAnalytics
 from datetime import datetime, time, timedelta, timezone, date
 from dotenv import load_dotenv
 import requests
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
 sys.path.append(os.getcwd())
 load_dotenv()
 
+from auth.token_manager import TokenManager
+
 # ================= IST TIME =================
 IST = timezone(timedelta(hours=5, minutes=30))
 
@@ -43,6 +52,14 @@ CLIENT_ID="98E1TAKD4T-100"
 QTY=30
 COMMISSION_RATE=0.0004
 SPOT_SYMBOL="NSE:NIFTYBANK-INDEX"
+STRIKE_STEP=100
+QUOTE_NEIGHBOURS=1         # extra strikes each side of ATM in the quote snapshot
+
+# --- strike selection ---
+DELTA_STRIKE_SELECTION=True  # trade the strike nearest TARGET_DELTA (else ATM)
+TARGET_DELTA=0.5
+CHAIN_WIDTH=4              # strikes each side of ATM evaluated for delta
+RISK_FREE_RATE=0.065
 
 ADX_PERIOD=14
 ADX_THRESHOLD=20
@@ -58,10 +75,16 @@ SAME_STRIKE_BLOCK_SEC=1800 # don't re-enter the SAME strike within this window
 
 # --- perf config ---
 INDICATOR_REFRESH_SEC=60   # recompute heavy indicators at most this often
+QUOTE_MAX_AGE_SEC=5        # streamed LTP older than this falls back to REST
+TICK_WAIT_SEC=2            # in a position: wake on the next tick or after this
+HISTORY_WORKERS=4          # concurrent history download + indicator legs
+HISTORY_DAYS=5             # 5-min bars kept per symbol in the candle store
 
 folder="data/Trend_Following"
 os.makedirs(folder,exist_ok=True)
 TRADES_FILE=f"{folder}/live_trades.csv"
+HISTORY_DIR=f"{folder}/history"
+CALENDAR_FILE=f"{folder}/nse_calendar.json"
 TOKEN_FILE="auth/api_key/access_token.txt"
 
 # ================= TELEGRAM =================
@@ -81,12 +104,12 @@ def send_telegram(msg):
 
 # ================= GLOBAL STATE =================
 fyers=None
+quote_feed=None        # streaming LTPs (index + ATM CE/PE + held leg)
 position_type=None
 entry_price=0
 entry_time=None
 symbol=None
 last_reset_date=None
-token_load_date=None
 model_load_date=None
 last_exit_time=None
 stop_loss=None
@@ -97,18 +120,28 @@ running_high=None      # highest price seen since entry (for trailing)
 last_exit_symbol=None
 last_exit_symbol_time=None
 
-NSE_HOLIDAYS=set()
 holiday_load_date=None
 
-# expiry cache (perf) - recomputed once per day
-_cached_expiry=None
-_cached_expiry_date=None
-
 # indicator cache (perf): {symbol: (timestamp, computed_df)}
 _indicator_cache={}
 
+# on-disk 5-min candles per symbol; refreshes fetch only the new bars
+_candle_store=CandleStore(HISTORY_DIR, keep_days=HISTORY_DAYS)
+
+# history legs run here so index / CE / PE downloads overlap
+_history_pool=ThreadPoolExecutor(max_workers=HISTORY_WORKERS)
+_prefetching=set()
+_prefetch_lock=threading.Lock()
+
+# quote snapshot for the current loop iteration: {symbol: ltp}
+_quotes={}
+
 # ================= SAFE PRICE =================
 def get_last_price(symbol):
+    if quote_feed is not None:
+        lp=quote_feed.ltp(symbol, max_age=QUOTE_MAX_AGE_SEC)
+        if lp is not None:
+            return lp
     try:
         data = fyers.quotes({"symbols": symbol})
         if not data or "d" not in data or not data["d"]:
@@ -117,6 +150,59 @@ def get_last_price(symbol):
     except:
         return None
 
+def get_quotes(symbols):
+    """{symbol: ltp} for many symbols: fresh feed prices first, the rest in
+    ONE multi-symbol fyers.quotes call. Symbols without a price are left out."""
+    out={}
+    missing=[]
+    for s in dict.fromkeys(s for s in symbols if s):
+        lp=quote_feed.ltp(s, max_age=QUOTE_MAX_AGE_SEC) if quote_feed is not None else None
+        if lp is not None:
+            out[s]=lp
+        else:
+            missing.append(s)
+    if not missing:
+        return out
+    try:
+        data = fyers.quotes({"symbols": ",".join(missing)})
+        for item in (data or {}).get("d") or []:
+            lp=item.get("v", {}).get("lp") if isinstance(item.get("v"), dict) else None
+            if item.get("s","ok")=="ok" and lp is not None:
+                out[item.get("n")]=lp
+    except:
+        pass
+    return out
+
+def refresh_quotes():
+    """Take this iteration's snapshot: spot, held leg and the CE/PE strikes
+    around the last known spot, in one round trip. Returns spot or None."""
+    global _quotes
+    syms=[SPOT_SYMBOL]
+    if position_type:
+        syms.append(symbol)
+    last_spot=_quotes.get(SPOT_SYMBOL)
+    if last_spot is not None:
+        width=max(QUOTE_NEIGHBOURS, CHAIN_WIDTH if DELTA_STRIKE_SELECTION else 0)
+        syms+=chain_symbols(atm_strike(last_spot), width)
+    _quotes=get_quotes(syms)
+    return _quotes.get(SPOT_SYMBOL)
+
+def quote(sym):
+    """Price from the current snapshot; a single-symbol call only if absent."""
+    lp=_quotes.get(sym)
+    if lp is None:
+        lp=get_last_price(sym)
+        if lp is not None:
+            _quotes[sym]=lp
+    return lp
+
+def track_quotes(*symbols):
+    """Keep the feed on exactly these symbols + spot + the held leg.
+    An ATM roll only swaps the CE/PE pair."""
+    if quote_feed is None:
+        return
+    quote_feed.track([SPOT_SYMBOL, symbol if position_type else None, *symbols])
+
 # ================= UTILS =================
 def commission(price,qty):
     return round(price*qty*COMMISSION_RATE,6)
@@ -124,85 +210,48 @@ def commission(price,qty):
 def calculate_pnl(entry,exit,qty):
     return round((exit-entry)*qty,6)
 
-def save_trade(data):
+# rolling performance aggregates read by the dashboard
+analytics=TradeAnalytics.open(folder, TRADES_FILE)
+
+def save_trade(data,fees=0.0):
     df=pd.DataFrame([data])
     if not os.path.exists(TRADES_FILE):
         df.to_csv(TRADES_FILE,index=False)
     else:
         df.to_csv(TRADES_FILE,mode="a",header=False,index=False)
-
-# ================= HOLIDAY =================
-def fetch_nse_holidays():
-    global NSE_HOLIDAYS
     try:
-        url="https://www.nseindia.com/api/holiday-master?type=trading"
-        headers={"User-Agent":"Mozilla/5.0","Accept":"application/json"}
-        session=requests.Session()
-        session.get("https://www.nseindia.com",headers=headers,timeout=5)
-        response=session.get(url,headers=headers,timeout=5)
-        data=response.json()
-
-        NSE_HOLIDAYS.clear()
-        for item in data["CM"]:
-            h_date=datetime.strptime(item["tradingDate"],"%d-%b-%Y").date()
-            NSE_HOLIDAYS.add(h_date)
-
-        send_telegram("✅ NSE Holidays Loaded")
+        analytics.add({**data,"fees":fees})
     except Exception as e:
-        send_telegram(f"⚠ Holiday Fetch Failed {e}")
+        print(f"Analytics update failed: {e}")
+
+# ================= HOLIDAY / EXPIRY =================
+# Holidays, monthly expiries (holiday-shifted) and option symbol prefixes
+# live in a local store refreshed at most weekly in the background.
+nse_calendar=NseCalendar(CALENDAR_FILE, underlying="BANKNIFTY", notify=send_telegram)
 
 def is_market_open():
     today=ist_today()
     if today.weekday()>=5:
         return False
-    if today in NSE_HOLIDAYS:
+    if nse_calendar.is_holiday(today):
         return False
     return True
 
-# ================= EXPIRY =================
-# NSE moved BANKNIFTY monthly expiry from the last THURSDAY to the last
-# TUESDAY of the month, effective Sep 2025 (circular 111/2025). Weekly
-# BankNifty options were discontinued (Nov 2024) — only the monthly series
-# trades. If the last Tuesday is an exchange holiday, expiry shifts to the
-# previous trading day.
-def get_last_tuesday(year,month):
-    last_day=date(year,month,1)+timedelta(days=32)
-    last_day=last_day.replace(day=1)-timedelta(days=1)
-    while last_day.weekday()!=1:   # Tuesday == 1
-        last_day-=timedelta(days=1)
-    return last_day
-
-def _shift_for_holiday(d):
-    # move back to the previous weekday/non-holiday if expiry lands on one
-    guard=0
-    while (d.weekday()>=5 or d in NSE_HOLIDAYS) and guard<10:
-        d-=timedelta(days=1)
-        guard+=1
-    return d
-
 def get_current_monthly_expiry():
-    global _cached_expiry, _cached_expiry_date
-    today=ist_today()
-    if _cached_expiry is not None and _cached_expiry_date==today:
-        return _cached_expiry
+    return nse_calendar.current_expiry(ist_now())
 
-    now=ist_time()
-    expiry=_shift_for_holiday(get_last_tuesday(today.year,today.month))
+# ================= ATM OPTION =================
+def atm_strike(spot):
+    return int(round(spot/STRIKE_STEP)*STRIKE_STEP)
 
-    # once we're past this month's (possibly shifted) expiry, roll to next month
-    if today>expiry or (today==expiry and now>=time(15,30)):
-        next_month=today.month+1
-        next_year=today.year
-        if next_month==13:
-            next_month=1
-            next_year+=1
-        expiry=_shift_for_holiday(get_last_tuesday(next_year,next_month))
+def option_symbol(strike, option_type):
+    return f"{nse_calendar.option_prefix(ist_now())}{strike}{option_type}"
 
-    _cached_expiry=expiry
-    _cached_expiry_date=today
-    return expiry
+def chain_symbols(center, width):
+    """CE and PE symbols for strikes center-width*STEP .. center+width*STEP."""
+    return [option_symbol(center+k*STRIKE_STEP, ot)
+            for k in range(-width, width+1) for ot in ("CE","PE")]
 
-# ================= ATM OPTION =================
 def get_atm_option(option_type, spot=None):
     if not is_market_open():
         return None
@@ -212,11 +261,29 @@ def get_atm_option(option_type, spot=None):
     if spot is None:
         return None
 
-    strike=int(round(spot/100)*100)
-    expiry=get_current_monthly_expiry()
-    expiry_str=expiry.strftime("%y%b").upper()
+    return option_symbol(atm_strike(spot), option_type)
+
+def years_to_expiry():
+    close=datetime.combine(get_current_monthly_expiry(), time(15,30), IST)
+    return max((close-ist_now()).total_seconds(), 60)/(365*86400)
 
-    return f"NSE:BANKNIFTY{expiry_str}{strike}{option_type}"
+def select_option(option_type, spot):
+    """Strike whose delta is closest to TARGET_DELTA across the quoted chain
+    (IV + delta for every strike in one array pass). Falls back to ATM when
+    the snapshot has no usable chain quotes yet."""
+    atm=get_atm_option(option_type, spot=spot)
+    if atm is None or not DELTA_STRIKE_SELECTION:
+        return atm
+
+    center=atm_strike(spot)
+    strikes=np.arange(center-CHAIN_WIDTH*STRIKE_STEP,
+                      center+(CHAIN_WIDTH+1)*STRIKE_STEP, STRIKE_STEP)
+    syms=[option_symbol(int(k), option_type) for k in strikes]
+    prices=np.array([_quotes.get(s, np.nan) for s in syms], dtype=float)
+
+    i=strike_for_delta(prices, spot, strikes, years_to_expiry(),
+                       RISK_FREE_RATE, option_type=="CE", TARGET_DELTA)
+    return atm if i is None else syms[i]
 
 # ================= DATA =================
 def get_stock_historical_data(data):
@@ -251,53 +318,38 @@ def get_stock_historical_data(data):
         return pd.DataFrame()
 
 # ================= TRENDLINE =================
-def calculate_trendline(df):
+# HA -> Supertrend(10, 3) on HA and ADX on raw candles, one chain per
+# symbol, extended by the new closed bars only (same values as ta.ha /
+# ta.supertrend / ta.adx over the full history). Chains are pickled next to
+# the candle store so a restart resumes them.
+_trendlines=IndicatorBook(
+    lambda: HaSupertrendAdx(st_length=10, multiplier=3, adx_length=ADX_PERIOD),
+    folder=HISTORY_DIR)
+
+def calculate_trendline(sym, df):
+    """Recent closed rows + the forming bar's preview (HA_*, ST, ADX)."""
     try:
-        if df is None or df.empty or len(df) < 30:
-            return pd.DataFrame()
-
-        ha = ta.ha(df["Open"],df["High"],df["Low"],df["Close"])
-        if ha is None or ha.empty:
-            return pd.DataFrame()
-
-        data=df.copy()
-        data["HA_Close"]=ha["HA_close"]
-        data["HA_Open"]=ha["HA_open"]
-        data["HA_High"]=ha["HA_high"]
-        data["HA_Low"]=ha["HA_low"]
-
-        st = ta.supertrend(
-            high=data["HA_High"],
-            low=data["HA_Low"],
-            close=data["HA_Close"],
-            length=10,
-            multiplier=3
-        )
-
-        if st is None or st.empty:
-            return pd.DataFrame()
-
-        st_col = [c for c in st.columns if "SUPERT" in c]
-        if not st_col:
-            return pd.DataFrame()
-
-        data["ST"] = st[st_col[0]].ffill()
-
-        adx = ta.adx(df["High"],df["Low"],df["Close"],length=ADX_PERIOD)
-        if adx is None or "ADX_14" not in adx.columns:
-            return pd.DataFrame()
-
-        data["ADX"] = adx["ADX_14"]
-
-        data.dropna(inplace=True)
-        return data
-
+        return _trendlines.sync(sym, df)
     except Exception as e:
         send_telegram(f"⚠ Trendline Error {e}")
         return pd.DataFrame()
 
 # ================= CACHED INDICATOR FETCH (perf) =================
-def get_indicators(sym, hist_template):
+def get_history(sym):
+    """5-min candles for sym from the candle store; only bars since the last
+    stored one are downloaded (epoch range, date_format 0)."""
+    def fetch(range_from, range_to):
+        return get_stock_historical_data({
+            "symbol":sym,
+            "resolution":"5",
+            "date_format":"0",
+            "range_from":str(range_from),
+            "range_to":str(range_to),
+            "cont_flag":"1"
+        })
+    return _candle_store.update(sym, fetch)
+
+def get_indicators(sym):
     """Fetch history + compute indicators, but reuse a cached result if it
     is younger than INDICATOR_REFRESH_SEC. 5-min candles only change every
     300s, so recomputing every loop is wasted work."""
@@ -308,27 +360,54 @@ def get_indicators(sym, hist_template):
         if (now-ts).total_seconds() < INDICATOR_REFRESH_SEC:
             return cdf
 
-    h=hist_template.copy()
-    h["symbol"]=sym
-    raw=get_stock_historical_data(h)
+    raw=get_history(sym)
     if raw.empty:
         return pd.DataFrame()
-    computed=calculate_trendline(raw)
+    computed=calculate_trendline(sym, raw)
     if not computed.empty:
         _indicator_cache[sym]=(now, computed)
     return computed
 
+def get_indicators_many(syms):
+    """get_indicators for several legs at once. Each worker downloads and
+    then computes its leg, so one leg's indicators overlap the others'
+    downloads. Returns {symbol: df}."""
+    futures={s:_history_pool.submit(get_indicators, s) for s in dict.fromkeys(syms)}
+    return {s:f.result() for s,f in futures.items()}
+
+def _is_fresh(sym):
+    cached=_indicator_cache.get(sym)
+    return cached is not None and (ist_now()-cached[0]).total_seconds() < INDICATOR_REFRESH_SEC
+
+def prefetch_indicators(syms):
+    """Warm the cache for strikes we may roll onto, in the background."""
+    def run(s):
+        try:
+            get_indicators(s)
+        finally:
+            with _prefetch_lock:
+                _prefetching.discard(s)
+
+    for s in syms:
+        with _prefetch_lock:
+            if s in _prefetching or _is_fresh(s):
+                continue
+            _prefetching.add(s)
+        _history_pool.submit(run, s)
+
 # ================= EXIT =================
-def exit_trade(reason):
+def exit_trade(reason, price=None):
     global position_type,last_exit_time,stop_loss,trail_level,running_high
     global entry_price, entry_time, symbol
     global last_exit_symbol, last_exit_symbol_time
 
-    price = get_last_price(symbol)
+    if price is None:
+        price = quote(symbol)
     if price is None:
         return
 
-    net=calculate_pnl(entry_price,price,QTY)-commission(price,QTY)
+    fee=commission(price,QTY)
+    net=calculate_pnl(entry_price,price,QTY)-fee
 
     save_trade({
         "entry_time":entry_time.isoformat(),
@@ -339,7 +418,7 @@ def exit_trade(reason):
         "exit_price":price,
         "qty":QTY,
         "net_pnl":net
-    })
+    },fees=fee)
 
     send_telegram(f"🔁 EXIT {symbol} | {reason} | PnL ₹{round(net,2)}")
 
@@ -373,7 +452,7 @@ def check_hard_exits(price):
     if price is None or stop_loss is None:
         return False
     if price <= stop_loss:
-        exit_trade("Stop Loss / Trail")
+        exit_trade("Stop Loss / Trail", price)
         return True
     return False
 
@@ -395,30 +474,28 @@ def run_strategy():
     if last_exit_time and (ist_now()-last_exit_time).total_seconds()<RE_ENTRY_COOLDOWN:
         return
 
-    # ---------- HISTORY TEMPLATE ----------
-    hist_template={
-        "resolution":"5",
-        "date_format":"1",
-        "range_from":(ist_today()-timedelta(days=5)).strftime("%Y-%m-%d"),
-        "range_to":ist_today().strftime("%Y-%m-%d"),
-        "cont_flag":"1"
-    }
-
-    # ---------- SPOT (one quote, reused for both legs) ----------
-    spot=get_last_price(SPOT_SYMBOL)
+    # ---------- QUOTE SNAPSHOT (one batched call, shared below) ----------
+    spot=refresh_quotes()
     if spot is None:
         return
 
-    ce_symbol=get_atm_option("CE", spot=spot)
-    pe_symbol=get_atm_option("PE", spot=spot)
+    ce_symbol=select_option("CE", spot)
+    pe_symbol=select_option("PE", spot)
 
     if ce_symbol is None or pe_symbol is None:
         return
 
+    # ATM rolled past the prefetched strikes: one more call for the new pair
+    missing=[s for s in (ce_symbol, pe_symbol) if s not in _quotes]
+    if missing:
+        _quotes.update(get_quotes(missing))
+
+    track_quotes(ce_symbol, pe_symbol)
+
     # ================= EXIT BRANCH (checked first, price-driven) =================
     if position_type:
 
-        price = get_last_price(symbol)
+        price = quote(symbol)
 
         # 1) hard SL / trailing — pure price, most responsive
         update_trailing(price)
@@ -433,9 +510,10 @@ def run_strategy():
         if price is None:
             return
 
-        # 3) supertrend break on the leg we actually hold (cached indicators)
+        # 3) supertrend break on the leg we actually hold (cached indicators);
+        #    the currently selected strike may differ from the held one
         if position_type=="CE":
-            df_ce=get_indicators(ce_symbol, hist_template)
+            df_ce=get_indicators(symbol)
             if df_ce.empty or len(df_ce)<5:
                 return
             ce_last=df_ce.iloc[-2]
@@ -444,7 +522,7 @@ def run_strategy():
                 return
 
         if position_type=="PE":
-            df_pe=get_indicators(pe_symbol, hist_template)
+            df_pe=get_indicators(symbol)
             if df_pe.empty or len(df_pe)<5:
                 return
             pe_last=df_pe.iloc[-2]
@@ -454,8 +532,13 @@ def run_strategy():
         return
 
     # ================= ENTRY BRANCH =================
-    # Index indicators always needed for entry
-    df_index=get_indicators(SPOT_SYMBOL, hist_template)
+    # Index + both ATM legs fetched concurrently; the neighbouring strikes
+    # are warmed in the background so a strike roll isn't a cold fetch.
+    legs=get_indicators_many([SPOT_SYMBOL, ce_symbol, pe_symbol])
+    prefetch_indicators(
+        [s for s in chain_symbols(atm_strike(spot), 1) if s not in (ce_symbol, pe_symbol)])
+
+    df_index=legs[SPOT_SYMBOL]
     if df_index.empty or len(df_index)<5:
         return
 
@@ -482,7 +565,7 @@ def run_strategy():
         if index_last.HA_Close > index_last.ST and index_bullish:
             if blocked_recent_strike(ce_symbol):
                 return
-            df_ce=get_indicators(ce_symbol, hist_template)
+            df_ce=legs[ce_symbol]
             if df_ce.empty or len(df_ce)<5:
                 return
             ce_last=df_ce.iloc[-2]
@@ -502,7 +585,7 @@ def run_strategy():
         elif index_last.HA_Close < index_last.ST and index_bearish:
             if blocked_recent_strike(pe_symbol):
                 return
-            df_pe=get_indicators(pe_symbol, hist_template)
+            df_pe=legs[pe_symbol]
             if df_pe.empty or len(df_pe)<5:
                 return
             pe_last=df_pe.iloc[-2]
@@ -519,7 +602,7 @@ def run_strategy():
         else:
             return
 
-        price=get_last_price(symbol)
+        price=quote(symbol)
         if price is None:
             position_type=None
             return
@@ -536,19 +619,40 @@ def run_strategy():
         return
 
 # ================= AUTH =================
-def load_token():
-    os.system("python auth/fyers_auth.py")
-    return True
+token_manager=TokenManager(TOKEN_FILE)
+
+def start_quote_feed(token):
+    """(Re)start the streaming feed on a fresh token; REST stays the fallback."""
+    global quote_feed
+    if quote_feed is not None and getattr(quote_feed, "token", None) == token:
+        return
+    tracked=quote_feed.tracked if quote_feed is not None else set()
+    if quote_feed is not None:
+        quote_feed.stop()
+    try:
+        feed=FyersQuoteFeed(CLIENT_ID, token)
+        feed.track(tracked or [SPOT_SYMBOL])
+        quote_feed=feed.start()
+        send_telegram("📶 Quote Feed Connected")
+    except Exception as e:
+        quote_feed=None
+        send_telegram(f"⚠ Quote Feed Failed, using REST quotes: {e}")
+
+def apply_token(token):
+    """Background refresh: hand the live model and feed the new token."""
+    if fyers is not None:
+        fyers.token=token
+        fyers.header=f"{CLIENT_ID}:{token}"
+    start_quote_feed(token)
+    send_telegram("🔑 Fyers Token Refreshed")
+
+token_manager.on_refresh(apply_token)
 
 def load_model():
     try:
-        with open(TOKEN_FILE) as f:
-            token=f.read().strip()
-    except FileNotFoundError:
-        send_telegram(f"⚠ Token file not found: {TOKEN_FILE}")
-        return None
-    if not token:
-        send_telegram("⚠ Token file is empty")
+        token=token_manager.token()
+    except Exception as e:
+        send_telegram(f"⚠ Fyers login failed: {e}")
         return None
 
     model=fyersModel.FyersModel(
@@ -559,6 +663,7 @@ def load_model():
     )
 
     send_telegram("📡 Fyers Model Connected")
+    start_quote_feed(token)
     return model
 
 # ================= DAILY RESET =================
@@ -566,7 +671,7 @@ def daily_reset():
     global position_type, entry_price, entry_time
     global symbol, last_exit_time
     global stop_loss, trail_level, running_high
-    global _indicator_cache, _cached_expiry, _cached_expiry_date
+    global _indicator_cache
     global last_exit_symbol, last_exit_symbol_time
 
     position_type=None
@@ -580,8 +685,8 @@ def daily_reset():
     last_exit_symbol=None
     last_exit_symbol_time=None
     _indicator_cache={}
-    _cached_expiry=None
-    _cached_expiry_date=None
+    # candles stay on disk across days; only drop symbols gone stale
+    _candle_store.prune()
 
     send_telegram("🔄 Daily Reset Completed")
 
@@ -589,6 +694,9 @@ def daily_reset():
 send_telegram("🚀 BankNifty Option Trend Algo Started")
 print("🚀 BankNifty Option Trend Algo Started")
 
+# refreshes the token before the open so load_model() is instant
+token_manager.start()
+
 while True:
     try:
         now=ist_time()
@@ -598,17 +706,12 @@ while True:
             daily_reset()
             last_reset_date = today
 
-        # Load holidays at 8:55, OR immediately if the bot started late and
-        # hasn't loaded them yet today (otherwise holidays look like open days).
-        if holiday_load_date!=today and (time(8,55)<=now<time(9,0) or now>=time(9,0)):
-            fetch_nse_holidays()
+        # Calendar comes from disk; once a day make sure it isn't older than
+        # a week (the NSE scrape then runs in the background).
+        if holiday_load_date!=today:
+            nse_calendar.ensure()
             holiday_load_date=today
 
-        if time(9,0)<=now<time(15,30):
-            if token_load_date!=today:
-                load_token()
-                token_load_date=today
-
         if time(9,0)<=now<time(15,30):
             if model_load_date!=today:
                 m=load_model()
@@ -621,10 +724,16 @@ while True:
             if is_market_open():
                 run_strategy()
 
-        # Adaptive sleep: poll fast while holding a position so SL/trail/time
-        # exits stay responsive; slower while idle. Heavy indicator work is
-        # throttled separately by INDICATOR_REFRESH_SEC inside get_indicators.
-        t.sleep(2 if position_type else 20)
+        # Adaptive sleep: while holding a position wake on the next tick of
+        # the held leg (or every TICK_WAIT_SEC without a feed) so SL/trail/time
+        # exits fire on the tick that crosses them; slower while idle. Heavy
+        # indicator work is throttled by INDICATOR_REFRESH_SEC in get_indicators.
+        if position_type and quote_feed is not None and quote_feed.connected.is_set():
+            quote_feed.wait_for_tick([symbol], timeout=TICK_WAIT_SEC)
+        elif position_type:
+            t.sleep(TICK_WAIT_SEC)
+        else:
+            t.sleep(20)
 
     except Exception as e:
         send_telegram(f"❌ Algo Error: {e}")
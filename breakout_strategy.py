@@ -58,6 +58,7 @@ from datetime import datetime
 
 from dotenv import load_dotenv
 
+from products import catalog
 from utils import TradingUtils
 
 load_dotenv()
@@ -68,7 +69,9 @@ BOT_NAME = "breakout_strategy"
 SYMBOLS = ["BTCUSD"]
 
 DEFAULT_CONTRACTS = {"BTCUSD": 1000}
-CONTRACT_SIZE = {"BTCUSD": 0.001}
+# from /v2/products; the fixed sizes only apply offline with no cache
+CONTRACT_SIZE = catalog.contract_sizes(
+    SYMBOLS, fallback={"BTCUSD": 0.001})
 
 TAKER_FEE = 0.0005
 MIN_BALANCE = 1000
@@ -382,6 +385,7 @@ def _close_position(state, symbol, exit_price, now, reason):
         "exit_price": exit_price,
         "qty": posn["qty"],
         "net_pnl": round(net, 6),
+        "fees": round(fees, 6),
         "entry_time": posn["entry_time"],
         "exit_time": now,
     })
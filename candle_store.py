@@ -0,0 +1,100 @@
+"""
+candle_store.py
+
+On-disk, per-symbol candle store that only downloads bars it doesn't have.
+
+    store = CandleStore("data/Trend_Following/history", keep_days=5)
+    df = store.update("NSE:NIFTYBANK-INDEX", fetch)
+
+`fetch(range_from, range_to)` takes epoch seconds and returns an OHLCV
+DataFrame indexed by (naive UTC) bar time. The first call for a symbol
+downloads keep_days of history; after that only the last stored bar (it
+may still have been forming) onward is requested and merged in. Files
+survive restarts, so the morning start and a mid-day strike roll onto a
+strike seen earlier cost one short request instead of a full window.
+"""
+
+import os
+import re
+import time
+import threading
+
+import pandas as pd
+
+
+class CandleStore:
+
+    def __init__(self, folder, keep_days=5):
+        self.folder = folder
+        self.keep_days = keep_days
+        os.makedirs(folder, exist_ok=True)
+        self._frames = {}       # symbol -> DataFrame
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _path(self, symbol):
+        return os.path.join(self.folder,
+                            re.sub(r"[^A-Za-z0-9_-]", "_", symbol) + ".csv")
+
+    def _lock(self, symbol):
+        with self._guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def load(self, symbol):
+        df = self._frames.get(symbol)
+        if df is not None:
+            return df
+        try:
+            df = pd.read_csv(self._path(symbol), index_col="Date",
+                             parse_dates=["Date"])
+        except (FileNotFoundError, ValueError):
+            df = pd.DataFrame()
+        self._frames[symbol] = df
+        return df
+
+    def _cutoff(self):
+        now = pd.Timestamp.now("UTC").tz_localize(None)
+        return now.normalize() - pd.Timedelta(days=self.keep_days)
+
+    def update(self, symbol, fetch):
+        """
+        Merge bars since the last stored one and return the full window.
+        Returns an empty DataFrame if the download failed, so callers never
+        trade on a stale window.
+        """
+        with self._lock(symbol):
+            df = self.load(symbol)
+            now = int(time.time())
+            if df.empty:
+                start = int(self._cutoff().timestamp())
+            else:
+                start = int(df.index[-1].timestamp())
+
+            new = fetch(start, now)
+            if new is None or new.empty:
+                return pd.DataFrame()
+
+            old_bars = (len(df), df.index[-1] if len(df) else None)
+            if not df.empty:
+                df = pd.concat([df[df.index < new.index[0]], new])
+            else:
+                df = new
+            df = df[df.index >= self._cutoff()]
+            self._frames[symbol] = df
+            if df.empty:
+                return df
+
+            # Only new bars need to reach disk; the forming bar is refetched.
+            if (len(df), df.index[-1]) != old_bars:
+                df.to_csv(self._path(symbol), index_label="Date")
+            return df
+
+    def prune(self):
+        """Delete files (candles and any state kept beside them) for symbols
+        not updated within keep_days."""
+        limit = time.time() - self.keep_days * 86400
+        for name in os.listdir(self.folder):
+            path = os.path.join(self.folder, name)
+            if os.path.isfile(path) and os.path.getmtime(path) < limit:
+                os.remove(path)
+        self._frames.clear()
@@ -0,0 +1,112 @@
+"""
+chart_render.py
+
+Keeps Plotly payloads small for long histories in the dashboards.
+
+  • lttb / downsample_line   Largest-Triangle-Three-Buckets: keeps the
+                             visual shape (peaks, troughs) of a line with a
+                             fixed number of points
+  • aggregate_ohlc           merges runs of k candles into one (first open,
+                             max high, min low, last close, summed volume)
+  • line_trace               go.Scattergl past WEBGL_THRESHOLD points,
+                             plain go.Scatter (SVG) below it
+
+    plot_df, k = aggregate_ohlc(df.tail(bars), MAX_CANDLES)
+    fig.add_trace(line_trace(*downsample_line(x, y, MAX_LINE_POINTS), name="PnL"))
+"""
+
+import math
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+MAX_CANDLES = 400          # candles actually sent to the browser
+MAX_LINE_POINTS = 2000     # points per line after LTTB
+WEBGL_THRESHOLD = 1000     # switch line traces to WebGL past this
+
+
+def lttb(x, y, n_out):
+    """Indices of the n_out points LTTB keeps (first and last always)."""
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    xs = np.asarray(x, dtype=float)
+    ys = np.asarray(y, dtype=float)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)   # n_out - 2 buckets
+
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+    a = 0
+    for b in range(n_out - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # average of the next bucket (or the last point) is the third vertex
+        nlo, nhi = hi, edges[b + 2] if b + 2 < len(edges) else n
+        cx, cy = xs[nlo:nhi].mean(), ys[nlo:nhi].mean()
+
+        bx, by = xs[lo:hi], ys[lo:hi]
+        area = np.abs((xs[a] - cx) * (by - ys[a]) - (xs[a] - bx) * (cy - ys[a]))
+        a = lo + int(np.nanargmax(area)) if np.isfinite(area).any() else lo
+        keep[b + 1] = a
+    return keep
+
+
+def _as_float(x):
+    x = pd.Index(x)
+    if isinstance(x, pd.DatetimeIndex):
+        return x.asi8.astype(float)
+    return np.asarray(x, dtype=float)
+
+
+def downsample_line(x, y, max_points=MAX_LINE_POINTS):
+    """(x, y) reduced to at most max_points with LTTB; NaNs are dropped."""
+    x = pd.Index(x)
+    y = np.asarray(y, dtype=float)
+    ok = ~np.isnan(y)
+    x, y = x[ok], y[ok]
+    if len(y) <= max_points:
+        return x, y
+    idx = lttb(_as_float(x), y, max_points)
+    return x[idx], y[idx]
+
+
+def bucket_size(n, max_bars=MAX_CANDLES):
+    return max(1, math.ceil(n / max_bars))
+
+
+def aggregate_ohlc(df, max_bars=MAX_CANDLES, open_="Open", high="High",
+                   low="Low", close="Close", volume="Volume"):
+    """
+    Merge runs of k consecutive candles so at most max_bars remain; each
+    bucket is stamped with its first bar's time. Returns (frame, k).
+    """
+    k = bucket_size(len(df), max_bars)
+    if k == 1:
+        return df, 1
+    group = np.arange(len(df)) // k
+    agg = {open_: "first", high: "max", low: "min", close: "last"}
+    if volume in df:
+        agg[volume] = "sum"
+    out = df.groupby(group).agg(agg)
+    out.index = df.index[::k]
+    return out, k
+
+
+def aggregate_last(series, k):
+    """Last value of each run of k (aligned with aggregate_ohlc buckets)."""
+    if k == 1:
+        return series
+    values = pd.Series(np.asarray(series)).groupby(np.arange(len(series)) // k).last()
+    values.index = pd.Index(series.index)[::k]
+    return values
+
+
+def line_trace(x, y, threshold=WEBGL_THRESHOLD, **kwargs):
+    """Scatter trace, WebGL (Scattergl) once the series is long."""
+    if len(y) > threshold:
+        # markers on thousands of points only cost time in the browser
+        if kwargs.get("mode") == "lines+markers":
+            kwargs["mode"] = "lines"
+        return go.Scattergl(x=x, y=y, **kwargs)
+    return go.Scatter(x=x, y=y, **kwargs)
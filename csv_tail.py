@@ -0,0 +1,91 @@
+"""
+csv_tail.py
+
+Growing CSV files parsed only from where the last read stopped.
+
+    tail = CsvTail("data/x/live_trades.csv", parse_dates=["exit_time"])
+    frame, new_rows = tail.read()     # new_rows: only what was appended
+
+Each read stats the file first; unchanged size + mtime costs nothing. New
+complete lines after the remembered offset are parsed with the saved
+header line (a half-written last line waits for the next read). If the
+file shrank or the bytes before the offset changed (it was rewritten, not
+appended to) the whole file is parsed again.
+"""
+
+import io
+import os
+import threading
+
+import pandas as pd
+
+GUARD_BYTES = 64       # bytes before the offset checked to detect rewrites
+
+
+class CsvTail:
+
+    def __init__(self, path, parse_dates=None, index_col=None):
+        self.path = path
+        self.parse_dates = parse_dates
+        self.index_col = index_col
+        self.lock = threading.Lock()
+        self._reset()
+
+    def _reset(self):
+        self.offset = 0
+        self.stamp = None              # (size, mtime_ns) at the last read
+        self.header = b""
+        self.guard = b""
+        self.frame = pd.DataFrame()
+
+    def _parse(self, body):
+        return pd.read_csv(io.BytesIO(self.header + body),
+                           parse_dates=self.parse_dates,
+                           index_col=self.index_col)
+
+    def _rewritten(self, f, size):
+        if size < self.offset:
+            return True
+        f.seek(0)
+        if f.read(len(self.header)) != self.header:
+            return True
+        f.seek(self.offset - len(self.guard))
+        return f.read(len(self.guard)) != self.guard
+
+    def read(self):
+        """(full frame, newly appended rows). Missing file -> empty frames."""
+        with self.lock:
+            try:
+                st = os.stat(self.path)
+            except FileNotFoundError:
+                self._reset()
+                return self.frame, self.frame
+            stamp = (st.st_size, st.st_mtime_ns)
+            if stamp == self.stamp:
+                return self.frame, self.frame.iloc[:0]
+
+            with open(self.path, "rb") as f:
+                if self.offset and self._rewritten(f, st.st_size):
+                    self._reset()
+                if not self.offset:
+                    f.seek(0)
+                    self.header = f.readline()
+                    if not self.header.endswith(b"\n"):
+                        self.header = b""
+                        return self.frame, self.frame   # header still being written
+                    self.offset = len(self.header)
+                    self.guard = self.header[-GUARD_BYTES:]
+                f.seek(self.offset)
+                chunk = f.read(st.st_size - self.offset)
+
+            end = chunk.rfind(b"\n") + 1           # complete lines only
+            self.stamp = stamp if end == len(chunk) else None
+            if not end:
+                return self.frame, self.frame.iloc[:0]
+
+            body = chunk[:end]
+            new = self._parse(body)
+            self.offset += end
+            self.guard = (self.guard + body)[-GUARD_BYTES:]
+            self.frame = new if self.frame.empty else pd.concat([self.frame, new])
+            return self.frame, new
@@ -0,0 +1,171 @@
+"""
+fyers_feed.py
+
+Streaming last-traded prices for the BankNifty bot.
+
+    feed = FyersQuoteFeed(CLIENT_ID, token).start()
+    feed.track(["NSE:NIFTYBANK-INDEX", ce_symbol, pe_symbol])
+    feed.ltp("NSE:NIFTYBANK-INDEX", max_age=5)   # None if missing/stale
+    feed.wait_for_tick([held_symbol], timeout=2)  # wake on the next tick
+
+track() re-subscribes only the difference, so an ATM strike roll swaps one
+CE/PE pair without touching the rest. LocalQuoteFeed has the same
+interface with push() instead of a socket, for tests and dry runs.
+"""
+
+import threading
+import time
+
+
+class QuoteFeed:
+    """In-memory LTP book shared by the socket thread and the strategy loop."""
+
+    def __init__(self):
+        self._ltp = {}          # symbol -> (ltp, monotonic ts)
+        self._tracked = set()
+        self._cond = threading.Condition()
+
+    # ================= SUBSCRIPTION (override) =================
+
+    def _subscribe(self, symbols):
+        pass
+
+    def _unsubscribe(self, symbols):
+        pass
+
+    def start(self):
+        return self
+
+    def stop(self):
+        pass
+
+    # ================= TICKS =================
+
+    def on_tick(self, symbol, ltp):
+        with self._cond:
+            self._ltp[symbol] = (float(ltp), time.monotonic())
+            self._cond.notify_all()
+
+    def ltp(self, symbol, max_age=None):
+        """Last traded price, or None if never seen / older than max_age s."""
+        with self._cond:
+            item = self._ltp.get(symbol)
+        if item is None:
+            return None
+        price, ts = item
+        if max_age is not None and time.monotonic() - ts > max_age:
+            return None
+        return price
+
+    def wait_for_tick(self, symbols, timeout):
+        """Block until any of `symbols` ticks again, or timeout. Returns bool."""
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            seen = {s: self._ltp.get(s, (None, 0.0))[1] for s in symbols}
+            while True:
+                for s in symbols:
+                    if self._ltp.get(s, (None, 0.0))[1] > seen[s]:
+                        return True
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+
+    def track(self, symbols):
+        """Subscribe to exactly `symbols` (drops the rest)."""
+        wanted = {s for s in symbols if s}
+        with self._cond:
+            added = wanted - self._tracked
+            removed = self._tracked - wanted
+            self._tracked = wanted
+            for s in removed:
+                self._ltp.pop(s, None)
+        if removed:
+            self._unsubscribe(sorted(removed))
+        if added:
+            self._subscribe(sorted(added))
+
+    @property
+    def tracked(self):
+        with self._cond:
+            return set(self._tracked)
+
+
+class LocalQuoteFeed(QuoteFeed):
+    """Socket-free stand-in: feed prices with push()."""
+
+    def __init__(self):
+        super().__init__()
+        self.subscriptions = []     # (action, symbols) log for assertions
+
+    def _subscribe(self, symbols):
+        self.subscriptions.append(("subscribe", symbols))
+
+    def _unsubscribe(self, symbols):
+        self.subscriptions.append(("unsubscribe", symbols))
+
+    def push(self, symbol, ltp):
+        self.on_tick(symbol, ltp)
+
+
+class FyersQuoteFeed(QuoteFeed):
+    """Fyers data socket (lite mode: symbol + ltp only)."""
+
+    def __init__(self, client_id, token):
+        super().__init__()
+        self.client_id = client_id
+        self.token = token
+        self._socket = None
+        self.connected = threading.Event()
+
+    def _on_message(self, msg):
+        if not isinstance(msg, dict):
+            return
+        symbol = msg.get("symbol")
+        ltp = msg.get("ltp")
+        if symbol and ltp is not None:
+            self.on_tick(symbol, ltp)
+
+    def _on_connect(self):
+        self.connected.set()
+        # Fresh connection (first or reconnect): subscribe everything tracked.
+        tracked = sorted(self.tracked)
+        if tracked:
+            self._subscribe(tracked)
+
+    def _on_close(self, msg):
+        self.connected.clear()
+
+    def _subscribe(self, symbols):
+        if self._socket is not None and self.connected.is_set():
+            self._socket.subscribe(symbols=symbols, data_type="SymbolUpdate")
+
+    def _unsubscribe(self, symbols):
+        if self._socket is not None and self.connected.is_set():
+            self._socket.unsubscribe(symbols=symbols, data_type="SymbolUpdate")
+
+    def start(self):
+        # Imported here so the local feed works without the SDK installed.
+        from fyers_apiv3.FyersWebsocket import data_ws
+
+        self._socket = data_ws.FyersDataSocket(
+            access_token=f"{self.client_id}:{self.token}",
+            log_path="",
+            litemode=True,
+            write_to_file=False,
+            reconnect=True,
+            on_connect=self._on_connect,
+            on_close=self._on_close,
+            on_error=lambda msg: print(f"Quote feed error: {msg}"),
+            on_message=self._on_message,
+        )
+        self._socket.connect()
+        return self
+
+    def stop(self):
+        if self._socket is not None:
+            try:
+                self._socket.close_connection()
+            except Exception:
+                pass
+        self.connected.clear()
@@ -2,7 +2,13 @@ import streamlit as st
 from streamlit_autorefresh import st_autorefresh
 import pandas as pd
 import os
+import time
 import plotly.graph_objects as go
+from chart_render import downsample_line, line_trace
+from csv_tail import CsvTail
+from bar_log import BarLogReader
+from shared_market import SharedMarketReader
+from trade_analytics import read_summary, read_equity, derived, summarize, SUMMARY_FILE
 
 # ================== CONFIG ==================
 DATA_DIR = os.path.join(os.getcwd(), "data")
@@ -14,8 +20,112 @@ STRATEGIES = {
     if os.path.isdir(os.path.join(DATA_DIR, name))
 }
 
+
+# ================== INCREMENTAL LOADING ==================
+# Parsed files live in a process-wide cache across the 30s reruns; each
+# rerun only parses rows appended since the last one.
+@st.cache_resource
+def csv_tail(path, index_col=None, parse_dates=None):
+    return CsvTail(path, parse_dates=list(parse_dates or []) or None,
+                   index_col=index_col)
+
+
+class TradeBook:
+    """live_trades.csv plus per-symbol cumulative PnL, extended in place."""
+
+    def __init__(self, path):
+        self.tail = CsvTail(path, parse_dates=["entry_time", "exit_time"])
+        self.trades = pd.DataFrame()
+        self.by_symbol = {}     # symbol -> (rows with cumulative_pnl, rows seen)
+
+    def refresh(self):
+        frame, new = self.tail.read()
+        if new.empty and len(frame) == len(self.trades):
+            return self.trades
+        new = new.copy()
+        if not new.empty:
+            new["symbol_clean"] = new["symbol"].str.replace(r"[^A-Z]", "", regex=True).str.upper()
+        if len(new) == len(frame):      # first load or file rewritten
+            self.trades = new
+            self.by_symbol.clear()
+        else:
+            self.trades = pd.concat([self.trades, new])
+        return self.trades
+
+    @staticmethod
+    def _match(rows, symbol_clean):
+        return rows[(rows["symbol_clean"] == symbol_clean) |
+                    (rows["symbol_clean"].str.contains(symbol_clean, na=False))]
+
+    def for_symbol(self, symbol_clean):
+        rows, seen = self.by_symbol.get(symbol_clean, (None, 0))
+        new = self._match(self.trades.iloc[seen:], symbol_clean)
+        new = new.sort_values(by="exit_time")
+
+        if rows is not None and (new.empty or rows.empty or
+                                 new["exit_time"].iloc[0] >= rows["exit_time"].iloc[-1]):
+            if not new.empty:
+                new = new.copy()
+                start = rows["cumulative_pnl"].iloc[-1] if not rows.empty else 0
+                new["cumulative_pnl"] = start + new["net_pnl"].cumsum()
+                rows = pd.concat([rows, new])
+        else:
+            # nothing cached yet, or a trade closed before the last one we have
+            rows = self._match(self.trades, symbol_clean).sort_values(by="exit_time").copy()
+            rows["cumulative_pnl"] = rows["net_pnl"].cumsum()
+
+        self.by_symbol[symbol_clean] = (rows, len(self.trades))
+        return rows
+
+
+@st.cache_resource
+def bar_log(path):
+    return BarLogReader(path)
+
+
+@st.cache_resource
+def shared_market_reader(name):
+    return SharedMarketReader.attach(name)
+
+
+def live_market(name):
+    """Reader on a running bot's shared market (None if it isn't running)."""
+    reader = shared_market_reader(name)
+    if reader is None or reader.closed:
+        if reader is not None:
+            reader.close()
+        shared_market_reader.clear()
+        reader = shared_market_reader(name)
+    return reader
+
+
+@st.cache_resource
+def trade_book(path):
+    return TradeBook(path)
+
+
+@st.cache_data(max_entries=1)
+def load_analytics(folder, stamp):
+    """Stored aggregates + LTTB'd equity curve; `stamp` (mtime) keys the cache."""
+    summary = read_summary(folder)
+    t, equity = read_equity(folder)
+    x, y = downsample_line(pd.to_datetime(t, unit="s"), equity)
+    return summary, x, y
+
+
+@st.cache_data(max_entries=1)
+def summarize_journal(path, rows, _trades):
+    """Same view computed in memory for a journal the bot hasn't stored yet."""
+    summary, t, equity = summarize(_trades)
+    x, y = downsample_line(pd.to_datetime(t, unit="s"), equity)
+    return summary, x, y
+
+
 st.set_page_config(page_title="Unified Trading Dashboard", layout="wide")
-st_autorefresh(interval=30 * 1000, key="datarefresh")
+
+# Bar logs and CSVs are tailed, so a short interval only costs new records.
+refresh_sec = st.sidebar.selectbox("Auto-refresh every (s)", [1, 5, 30], index=2)
+st_autorefresh(interval=refresh_sec * 1000, key="datarefresh")
 
 st.title("📊 Unified Trading Dashboard")
 
@@ -23,8 +133,11 @@ st.title("📊 Unified Trading Dashboard")
 selected_strategy = st.sidebar.selectbox("Select Strategy", options=list(STRATEGIES.keys()))
 SAVE_DIR = STRATEGIES[selected_strategy]
 
-# Load processed data files
-data_files = [f for f in os.listdir(SAVE_DIR) if f.endswith("_processed.csv")]
+# Per-symbol bot output: binary bar logs (preferred) or processed CSVs
+data_files = sorted(
+    (f for f in os.listdir(SAVE_DIR) if f.endswith(("_bars.bin", "_processed.csv"))),
+    key=lambda f: not f.endswith("_bars.bin"),
+)
 
 # Locate live_trades.csv
 local_trades_file = os.path.join(SAVE_DIR, "live_trades.csv")
@@ -41,8 +154,7 @@ else:
 trades_df = pd.DataFrame()
 if trades_file:
     try:
-        trades_df = pd.read_csv(trades_file, parse_dates=["entry_time", "exit_time"])
-        trades_df["symbol_clean"] = trades_df["symbol"].str.replace(r"[^A-Z]", "", regex=True).str.upper()
+        trades_df = trade_book(trades_file).refresh()
     except Exception as e:
         st.error(f"Error reading live_trades.csv: {e}")
 
@@ -55,6 +167,46 @@ if not all_symbols:
     st.warning("No symbols found in data or live_trades.csv.")
     st.stop()
 
+# ================== PERFORMANCE ==================
+# Aggregates are kept by the bots as trades close (trade_analytics.py); the
+# dashboard only reads the store, and summarizes the journal in memory for
+# a strategy that has none yet.
+summary_path = os.path.join(SAVE_DIR, SUMMARY_FILE)
+summary = None
+if os.path.exists(summary_path):
+    summary, eq_x, eq_y = load_analytics(SAVE_DIR, os.stat(summary_path).st_mtime_ns)
+elif not trades_df.empty:
+    summary, eq_x, eq_y = summarize_journal(trades_file, len(trades_df), trades_df)
+
+if summary and summary["trades"]:
+    ratios = derived(summary)
+    st.header(f"📐 Performance - {selected_strategy}")
+    cols = st.columns(7)
+    cols[0].metric("Trades", summary["trades"])
+    cols[1].metric("Net PNL", f"{summary['net']:,.2f}")
+    cols[2].metric("Win Rate", f"{ratios['win_rate']:.1%}")
+    cols[3].metric("Profit Factor", f"{ratios['profit_factor']:.2f}")
+    cols[4].metric("Max Drawdown", f"{summary['max_drawdown']:,.2f}")
+    cols[5].metric("Fees", f"{summary['fees']:,.2f}")
+    cols[6].metric("Sharpe (daily)", f"{ratios['sharpe_daily']:.2f}")
+    st.caption(f"Avg trade {ratios['avg_trade']:,.2f} | "
+               f"Sharpe per trade {ratios['sharpe_trade']:.2f} | "
+               f"Avg hold {ratios['avg_hold_min']:.1f} min")
+
+    fig_eq = go.Figure()
+    fig_eq.add_trace(line_trace(eq_x, eq_y, mode="lines", name="Equity",
+                                line=dict(color="teal", width=2)))
+    fig_eq.update_layout(title="Equity Curve (all symbols)", xaxis_title="Time",
+                         yaxis_title="Equity", template="plotly_dark")
+    st.plotly_chart(fig_eq, use_container_width=True)
+
+    with st.expander("Breakdowns"):
+        tabs = st.tabs(["By Symbol", "By Side", "By Hour", "By Day"])
+        for tab, key in zip(tabs, ["by_symbol", "by_side", "by_hour", "by_day"]):
+            table = pd.DataFrame.from_dict(summary[key], orient="index").sort_index()
+            table["win_rate"] = table["wins"] / table["n"]
+            tab.dataframe(table)
+
 # ================== SIDEBAR SETTINGS ==================
 st.sidebar.header("Settings")
 symbols_to_view = st.sidebar.multiselect(
@@ -64,14 +216,26 @@ symbols_to_view = st.sidebar.multiselect(
 )
 
 # ================== DASHBOARD ==================
+# Live prices straight from the bot's shared memory, when it is running
+market = live_market(f"{selected_strategy}_market")
+
 for symbol in symbols_to_view:
     st.header(f"💹 {symbol} - {selected_strategy}")
 
+    if market is not None:
+        live_price, live_ts = market.price(symbol)
+        if live_price is not None:
+            st.metric("Live Mark Price", f"{live_price:,.2f}",
+                      help=f"updated {time.time() - live_ts:.0f}s ago")
+
     # ================== PRICE CHART ==================
     symbol_files = [f for f in data_files if f.startswith(symbol)]
     if symbol_files:
         file_path = os.path.join(SAVE_DIR, symbol_files[0])
-        df = pd.read_csv(file_path, index_col="time", parse_dates=["time"])
+        if file_path.endswith("_bars.bin"):
+            df, _ = bar_log(file_path).read()
+        else:
+            df, _ = csv_tail(file_path, index_col="time", parse_dates=("time",)).read()
 
         st.subheader("Latest Data (Last 10 Rows)")
         st.dataframe(df.tail(10))
@@ -79,7 +243,8 @@ for symbol in symbols_to_view:
         # ---------- INDICATOR SELECTION ----------
         excluded_cols = [
             "open", "high", "low", "close",
-            "HA_open", "HA_high", "HA_low", "HA_close"
+            "HA_open", "HA_high", "HA_low", "HA_close",
+            "long_entry", "short_entry", "long_exit", "short_exit"
         ]
 
         available_indicators = [
@@ -181,21 +346,19 @@ for symbol in symbols_to_view:
     if not trades_df.empty:
         symbol_clean = "".join(filter(str.isalpha, symbol)).upper()
 
-        trades_df_symbol = trades_df[
-            (trades_df["symbol_clean"] == symbol_clean) |
-            (trades_df["symbol_clean"].str.contains(symbol_clean, na=False))
-        ].copy()
+        # cached per symbol; only trades appended since the last rerun are added
+        trades_df_symbol = trade_book(trades_file).for_symbol(symbol_clean)
 
         if not trades_df_symbol.empty:
-            trades_df_symbol.sort_values(by="exit_time", inplace=True)
-            trades_df_symbol["cumulative_pnl"] = trades_df_symbol["net_pnl"].cumsum()
-
             st.dataframe(trades_df_symbol.tail(10))
 
+            # LTTB keeps the curve's shape with a bounded point count;
+            # long histories switch to WebGL.
+            pnl_x, pnl_y = downsample_line(trades_df_symbol["exit_time"],
+                                           trades_df_symbol["cumulative_pnl"])
             fig2 = go.Figure()
-            fig2.add_trace(go.Scatter(
-                x=trades_df_symbol["exit_time"],
-                y=trades_df_symbol["cumulative_pnl"],
+            fig2.add_trace(line_trace(
+                pnl_x, pnl_y,
                 mode="lines+markers",
                 name="Cumulative PNL",
                 line=dict(color="purple", width=2)
@@ -0,0 +1,122 @@
+"""
+grid_levels.py
+
+Price grid held as two sorted price arrays with a filled bitmap.
+
+    long levels   index -N .. -1   anchor - N*step .. anchor - step
+    short levels  index  1 ..  N   anchor + step   .. anchor + N*step
+
+A long level fills when price <= level, a short when price >= level.
+After every fill scan each unfilled level is out of the money at the scan
+price, so the only levels that can fill on the next scan are:
+    - the ones price crossed since that scan (found by bisection), and
+    - the ones released by a closed trade since then (`pending`).
+Scan cost is O(log n + levels crossed) instead of O(levels), and a level
+crossed and left again between polls of a blocked tick still fills on the
+next open scan exactly as the old full scan would have.
+"""
+
+from bisect import bisect_left, bisect_right
+
+
+class GridLevels:
+
+    def __init__(self, anchor, step, levels):
+        self.anchor = anchor
+        self.step = step
+        self.levels = levels
+
+        # Ascending prices; slot i of the long array is index i - levels.
+        self.long_prices = [anchor - step * n for n in range(levels, 0, -1)]
+        self.short_prices = [anchor + step * n for n in range(1, levels + 1)]
+        self.long_filled = bytearray(levels)
+        self.short_filled = bytearray(levels)
+
+        self.last_price = anchor   # price at the last fill scan
+        self.pending = set()       # released level indexes to re-check
+        self.version = 0           # bumped on every fill/release
+
+    # ================= INDEX <-> SLOT (O(1)) =================
+
+    def _slot(self, index):
+        if index < 0:
+            return self.long_prices, self.long_filled, self.levels + index
+        return self.short_prices, self.short_filled, index - 1
+
+    def side(self, index):
+        return "long" if index < 0 else "short"
+
+    def price(self, index):
+        prices, _, slot = self._slot(index)
+        return prices[slot]
+
+    def is_filled(self, index):
+        _, filled, slot = self._slot(index)
+        return bool(filled[slot])
+
+    def fill(self, index):
+        _, filled, slot = self._slot(index)
+        filled[slot] = 1
+        self.version += 1
+
+    def release(self, index):
+        """Mark a level free again after its trade closed."""
+        _, filled, slot = self._slot(index)
+        if filled[slot]:
+            filled[slot] = 0
+            self.pending.add(index)
+            self.version += 1
+
+    # ================= FILL DETECTION =================
+
+    def _in_the_money(self, index, price):
+        if index < 0:
+            return price <= self.price(index)
+        return price >= self.price(index)
+
+    def crossed(self, price):
+        """
+        Unfilled levels that fill at `price`, in the old grid order
+        (-1, -2, .., 1, 2, ..). Advances the scan price.
+        """
+        prev = self.last_price
+        hits = set()
+
+        if price < prev:
+            # long levels in [price, prev)
+            lo = bisect_left(self.long_prices, price)
+            hi = bisect_left(self.long_prices, prev)
+            for slot in range(lo, hi):
+                if not self.long_filled[slot]:
+                    hits.add(slot - self.levels)
+        elif price > prev:
+            # short levels in (prev, price]
+            lo = bisect_right(self.short_prices, prev)
+            hi = bisect_right(self.short_prices, price)
+            for slot in range(lo, hi):
+                if not self.short_filled[slot]:
+                    hits.add(slot + 1)
+
+        for index in self.pending:
+            if not self.is_filled(index) and self._in_the_money(index, price):
+                hits.add(index)
+        self.pending.clear()
+        self.last_price = price
+
+        return sorted(hits, key=lambda i: (i > 0, abs(i)))
+
+    # ================= SNAPSHOT =================
+
+    def rows(self):
+        """Rows for the grid CSV, in build order (-1..-N, 1..N)."""
+        order = ([-n for n in range(1, self.levels + 1)]
+                 + list(range(1, self.levels + 1)))
+        return [
+            {
+                "level_index": i,
+                "price": self.price(i),
+                "side": self.side(i),
+                "filled": self.is_filled(i),
+            }
+            for i in order
+        ]
@@ -0,0 +1,96 @@
+"""
+grid_positions.py
+
+Open grid positions stored as parallel numpy arrays (struct of arrays):
+entry, tp, sl, qty, side (+1 long / -1 short), level.
+
+Mark-to-market PnL and TP/SL hits for every open position come out of one
+vectorized pass per tick, so per-tick cost stays flat as the number of
+concurrent positions grows.
+
+Rows stay in entry order: remove(i) shifts the later rows down one (a
+numpy slice copy), so row i + 1 becomes row i. When closing several rows
+in one pass, walk them in ascending order and subtract the number already
+removed.
+"""
+
+import numpy as np
+
+
+class PositionBook:
+
+    def __init__(self, capacity=16):
+        self.n = 0
+        self._alloc(capacity)
+        self.entry_time = []        # datetimes, kept alongside the arrays
+
+    def _alloc(self, capacity):
+        def grow(old, dtype):
+            arr = np.zeros(capacity, dtype)
+            if old is not None:
+                arr[:self.n] = old[:self.n]
+            return arr
+
+        self.entry = grow(getattr(self, "entry", None), float)
+        self.tp = grow(getattr(self, "tp", None), float)
+        self.sl = grow(getattr(self, "sl", None), float)
+        self.qty = grow(getattr(self, "qty", None), np.int64)
+        self.side = grow(getattr(self, "side", None), np.int8)
+        self.level = grow(getattr(self, "level", None), np.int64)
+
+    def __len__(self):
+        return self.n
+
+    # ================= ADD / REMOVE =================
+
+    def add(self, side, entry, tp_price, sl_price, qty, level_index, entry_time):
+        if self.n == len(self.entry):
+            self._alloc(2 * len(self.entry))
+        i = self.n
+        self.entry[i] = entry
+        self.tp[i] = tp_price
+        self.sl[i] = sl_price
+        self.qty[i] = qty
+        self.side[i] = 1 if side == "long" else -1
+        self.level[i] = level_index
+        self.entry_time.append(entry_time)
+        self.n += 1
+        return i
+
+    def remove(self, i):
+        """Remove row i, keeping the rest in entry order."""
+        last = self.n - 1
+        if i != last:
+            for arr in (self.entry, self.tp, self.sl, self.qty,
+                        self.side, self.level):
+                arr[i:last] = arr[i + 1:self.n]
+        del self.entry_time[i]
+        self.n = last
+
+    def row(self, i):
+        """Row i as the position dict the logging / journaling code uses."""
+        return {
+            "side": "long" if self.side[i] > 0 else "short",
+            "entry": float(self.entry[i]),
+            "tp_price": float(self.tp[i]),
+            "sl_price": float(self.sl[i]),
+            "qty": int(self.qty[i]),
+            "entry_time": self.entry_time[i],
+            "level_index": int(self.level[i]),
+        }
+
+    # ================= VECTORIZED EVALUATION =================
+
+    def evaluate(self, price, contract_size):
+        """
+        One pass over all open rows at `price`.
+        Returns (live_pnl, hit_tp, hit_sl) arrays of length n.
+        """
+        n = self.n
+        side = self.side[:n]
+        long_ = side > 0
+
+        live_pnl = side * (price - self.entry[:n]) * contract_size * self.qty[:n]
+        hit_tp = np.where(long_, price >= self.tp[:n], price <= self.tp[:n])
+        hit_sl = np.where(long_, price <= self.sl[:n], price >= self.sl[:n])
+        return live_pnl, hit_tp, hit_sl
@@ -22,14 +22,19 @@ DESIGN (agreed):
 import os
 import time
 import traceback
+from collections import deque
 from datetime import datetime, timedelta
 from datetime import time as dt_time
 from zoneinfo import ZoneInfo
 
+import numpy as np
 import pandas as pd
-import pandas_ta as ta
 from dotenv import load_dotenv
 
+from grid_levels import GridLevels
+from grid_positions import PositionBook
+from indicators import StreamingADX
+from products import catalog
 from utils import TradingUtils
 
 load_dotenv()
@@ -40,7 +45,9 @@ BOT_NAME = "price_grid_strategy"
 SYMBOLS = ["BTCUSD"]
 
 DEFAULT_CONTRACTS = {"BTCUSD": 1000}
-CONTRACT_SIZE = {"BTCUSD": 0.001}
+# from /v2/products; the fixed sizes only apply offline with no cache
+CONTRACT_SIZE = catalog.contract_sizes(
+    SYMBOLS, fallback={"BTCUSD": 0.001})
 
 TAKER_FEE = 0.0005
 TIMEFRAME = "15m"
@@ -105,50 +112,36 @@ os.makedirs(SAVE_DIR, exist_ok=True)
 
 def save_grid(state, symbol):
     """Write the grid snapshot to CSV, but only when it actually changed."""
-    if state["grid"] is None:
+    grid = state["grid"]
+    if grid is None:
         return
 
-    snapshot = tuple(
-        (lvl["index"], lvl["price"], lvl["side"], lvl["filled"])
-        for lvl in state["grid"]
-    )
+    # The grid bumps its version on every fill/release: O(1) change check.
+    snapshot = (id(grid), grid.version)
     if state.get("_last_saved") == snapshot:
         return
     state["_last_saved"] = snapshot
 
-    rows = [
-        {
-            "level_index": lvl["index"],
-            "price": lvl["price"],
-            "side": lvl["side"],
-            "filled": lvl["filled"],
-        }
-        for lvl in state["grid"]
-    ]
     path = os.path.join(SAVE_DIR, f"{symbol}_grid.csv")
-    pd.DataFrame(rows).to_csv(path, index=False)
+    pd.DataFrame(grid.rows()).to_csv(path, index=False)
 
 
 # ================= ADX =================
+# Streaming ADX per symbol: seeded once from the full ADX_TIMEFRAME history,
+# then fed each bar as it closes. Instead of polling every minute we wait
+# for the bar-close time and then fetch only the last couple of bars, so a
+# regime change is seen on the first tick after the close.
 
-_candle_cache = {}
-_adx_cache = {}
-ADX_FETCH_EVERY_SEC = 60
-
+_adx_stream = {}
+ADX_BAR_SEC = 15 * 60      # length of one ADX_TIMEFRAME bar
+ADX_RETRY_SEC = 5          # closed bar not published yet -> try again soon
 
-def _fetch_adx_candles(symbol):
-    cached = _candle_cache.get(symbol)
-    nowm = time.monotonic()
-    if cached is not None and (nowm - cached["ts"]) < ADX_FETCH_EVERY_SEC:
-        return cached["df"]
 
+def _fetch_adx_candles(symbol, start=None):
     try:
-        df = utils.fetch_candles(symbol, timeframe=ADX_TIMEFRAME)
+        return utils.fetch_candles(symbol, timeframe=ADX_TIMEFRAME, start=start)
     except TypeError:
-        df = utils.fetch_candles(symbol)
-
-    _candle_cache[symbol] = {"ts": nowm, "df": df}
-    return df
+        return utils.fetch_candles(symbol)
 
 
 def _col(df, *names):
@@ -159,47 +152,58 @@ def _col(df, *names):
     return None
 
 
-def compute_adx(symbol):
-    """Return (adx_now, adx_avg) for the latest CLOSED 15m bar, or (None, None)."""
-    df = _fetch_adx_candles(symbol)
-    if df is None or len(df) < ADX_PERIOD * 2:
-        return None, None
-
-    try:
-        bar_key = df.index[-1]
-    except Exception:
-        bar_key = len(df)
-
-    cached = _adx_cache.get(symbol)
-    if cached is not None and cached["key"] == bar_key:
-        return cached["val"]
-
+def _feed_closed_bars(stream, df):
+    """Feed every CLOSED bar of df (all but the forming last row) not seen yet."""
     high = _col(df, "high", "h")
     low = _col(df, "low", "l")
     close = _col(df, "close", "c", "close_price", "last")
-    if high is None or low is None or close is None:
-        return None, None
+    if high is None or low is None or close is None or len(df) < 2:
+        return
 
-    adx_df = ta.adx(high=high, low=low, close=close, length=ADX_PERIOD)
-    if adx_df is None or adx_df.empty:
-        return None, None
+    starts = [int(pd.Timestamp(ts).timestamp()) for ts in df.index[:-1]]
+    rows = zip(starts, high.iloc[:-1], low.iloc[:-1], close.iloc[:-1])
+    for start, h, l, c in rows:
+        if stream["last_bar"] is not None and start <= stream["last_bar"]:
+            continue
+        value = stream["adx"].update(float(h), float(l), float(c))
+        if value == value:
+            stream["recent"].append(value)
+        stream["last_bar"] = start
 
-    col = f"ADX_{ADX_PERIOD}"
-    if col not in adx_df.columns:
-        return None, None
 
-    series = adx_df[col].dropna()
-    if len(series) < 2:
+def compute_adx(symbol):
+    """Return (adx_now, adx_avg) for the latest CLOSED 15m bar, or (None, None)."""
+    stream = _adx_stream.get(symbol)
+
+    if stream is None:
+        df = _fetch_adx_candles(symbol)
+        if df is None or len(df) < ADX_PERIOD * 2:
+            return None, None
+        stream = {
+            "adx": StreamingADX(ADX_PERIOD),
+            "recent": deque(maxlen=ADX_AVG_PERIOD),
+            "last_bar": None,
+            "next_try": 0.0,
+        }
+        _feed_closed_bars(stream, df)
+        _adx_stream[symbol] = stream
+
+    # The bar after last_bar is forming; it closes at last_bar + 2 bars.
+    now = time.time()
+    if (stream["last_bar"] is not None
+            and now >= stream["last_bar"] + 2 * ADX_BAR_SEC
+            and now >= stream["next_try"]):
+        df = _fetch_adx_candles(symbol, start=stream["last_bar"])
+        before = stream["last_bar"]
+        if df is not None and not df.empty:
+            _feed_closed_bars(stream, df)
+        if stream["last_bar"] == before:
+            stream["next_try"] = now + ADX_RETRY_SEC
+
+    recent = stream["recent"]
+    if not recent:
         return None, None
-    closed = series.iloc[:-1]
-
-    adx_now = float(closed.iloc[-1])
-    n = min(ADX_AVG_PERIOD, len(closed))
-    adx_avg = float(closed.iloc[-n:].mean())
-
-    val = (adx_now, adx_avg)
-    _adx_cache[symbol] = {"key": bar_key, "val": val}
-    return val
+    return recent[-1], sum(recent) / len(recent)
 
 
 def is_calm(adx_now):
@@ -222,19 +226,14 @@ def adx_allows_entry(adx_now, adx_avg):
 # ================= GRID BUILD =================
 
 def build_grid(anchor):
-    grid = []
-    for n in range(1, GRID_LEVELS + 1):
-        grid.append({"index": -n, "price": anchor - GRID_STEP * n,
-                     "side": "long", "filled": False})
-    for n in range(1, GRID_LEVELS + 1):
-        grid.append({"index": n, "price": anchor + GRID_STEP * n,
-                     "side": "short", "filled": False})
-    return grid
+    return GridLevels(anchor, GRID_STEP, GRID_LEVELS)
 
 
 # ================= POSITION HELPERS =================
 
-def _close_position(state, symbol, posn, exit_price, now, reason):
+def _close_position(state, symbol, row, exit_price, now, reason):
+    """Close row `row` of the position book (later rows shift down one)."""
+    posn = state["positions"].row(row)
     if posn["side"] == "long":
         gross = (exit_price - posn["entry"]) * CONTRACT_SIZE[symbol] * posn["qty"]
     else:
@@ -247,12 +246,9 @@ def _close_position(state, symbol, posn, exit_price, now, reason):
     state["balance"] += net
     state["daily_pnl"] += net
 
-    for lvl in state["grid"]:
-        if lvl["index"] == posn["level_index"]:
-            lvl["filled"] = False
+    state["grid"].release(posn["level_index"])
 
-    if posn in state["positions"]:
-        state["positions"].remove(posn)
+    state["positions"].remove(row)
 
     utils.save_trade({
         "symbol": symbol,
@@ -261,6 +257,7 @@ def _close_position(state, symbol, posn, exit_price, now, reason):
         "exit_price": exit_price,
         "qty": posn["qty"],
         "net_pnl": round(net, 6),
+        "fees": round(fees, 6),
         "entry_time": posn["entry_time"],
         "exit_time": now,
     })
@@ -278,8 +275,8 @@ def _close_position(state, symbol, posn, exit_price, now, reason):
 
 def build_fresh_grid(state, symbol, price, now, session_id, adx_now, reason):
     if state["grid"] is not None and state["positions"]:
-        for posn in list(state["positions"]):
-            _close_position(state, symbol, posn, price, now, reason)
+        while state["positions"]:       # oldest first, as they were opened
+            _close_position(state, symbol, 0, price, now, reason)
 
     state["anchor"] = price
     state["grid"] = build_grid(price)
@@ -357,8 +354,8 @@ def maybe_trend_exit(state, symbol, price, now, adx_now, adx_avg):
         f"and > avg {avg_txt}) — flattening all {len(state['positions'])} position(s)",
         tg=True,
     )
-    for posn in list(state["positions"]):
-        _close_position(state, symbol, posn, price, now, "TREND-EXIT")
+    while state["positions"]:           # oldest first, as they were opened
+        _close_position(state, symbol, 0, price, now, "TREND-EXIT")
 
     state["grid_active"] = False
     utils.log(
@@ -391,23 +388,30 @@ def process_symbol(symbol, price, state):
     anchor = state["anchor"]
 
     # ---------- EXIT OPEN POSITIONS (TP / SL / target-lock) ----------
-    for posn in list(state["positions"]):
-        if posn["side"] == "long":
-            live_pnl = (price - posn["entry"]) * CONTRACT_SIZE[symbol] * posn["qty"]
-            hit_tp = price >= posn["tp_price"]
-            hit_sl = price <= posn["sl_price"]
+    # One vectorized pass for PnL and TP/SL hits. TARGET-LOCK depends on the
+    # running daily PnL, so only rows that are hit or in profit get a Python
+    # look, in entry order (each close shifts the later rows down one).
+    book = state["positions"]
+    live_pnl, hit_tp, hit_sl = book.evaluate(price, CONTRACT_SIZE[symbol])
+    hit = hit_tp | hit_sl
+    if hit.any() or state["daily_pnl"] >= DAILY_TARGET:
+        candidates = np.flatnonzero(hit | (live_pnl > 0))
+    else:
+        candidates = ()
+
+    removed = 0
+    for row in candidates:
+        if hit_tp[row]:
+            reason = "TP"
+        elif hit_sl[row]:
+            reason = "SL"
+        elif state["daily_pnl"] >= DAILY_TARGET:
+            reason = "TARGET-LOCK"
         else:
-            live_pnl = (posn["entry"] - price) * CONTRACT_SIZE[symbol] * posn["qty"]
-            hit_tp = price <= posn["tp_price"]
-            hit_sl = price >= posn["sl_price"]
-
-        force_exit = (state["daily_pnl"] >= DAILY_TARGET and live_pnl > 0)
-
-        if not (hit_tp or hit_sl or force_exit):
             continue
 
-        reason = "TP" if hit_tp else "SL" if hit_sl else "TARGET-LOCK"
-        _close_position(state, symbol, posn, price, now, reason)
+        _close_position(state, symbol, row - removed, price, now, reason)
+        removed += 1
         utils.log(
             f"💰 Balance: {round(state['balance'], 2)} | "
             f"📊 Daily PNL: {round(state['daily_pnl'], 2)}",
@@ -436,40 +440,28 @@ def process_symbol(symbol, price, state):
         return
 
     # ---------- FILL LEVELS ----------
-    for lvl in state["grid"]:
-        if lvl["filled"]:
-            continue
-
-        if lvl["side"] == "long" and price <= lvl["price"]:
-            pass
-        elif lvl["side"] == "short" and price >= lvl["price"]:
-            pass
-        else:
-            continue
-
-        lvl["filled"] = True
+    # Only levels crossed since the last scan (or just released) can fill.
+    grid = state["grid"]
+    for index in grid.crossed(price):
+        side = grid.side(index)
+        grid.fill(index)
 
-        if lvl["side"] == "long":
+        if side == "long":
             tp_price = price + GRID_TP
             sl_price = price - GRID_SL
         else:
             tp_price = price - GRID_TP
             sl_price = price + GRID_SL
 
-        state["positions"].append({
-            "side": lvl["side"],
-            "entry": price,
-            "tp_price": tp_price,
-            "sl_price": sl_price,
-            "qty": DEFAULT_CONTRACTS[symbol],
-            "entry_time": now,
-            "level_index": lvl["index"],
-        })
-
-        emoji = "🟢" if lvl["side"] == "long" else "🔴"
+        state["positions"].add(
+            side, price, tp_price, sl_price,
+            DEFAULT_CONTRACTS[symbol], index, now,
+        )
+
+        emoji = "🟢" if side == "long" else "🔴"
         utils.log(
-            f"{emoji} {symbol} {lvl['side'].upper()} L{lvl['index']} @ {price} "
-            f"(lvl {lvl['price']}) | TP→ {tp_price} SL→ {sl_price} | "
+            f"{emoji} {symbol} {side.upper()} L{index} @ {price} "
+            f"(lvl {grid.price(index)}) | TP→ {tp_price} SL→ {sl_price} | "
             f"ADX15m {adx_now:.1f} (avg {adx_avg:.1f})",
             tg=True,
         )
@@ -480,7 +472,7 @@ def process_symbol(symbol, price, state):
 def run():
     state = {
         s: {
-            "positions": [],
+            "positions": PositionBook(),
             "grid": None,
             "grid_active": False,
             "anchor": None,
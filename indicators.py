@@ -0,0 +1,304 @@
+"""
+indicators.py
+
+Streaming indicators: seeded once from history, then updated one closed
+bar at a time in O(1). Values match pandas_ta (rma = Wilder smoothing as
+ewm(alpha=1/length, min_periods=length)) so they can replace the full-window
+recomputes without changing any thresholds.
+
+    adx = StreamingADX(14)
+    for h, l, c in closed_bars:
+        value = adx.update(h, l, c)      # nan until warmed up
+    adx.preview(h, l, c)                 # forming bar, state untouched
+
+HaSupertrendAdx chains Heikin-Ashi -> Supertrend(HA) and ADX(raw) for the
+BankNifty bot; IndicatorBook keeps one chain per symbol, fed from candle
+DataFrames, and can persist them so a restart resumes where it stopped.
+"""
+
+import copy
+import math
+import os
+import pickle
+import re
+import threading
+from collections import deque
+
+import pandas as pd
+
+NAN = float("nan")
+
+
+class Rma:
+    """
+    pandas_ta rma over a stream: ewm(alpha=1/length, adjust=True,
+    min_periods=length). A NaN input decays the weights like pandas does
+    (ignore_na=False) but is not counted as an observation.
+    """
+
+    def __init__(self, length):
+        self.length = length
+        self.decay = 1.0 - 1.0 / length
+        self.num = 0.0
+        self.den = 0.0
+        self.count = 0
+
+    @property
+    def value(self):
+        if self.count < self.length:
+            return NAN
+        return self.num / self.den
+
+    def update(self, x):
+        if x != x:                       # NaN
+            self.num *= self.decay
+            self.den *= self.decay
+        else:
+            self.num = self.num * self.decay + x
+            self.den = self.den * self.decay + 1.0
+            self.count += 1
+        return self.value
+
+
+class StreamingADX:
+    """Wilder ADX, equal to pandas_ta.adx(...)[f"ADX_{length}"]."""
+
+    def __init__(self, length=14):
+        self.length = length
+        self.prev = None                 # (high, low, close) of the last bar
+        self.atr = Rma(length)
+        self.pos = Rma(length)
+        self.neg = Rma(length)
+        self.adx = Rma(length)
+        self.value = NAN
+
+    def update(self, high, low, close):
+        if self.prev is None:
+            # First bar: no true range / directional move yet.
+            tr = pos = neg = NAN
+        else:
+            ph, pl, pc = self.prev
+            tr = max(high - low, abs(high - pc), abs(low - pc))
+            up = high - ph
+            dn = pl - low
+            pos = up if (up > dn and up > 0) else 0.0
+            neg = dn if (dn > up and dn > 0) else 0.0
+        self.prev = (high, low, close)
+
+        atr = self.atr.update(tr)
+        dmp = self.pos.update(pos)
+        dmn = self.neg.update(neg)
+
+        dx = NAN
+        if atr == atr and atr > 0 and dmp == dmp and dmn == dmn:
+            dmp = 100.0 * dmp / atr
+            dmn = 100.0 * dmn / atr
+            if dmp + dmn > 0:
+                dx = 100.0 * abs(dmp - dmn) / (dmp + dmn)
+
+        self.value = self.adx.update(dx)
+        return self.value
+
+    def preview(self, high, low, close):
+        """ADX if the bar (high, low, close) closed now; state is untouched."""
+        return copy.deepcopy(self).update(high, low, close)
+
+    @property
+    def ready(self):
+        return not math.isnan(self.value)
+
+
+class StreamingHeikinAshi:
+    """pandas_ta.ha: HA_open seeds at (open + close) / 2 of the first bar."""
+
+    def __init__(self):
+        self.prev = None                 # (ha_open, ha_close) of the last bar
+
+    def update(self, open_, high, low, close):
+        ha_close = 0.25 * (open_ + high + low + close)
+        if self.prev is None:
+            ha_open = 0.5 * (open_ + close)
+        else:
+            ha_open = 0.5 * (self.prev[0] + self.prev[1])
+        self.prev = (ha_open, ha_close)
+        return (ha_open, max(high, ha_open, ha_close),
+                min(low, ha_open, ha_close), ha_close)
+
+
+class StreamingSupertrend:
+    """
+    pandas_ta.supertrend(length, multiplier) trend line: rma ATR bands on
+    hl2 that only ratchet in the trend direction. The first bar is 0.0 and
+    the line is NaN until the ATR warms up, as in pandas_ta.
+    """
+
+    def __init__(self, length=10, multiplier=3.0):
+        self.multiplier = multiplier
+        self.atr = Rma(length)
+        self.prev_close = None
+        self.upper = NAN
+        self.lower = NAN
+        self.direction = 1
+        self.value = NAN
+
+    def update(self, high, low, close):
+        if self.prev_close is None:
+            tr = NAN
+        else:
+            pc = self.prev_close
+            tr = max(high - low, abs(high - pc), abs(low - pc))
+        atr = self.atr.update(tr)
+
+        hl2 = 0.5 * (high + low)
+        upper = hl2 + self.multiplier * atr
+        lower = hl2 - self.multiplier * atr
+
+        if self.prev_close is None:
+            self.value = 0.0
+        else:
+            if close > self.upper:
+                self.direction = 1
+            elif close < self.lower:
+                self.direction = -1
+            else:
+                if self.direction > 0 and lower < self.lower:
+                    lower = self.lower
+                if self.direction < 0 and upper > self.upper:
+                    upper = self.upper
+            self.value = lower if self.direction > 0 else upper
+
+        self.prev_close = close
+        self.upper = upper
+        self.lower = lower
+        return self.value
+
+
+class HaSupertrendAdx:
+    """
+    Heikin-Ashi candles, Supertrend on the HA candles and ADX on the raw
+    candles, equal to the ta.ha / ta.supertrend / ta.adx pipeline over the
+    same bars. Keeps the last `keep` closed rows for the strategy to read.
+    """
+
+    COLUMNS = ["Open", "High", "Low", "Close", "Volume",
+               "HA_Close", "HA_Open", "HA_High", "HA_Low", "ST", "ADX"]
+
+    def __init__(self, st_length=10, multiplier=3.0, adx_length=14,
+                 keep=10, min_bars=30):
+        self.ha = StreamingHeikinAshi()
+        self.st = StreamingSupertrend(st_length, multiplier)
+        self.adx = StreamingADX(adx_length)
+        self.min_bars = min_bars
+        self.bars = 0
+        self.last_time = None
+        self.times = deque(maxlen=keep)
+        self.rows = deque(maxlen=keep)
+
+    def update(self, time, open_, high, low, close, volume=0.0):
+        """Feed one closed bar. Returns its row (see COLUMNS)."""
+        ha_open, ha_high, ha_low, ha_close = self.ha.update(open_, high, low, close)
+        st = self.st.update(ha_high, ha_low, ha_close)
+        adx = self.adx.update(high, low, close)
+        row = (open_, high, low, close, volume,
+               ha_close, ha_open, ha_high, ha_low, st, adx)
+        self.bars += 1
+        self.last_time = time
+        self.times.append(time)
+        self.rows.append(row)
+        return row
+
+    def preview(self, time, open_, high, low, close, volume=0.0):
+        """Row for the forming bar; state is untouched."""
+        return copy.deepcopy(self).update(time, open_, high, low, close, volume)
+
+    @property
+    def ready(self):
+        return self.bars >= self.min_bars and self.adx.ready
+
+    def frame(self, forming=None):
+        """
+        Recent closed rows (plus the forming bar's preview row, given as
+        (time, o, h, l, c, v)) as a DataFrame, NaN rows dropped.
+        """
+        if not self.ready:
+            return pd.DataFrame()
+        times = list(self.times)
+        rows = list(self.rows)
+        if forming is not None:
+            rows.append(self.preview(*forming))
+            times.append(forming[0])
+        df = pd.DataFrame(rows, columns=self.COLUMNS,
+                          index=pd.Index(times, name="Date"))
+        return df.dropna()
+
+
+class IndicatorBook:
+    """
+    One indicator chain per symbol, fed from candle DataFrames (all rows
+    but the last are closed bars; the last is the forming bar). Chains are
+    pickled under `folder` when it is given.
+    """
+
+    def __init__(self, factory, folder=None):
+        self.factory = factory
+        self.folder = folder
+        self.chains = {}
+        self._locks = {}
+        self._guard = threading.Lock()
+
+    def _lock(self, symbol):
+        with self._guard:
+            return self._locks.setdefault(symbol, threading.Lock())
+
+    def _path(self, symbol):
+        return os.path.join(self.folder,
+                            re.sub(r"[^A-Za-z0-9_-]", "_", symbol) + ".state.pkl")
+
+    def _load(self, symbol):
+        if self.folder is None:
+            return None
+        try:
+            with open(self._path(symbol), "rb") as f:
+                return pickle.load(f)
+        except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+            return None
+
+    def _save(self, symbol, chain):
+        if self.folder is None:
+            return
+        path = self._path(symbol)
+        with open(path + ".tmp", "wb") as f:
+            pickle.dump(chain, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(path + ".tmp", path)
+
+    def sync(self, symbol, df):
+        """Feed closed bars newer than the chain's last one; return frame()."""
+        if df is None or df.empty:
+            return pd.DataFrame()
+        closed = df.iloc[:-1]
+
+        with self._lock(symbol):
+            chain = self.chains.get(symbol)
+            if chain is None:
+                chain = self._load(symbol)
+
+            # Reseed if the chain's last bar isn't in this history any more.
+            if chain is not None and chain.last_time is not None \
+                    and chain.last_time not in closed.index:
+                chain = None
+            if chain is None:
+                chain = self.factory()
+                new = closed
+            else:
+                new = closed[closed.index > chain.last_time]
+
+            for row in new.itertuples():
+                chain.update(row.Index, row.Open, row.High, row.Low,
+                             row.Close, row.Volume)
+            self.chains[symbol] = chain
+            if len(new):
+                self._save(symbol, chain)
+
+            last = df.iloc[-1]
+            return chain.frame((df.index[-1], last.Open, last.High, last.Low,
+                                last.Close, last.Volume))
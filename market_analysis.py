@@ -0,0 +1,437 @@
+"""
+market_analysis.py
+
+Market-structure engine behind market_dashboard.py, kept free of Streamlit
+so it can run in worker processes:
+
+  • fetch_candles      15m candles from Delta's public API (rate limited)
+  • HaTrendline        incremental Heikin-Ashi fractal trendline
+  • analyse_trend / support_resistance(_multi) / buy_sell_zones
+  • scan               every listed perpetual at once: downloads through a
+                       bounded asyncio pool, analyses in a process pool,
+                       ranked by trend strength and distance to a zone
+"""
+
+import time
+import asyncio
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import requests
+from numpy.lib.stride_tricks import sliding_window_view
+
+from rate_limiter import limiter, PRIORITY_CANDLE
+
+# ============================================================
+# CONFIG
+# ============================================================
+DELTA_BASE = "https://api.india.delta.exchange"   # public REST (no key needed)
+RESOLUTION = "15m"                                # 15-minute candles
+RATE_LIMIT_WAIT_SEC = 5                           # max wait for request budget
+SCAN_CONCURRENCY = 8                              # downloads in flight
+
+
+# ============================================================
+# DATA DOWNLOAD  (Delta public candles endpoint)
+# ============================================================
+def fetch_candles(symbol: str, start: int, end: int) -> pd.DataFrame:
+    """
+    Pull 15m candles in [start, end] (epoch seconds) from Delta Exchange.
+    Endpoint: GET /v2/history/candles
+    Returns a DataFrame indexed by datetime with Open/High/Low/Close/Volume.
+    """
+    url = f"{DELTA_BASE}/v2/history/candles"
+    params = {
+        "resolution": RESOLUTION,
+        "symbol": symbol,
+        "start": start,
+        "end": end,
+    }
+    # Don't hang the page through a 429 penalty; let the caller show it.
+    if not limiter.acquire(PRIORITY_CANDLE, timeout=RATE_LIMIT_WAIT_SEC):
+        raise RuntimeError("Delta rate limit active — retrying on next refresh.")
+    r = requests.get(url, params=params, timeout=20)
+    if r.status_code == 429:
+        limiter.backoff(r)
+    r.raise_for_status()
+    payload = r.json()
+
+    rows = payload.get("result", []) if isinstance(payload, dict) else payload
+    if not rows:
+        raise RuntimeError("Delta returned no candles for this symbol/range.")
+
+    df = pd.DataFrame(rows)
+    # Delta candle time is epoch seconds
+    df["time"] = pd.to_datetime(df["time"], unit="s")
+    df = df.rename(columns={"open": "Open", "high": "High",
+                            "low": "Low", "close": "Close",
+                            "volume": "Volume"})
+    for c in ("Open", "High", "Low", "Close", "Volume"):
+        if c in df:
+            df[c] = pd.to_numeric(df[c], errors="coerce")
+    df = (df.dropna(subset=["Open", "High", "Low", "Close"])
+            .drop_duplicates(subset="time")
+            .sort_values("time")
+            .set_index("time"))
+    return df
+
+
+# ============================================================
+# HEIKIN-ASHI FRACTAL TRENDLINE
+# ============================================================
+class HaTrendline:
+    """
+    Heikin-Ashi + non-repainting fractal trendline over a growing candle
+    frame. update() finds the first bar that differs from the last call
+    (normally the re-fetched forming bar) and recomputes only from there:
+    HA values depend on the previous bar, a fractal at bar p on bars
+    p-4..p, and the trendline on the previous trendline and fractals.
+    """
+
+    _ARRAYS = ("ha_open", "ha_high", "ha_low", "ha_close", "high_fractal",
+               "low_fractal", "last_high", "last_low", "line")
+
+    def __init__(self):
+        self.index = pd.DatetimeIndex([])
+        self.ohlc = np.empty((0, 4))
+        for name in self._ARRAYS:
+            setattr(self, name, np.empty(0))
+
+    def _first_change(self, index, ohlc) -> int:
+        m = min(len(index), len(self.index))
+        same = (index[:m] == self.index[:m]) & (ohlc[:m] == self.ohlc[:m]).all(axis=1)
+        bad = np.flatnonzero(~same)
+        return int(bad[0]) if len(bad) else m
+
+    def update(self, df: pd.DataFrame) -> "HaTrendline":
+        ohlc = df[["Open", "High", "Low", "Close"]].to_numpy(float)
+        n = len(ohlc)
+        m = self._first_change(df.index, ohlc)
+
+        for name in self._ARRAYS:
+            arr = np.full(n, np.nan)
+            keep = min(m, n)
+            arr[:keep] = getattr(self, name)[:keep]
+            setattr(self, name, arr)
+        self.index, self.ohlc = df.index, ohlc
+        if m >= n:
+            return self
+
+        o, h, l, c = ohlc.T
+        ha_open, ha_close = self.ha_open, self.ha_close
+
+        # ---- HEIKIN-ASHI ----
+        ha_close[m:] = (o[m:] + h[m:] + l[m:] + c[m:]) / 4.0
+        if m == 0:
+            ha_open[0] = (o[0] + c[0]) / 2.0
+        for i in range(max(m, 1), n):
+            ha_open[i] = (ha_open[i - 1] + ha_close[i - 1]) / 2.0
+        self.ha_high[m:] = np.maximum.reduce([h[m:], ha_open[m:], ha_close[m:]])
+        self.ha_low[m:] = np.minimum.reduce([l[m:], ha_open[m:], ha_close[m:]])
+
+        # ---- FRACTALS (non-repainting, confirmed 2 candles later) ----
+        # bar i is a fractal if it beats i-2..i+2; written at i + 2 >= m
+        lo_i = max(2, m - 2)
+        hi_i = n - 2
+        if hi_i > lo_i:
+            i = np.arange(lo_i, hi_i)
+            hh, ll = self.ha_high, self.ha_low
+            is_high = ((hh[i] > hh[i - 1]) & (hh[i] > hh[i - 2])
+                       & (hh[i] > hh[i + 1]) & (hh[i] > hh[i + 2]))
+            is_low = ((ll[i] < ll[i - 1]) & (ll[i] < ll[i - 2])
+                      & (ll[i] < ll[i + 1]) & (ll[i] < ll[i + 2]))
+            self.high_fractal[i[is_high] + 2] = hh[i[is_high]]
+            self.low_fractal[i[is_low] + 2] = ll[i[is_low]]
+
+        # ---- TRENDLINE ----
+        if m == 0:
+            self.last_high[0] = np.nan
+            self.last_low[0] = np.nan
+            self.line[0] = ha_close[0]
+        last_high, last_low = self.last_high[max(m, 1) - 1], self.last_low[max(m, 1) - 1]
+        trendline = self.line[max(m, 1) - 1]
+        for i in range(max(m, 1), n):
+            if not np.isnan(self.high_fractal[i]):
+                last_high = self.high_fractal[i]
+            if not np.isnan(self.low_fractal[i]):
+                last_low = self.low_fractal[i]
+
+            current_close = ha_close[i]
+            prev_close = ha_close[i - 1]
+
+            # BULLISH BREAK
+            if (last_high == last_high and prev_close <= last_high
+                    and current_close > last_high and current_close > trendline
+                    and last_low == last_low):
+                trendline = last_low
+            # BEARISH BREAK
+            elif (last_low == last_low and prev_close >= last_low
+                    and current_close < last_low and current_close < trendline
+                    and last_high == last_high):
+                trendline = last_high
+
+            self.last_high[i] = last_high
+            self.last_low[i] = last_low
+            self.line[i] = trendline
+        return self
+
+    def frame(self, band: float = 50.0, tail: int = None) -> pd.DataFrame:
+        """
+        HA_* columns plus high/low fractals and Trendline / up_Trendline /
+        down_Trendline (positional index), optionally only the last `tail`.
+        """
+        n = len(self.line)
+        s = slice(max(0, n - tail) if tail else 0, n)
+        trend = self.line.copy()
+        if n:
+            trend[0] = np.nan          # row 0 carries no trendline
+        ha = pd.DataFrame({
+            "HA_open": self.ha_open[s], "HA_high": self.ha_high[s],
+            "HA_low": self.ha_low[s], "HA_close": self.ha_close[s],
+            "high_fractal": self.high_fractal[s],
+            "low_fractal": self.low_fractal[s],
+            "Trendline": trend[s],
+        })
+        ha["up_Trendline"] = trend[s] + band
+        ha["down_Trendline"] = trend[s] - band
+        if n and s.start == 0:
+            # row 0 shows the final line's band, as it always has
+            final = self.line[-1]
+            ha.loc[0, "up_Trendline"] = final + band
+            ha.loc[0, "down_Trendline"] = final - band
+        return ha
+
+
+def calculate_trendline(df: pd.DataFrame, band: float = 50.0) -> pd.DataFrame:
+    """
+    Heikin-Ashi + non-repainting fractal trendline.
+    Returns a DataFrame (positional index) with HA_* columns plus
+    Trendline / up_Trendline / down_Trendline.
+    """
+    return HaTrendline().update(df).frame(band)
+
+
+# ============================================================
+# ANALYSIS ENGINE
+# ============================================================
+def analyse_trend(df, lookback_bars=16, flat_threshold_pct=0.3):
+    """Trend over last `lookback_bars` candles. 16 bars = 4h on 15m."""
+    window = df.tail(lookback_bars)
+    closes = window["Close"].to_numpy(float)
+    n = len(closes)
+    if n < 5:
+        return {"label": "sideways", "strength": 0.0, "slope_pct": 0.0,
+                "note": "Not enough data", "ema_fast": np.nan, "ema_slow": np.nan,
+                "bars": n}
+
+    x = np.arange(n)
+    slope, intercept = np.polyfit(x, closes, 1)
+    fit = slope * x + intercept
+    slope_pct = (fit[-1] - fit[0]) / fit[0] * 100.0
+
+    ss_res = np.sum((closes - fit) ** 2)
+    ss_tot = np.sum((closes - closes.mean()) ** 2)
+    r2 = max(0.0, min(1.0, 1 - ss_res / ss_tot if ss_tot > 0 else 0.0))
+
+    ema_fast = window["Close"].ewm(span=max(3, n // 6), adjust=False).mean().iloc[-1]
+    ema_slow = window["Close"].ewm(span=max(6, n // 3), adjust=False).mean().iloc[-1]
+
+    if abs(slope_pct) < flat_threshold_pct:
+        label, note = "sideways", f"Net move {slope_pct:+.2f}% inside flat band"
+    elif slope_pct > 0 and ema_fast >= ema_slow:
+        label, note = "up", "Rising regression + fast EMA above slow"
+    elif slope_pct < 0 and ema_fast <= ema_slow:
+        label, note = "down", "Falling regression + fast EMA below slow"
+    else:
+        label, note = "sideways", "Regression and EMA disagree (transition)"
+
+    strength = round(r2 * min(1.0, abs(slope_pct) / 2.0), 3)
+    return {"label": label, "strength": strength,
+            "slope_pct": round(slope_pct, 3), "note": note,
+            "ema_fast": round(float(ema_fast), 2),
+            "ema_slow": round(float(ema_slow), 2), "bars": n}
+
+
+def _swings(df, left=2, right=2):
+    """
+    Swing highs/lows in bar order. A swing high beats every bar on its left
+    and is not exceeded on its right (first max of the window); lows mirror
+    it. One array-wide comparison over all windows, so long lookbacks are
+    cheap.
+    """
+    H, L = df["High"].to_numpy(float), df["Low"].to_numpy(float)
+    width = left + right + 1
+    if len(H) < width:
+        return [], []
+
+    def side(arr, reduce, fill):
+        wins = sliding_window_view(arr, width)
+        mid = arr[left:len(arr) - right]
+        lhs = reduce(wins[:, :left], axis=1) if left else np.full(len(mid), fill)
+        rhs = reduce(wins[:, left + 1:], axis=1) if right else np.full(len(mid), fill)
+        return mid, lhs, rhs
+
+    mid, lhs, rhs = side(H, np.max, -np.inf)
+    highs = mid[(mid > lhs) & (mid >= rhs)]
+    mid, lhs, rhs = side(L, np.min, np.inf)
+    lows = mid[(mid < lhs) & (mid <= rhs)]
+    return list(highs), list(lows)
+
+
+def _cluster(levels, tol_pct):
+    """
+    Group sorted levels wherever the gap to the previous level is within
+    tol_pct of it; one {"price", "touches"} per group, most touched first.
+    """
+    if not len(levels):
+        return []
+    a = np.sort(np.asarray(levels, dtype=float))
+    gaps = np.abs(np.diff(a)) / a[:-1] * 100
+    bounds = np.concatenate(([0], np.flatnonzero(gaps > tol_pct) + 1, [len(a)]))
+    out = [{"price": round(float(np.mean(a[i:j])), 2), "touches": int(j - i)}
+           for i, j in zip(bounds[:-1], bounds[1:])]
+    out.sort(key=lambda d: (-d["touches"], d["price"]))
+    return out
+
+
+def _levels(highs, lows, price, tol_pct, max_levels):
+    res = [c for c in _cluster(highs, tol_pct) if c["price"] > price][:max_levels]
+    sup = [c for c in _cluster(lows, tol_pct) if c["price"] < price][:max_levels]
+    sup.sort(key=lambda c: -c["price"])
+    res.sort(key=lambda c: c["price"])
+    return {"price": round(price, 2), "supports": sup, "resistances": res}
+
+
+def _structure(df, lookback_bars):
+    w = df.tail(lookback_bars)
+    highs, lows = _swings(w)
+    highs.append(float(w["High"].max()))
+    lows.append(float(w["Low"].min()))
+    return float(w["Close"].iloc[-1]), highs, lows
+
+
+def support_resistance(df, lookback_bars=80, tol_pct=0.25, max_levels=4):
+    """80 bars = 20h on 15m."""
+    price, highs, lows = _structure(df, lookback_bars)
+    return _levels(highs, lows, price, tol_pct, max_levels)
+
+
+def support_resistance_multi(df, lookback_bars=80, tols=(0.1, 0.25, 0.5),
+                             max_levels=4):
+    """support_resistance for several tolerances off one swing pass:
+    {tol_pct: result}."""
+    price, highs, lows = _structure(df, lookback_bars)
+    return {tol: _levels(highs, lows, price, tol, max_levels) for tol in tols}
+
+
+def buy_sell_zones(trend, sr, zone_pct=0.15):
+    zones = []
+
+    def band(level):
+        d = level * zone_pct / 100
+        return round(level - d, 2), round(level + d, 2)
+
+    if sr["supports"]:
+        s = sr["supports"][0]["price"]
+        lo, hi = band(s)
+        if trend["label"] == "up":
+            conf, basis = "high", "Buy-the-dip into support, trend up"
+        elif trend["label"] == "sideways":
+            conf, basis = "medium", "Range buy near support"
+        else:
+            conf, basis = "low", "Counter-trend buy (risky in downtrend)"
+        zones.append({"side": "buy", "low": lo, "high": hi,
+                      "basis": basis, "conf": conf})
+
+    if sr["resistances"]:
+        r = sr["resistances"][0]["price"]
+        lo, hi = band(r)
+        if trend["label"] == "down":
+            conf, basis = "high", "Sell-the-rally into resistance, trend down"
+        elif trend["label"] == "sideways":
+            conf, basis = "medium", "Range sell near resistance"
+        else:
+            conf, basis = "low", "Counter-trend sell (risky in uptrend)"
+        zones.append({"side": "sell", "low": lo, "high": hi,
+                      "basis": basis, "conf": conf})
+    return zones
+
+
+# ============================================================
+# SCANNER
+# ============================================================
+def scan_one(job):
+    """Analyses for one symbol -> one ranked-table row (runs in a worker)."""
+    symbol, df, trend_bars, sr_bars = job
+    trend = analyse_trend(df, lookback_bars=trend_bars)
+    sr = support_resistance(df, lookback_bars=sr_bars)
+    zones = buy_sell_zones(trend, sr)
+    line = HaTrendline().update(df).line
+    price = float(df["Close"].iloc[-1])
+
+    # distance from price to the nearest zone band (0 when inside it)
+    zone_side, zone_dist = None, np.nan
+    for z in zones:
+        gap = max(z["low"] - price, price - z["high"], 0.0) / price * 100.0
+        if not gap >= zone_dist:            # also true while zone_dist is nan
+            zone_side, zone_dist = z["side"], gap
+
+    trendline = float(line[-1]) if len(line) else np.nan
+    return {
+        "symbol": symbol,
+        "price": round(price, 4),
+        "trend": trend["label"],
+        "strength": trend["strength"],
+        "move_pct": trend["slope_pct"],
+        "nearest_zone": zone_side,
+        "zone_dist_pct": round(zone_dist, 3) if zone_dist == zone_dist else np.nan,
+        "trendline": round(trendline, 4),
+        "vs_trendline_pct": round((price - trendline) / trendline * 100.0, 3)
+                            if trendline == trendline and trendline else np.nan,
+        "vs_trendline": ("above" if price > trendline else "below")
+                        if trendline == trendline else None,
+    }
+
+
+async def _download_all(symbols, start, end, concurrency):
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(symbol):
+        async with sem:
+            try:
+                return symbol, await asyncio.to_thread(fetch_candles, symbol, start, end)
+            except Exception as e:
+                return symbol, e
+
+    return await asyncio.gather(*(one(s) for s in symbols))
+
+
+def scan(symbols, days=3, trend_bars=16, sr_bars=80,
+         concurrency=SCAN_CONCURRENCY, pool=None):
+    """
+    Download and analyse every symbol. Returns (table, errors): the table is
+    ranked by trend strength, then distance to the nearest zone; errors maps
+    symbol -> message for downloads that failed.
+    """
+    end = int(time.time())
+    downloads = asyncio.run(_download_all(symbols, end - days * 86400, end, concurrency))
+
+    errors = {s: str(df) for s, df in downloads if not isinstance(df, pd.DataFrame)}
+    jobs = [(s, df, trend_bars, sr_bars) for s, df in downloads
+            if isinstance(df, pd.DataFrame) and len(df)]
+
+    own_pool = pool is None
+    pool = pool or ProcessPoolExecutor()
+    try:
+        rows = list(pool.map(scan_one, jobs, chunksize=max(1, len(jobs) // 32)))
+    finally:
+        if own_pool:
+            pool.shutdown()
+
+    table = pd.DataFrame(rows)
+    if not table.empty:
+        table = (table.sort_values(["strength", "zone_dist_pct"],
+                                   ascending=[False, True], na_position="last")
+                      .reset_index(drop=True))
+    return table, errors
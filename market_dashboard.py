@@ -10,25 +10,41 @@ Exchange's public API, analyses them, and shows a light dashboard with:
   • Buy / Sell zones
   • Heikin-Ashi fractal trendline (with up/down bands)
 
-It is LIVE: pick a refresh interval in the sidebar and it re-downloads,
-re-analyses and redraws itself automatically. Start it once, leave it open.
+It is LIVE: pick a refresh interval in the sidebar and it fetches the new
+candles, re-analyses and redraws itself automatically. Candles are kept per
+symbol across reruns, so a refresh only asks for bars since the last one.
+Start it once, leave it open.
 
-No utils.py, no API key, no CSV. Just run ONCE:
+Scanner mode runs the same analyses over every listed Delta perpetual at
+once and ranks them in a table.
+
+No utils.py, no API key, no CSV. The engine lives in market_analysis.py
+(Streamlit-free, so the scanner can run it in worker processes); it uses
+rate_limiter.py to share the bots' Delta request budget and products.py
+for the perpetual list. Just run ONCE:
 
     pip install streamlit plotly pandas numpy requests streamlit-autorefresh
     streamlit run market_dashboard.py
 """
 
 import time
+import threading
 import datetime as dt
+from concurrent.futures import ProcessPoolExecutor
 
 import numpy as np
 import pandas as pd
-import requests
 import streamlit as st
 import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 
+from market_analysis import (
+    RESOLUTION, fetch_candles, HaTrendline,
+    analyse_trend, support_resistance, buy_sell_zones, scan,
+)
+from products import catalog
+from chart_render import aggregate_ohlc, aggregate_last, line_trace
+
 # Auto-refresh component (optional). If not installed we fall back to a
 # meta-refresh tag so the page still reloads on its own.
 try:
@@ -40,271 +56,176 @@ except Exception:
 # ============================================================
 # CONFIG
 # ============================================================
-DELTA_BASE = "https://api.india.delta.exchange"   # public REST (no key needed)
-RESOLUTION = "15m"                                # 15-minute candles
 DEFAULT_SYMBOL = "BTCUSD"
 BAR_MINUTES = 15                                  # matches RESOLUTION
+MIN_REFRESH_SEC = 30                              # reruns inside this reuse the buffer
+WORKER_POLL_SEC = 5                               # background worker tick
+JOB_IDLE_SEC = 15 * 60                            # drop views nobody asked for since
+SCAN_DAYS = 3                                     # history per symbol in scanner mode
+SCAN_TTL_SEC = 120                                # reuse a scan for this long
 
 
 # ============================================================
-# DATA DOWNLOAD  (Delta public candles endpoint)
+# CANDLE BUFFER
 # ============================================================
-@st.cache_data(ttl=30, show_spinner=False)
-def download_candles(symbol: str, days: int, _bust: int = 0) -> pd.DataFrame:
-    # `_bust` lets each auto-refresh force a fresh download (cache key changes).
+class CandleBuffer:
     """
-    Pull historical 15m candles from Delta Exchange public API.
-    Endpoint: GET /v2/history/candles
-    Returns a DataFrame indexed by datetime with Open/High/Low/Close/Volume.
+    Candles for one symbol, kept across reruns. The first refresh downloads
+    `days`; later ones only ask for bars from the last one we hold (it may
+    have been forming) and splice them on, so a refresh is one small request.
+    The HA trendline state rides along and is extended the same way.
     """
-    end = int(time.time())
-    start = end - days * 24 * 60 * 60
-
-    url = f"{DELTA_BASE}/v2/history/candles"
-    params = {
-        "resolution": RESOLUTION,
-        "symbol": symbol,
-        "start": start,
-        "end": end,
-    }
-    r = requests.get(url, params=params, timeout=20)
-    r.raise_for_status()
-    payload = r.json()
-
-    rows = payload.get("result", []) if isinstance(payload, dict) else payload
-    if not rows:
-        raise RuntimeError("Delta returned no candles for this symbol/range.")
-
-    df = pd.DataFrame(rows)
-    # Delta candle time is epoch seconds
-    df["time"] = pd.to_datetime(df["time"], unit="s")
-    df = df.rename(columns={"open": "Open", "high": "High",
-                            "low": "Low", "close": "Close",
-                            "volume": "Volume"})
-    for c in ("Open", "High", "Low", "Close", "Volume"):
-        if c in df:
-            df[c] = pd.to_numeric(df[c], errors="coerce")
-    df = (df.dropna(subset=["Open", "High", "Low", "Close"])
-            .drop_duplicates(subset="time")
-            .sort_values("time")
-            .set_index("time"))
-    return df
+
+    def __init__(self, symbol: str):
+        self.symbol = symbol
+        self.days = 0
+        self.df = None
+        self.fetched_at = 0.0
+        self.trendline = HaTrendline()
+        self.lock = threading.Lock()
+
+    def _refresh(self, days: int, force: bool) -> pd.DataFrame:
+        now = time.time()
+        if self.df is not None and days <= self.days and not force \
+                and now - self.fetched_at < MIN_REFRESH_SEC:
+            return self._window(days)
+
+        end = int(now)
+        if self.df is None or days > self.days:
+            self.df = fetch_candles(self.symbol, end - days * 86400, end)
+            self.days = days
+        else:
+            start = int(self.df.index[-1].timestamp())
+            new = fetch_candles(self.symbol, start, end)
+            self.df = pd.concat([self.df[self.df.index < new.index[0]], new])
+            # Drop the front only once a whole extra day has piled up;
+            # the trendline state is rebuilt then.
+            if self.df.index[-1] - self.df.index[0] > pd.Timedelta(days=self.days + 1):
+                self.df = self.df[self.df.index >= self.df.index[-1]
+                                  - pd.Timedelta(days=self.days)]
+        self.fetched_at = now
+        self.trendline.update(self.df)
+        return self._window(days)
+
+    def _window(self, days: int) -> pd.DataFrame:
+        return self.df[self.df.index >= self.df.index[-1] - pd.Timedelta(days=days)]
+
+    def snapshot(self, days: int, band: float, force: bool = False, unless=None):
+        """
+        (candles, HA trendline frame, fetched_at) taken under one lock hold,
+        so the trendline lines up bar-for-bar with the candles. The frame is
+        None when fetched_at still equals `unless` (nothing new to compute).
+        """
+        with self.lock:
+            df = self._refresh(days, force)
+            if self.fetched_at == unless:
+                return df, None, self.fetched_at
+            return df, self.trendline.frame(band, tail=len(df)), self.fetched_at
 
 
 # ============================================================
-# HEIKIN-ASHI FRACTAL TRENDLINE
+# BACKGROUND WORKER  (shared by every session)
 # ============================================================
-def _heikin_ashi(df: pd.DataFrame) -> pd.DataFrame:
-    """Compute Heikin-Ashi OHLC from a normal OHLC DataFrame (no extra deps)."""
-    o = df["Open"].to_numpy(float)
-    h = df["High"].to_numpy(float)
-    l = df["Low"].to_numpy(float)
-    c = df["Close"].to_numpy(float)
-    n = len(df)
-
-    ha_close = (o + h + l + c) / 4.0
-    ha_open = np.empty(n)
-    if n:
-        ha_open[0] = (o[0] + c[0]) / 2.0
-    for i in range(1, n):
-        ha_open[i] = (ha_open[i - 1] + ha_close[i - 1]) / 2.0
-    ha_high = np.maximum.reduce([h, ha_open, ha_close])
-    ha_low = np.minimum.reduce([l, ha_open, ha_close])
-
-    return pd.DataFrame({
-        "HA_open": ha_open, "HA_high": ha_high,
-        "HA_low": ha_low, "HA_close": ha_close,
-    }, index=df.index).reset_index(drop=True)
-
-
-def calculate_trendline(df: pd.DataFrame, band: float = 50.0) -> pd.DataFrame:
+class AnalyticsWorker:
     """
-    Heikin-Ashi + non-repainting fractal trendline.
-    Returns a DataFrame (positional index) with HA_* columns plus
-    Trendline / up_Trendline / down_Trendline.
+    Keeps candles and ready analyses (trend, S/R, zones, HA trendline) fresh
+    in a background thread, one job per (symbol, days, trend bars, S/R bars,
+    band). Pages only read results, so widget changes and extra viewers of
+    the same view cost nothing; a new parameter set is computed once, on
+    the spot, from the candles already held.
     """
-    ha = _heikin_ashi(df)
-
-    # ---- FRACTALS (non-repainting, confirmed 2 candles later) ----
-    ha["high_fractal"] = np.nan
-    ha["low_fractal"] = np.nan
-
-    for i in range(2, len(ha) - 2):
-        is_high = (
-            ha.loc[i, "HA_high"] > ha.loc[i - 1, "HA_high"]
-            and ha.loc[i, "HA_high"] > ha.loc[i - 2, "HA_high"]
-            and ha.loc[i, "HA_high"] > ha.loc[i + 1, "HA_high"]
-            and ha.loc[i, "HA_high"] > ha.loc[i + 2, "HA_high"]
-        )
-        is_low = (
-            ha.loc[i, "HA_low"] < ha.loc[i - 1, "HA_low"]
-            and ha.loc[i, "HA_low"] < ha.loc[i - 2, "HA_low"]
-            and ha.loc[i, "HA_low"] < ha.loc[i + 1, "HA_low"]
-            and ha.loc[i, "HA_low"] < ha.loc[i + 2, "HA_low"]
-        )
-        if is_high:
-            ha.loc[i + 2, "high_fractal"] = ha.loc[i, "HA_high"]
-        if is_low:
-            ha.loc[i + 2, "low_fractal"] = ha.loc[i, "HA_low"]
-
-    # ---- TRENDLINE ----
-    ha["Trendline"] = np.nan
-    last_high_fractal = np.nan
-    last_low_fractal = np.nan
-    trendline = ha.loc[0, "HA_close"] if len(ha) else np.nan
-
-    for i in range(1, len(ha)):
-        if not np.isnan(ha.loc[i, "high_fractal"]):
-            last_high_fractal = ha.loc[i, "high_fractal"]
-        if not np.isnan(ha.loc[i, "low_fractal"]):
-            last_low_fractal = ha.loc[i, "low_fractal"]
-
-        current_close = ha.loc[i, "HA_close"]
-        prev_close = ha.loc[i - 1, "HA_close"]
-
-        # BULLISH BREAK
-        if (
-            not np.isnan(last_high_fractal)
-            and prev_close <= last_high_fractal
-            and current_close > last_high_fractal
-            and current_close > trendline
-            and not np.isnan(last_low_fractal)
-        ):
-            trendline = last_low_fractal
-        # BEARISH BREAK
-        elif (
-            not np.isnan(last_low_fractal)
-            and prev_close >= last_low_fractal
-            and current_close < last_low_fractal
-            and current_close < trendline
-            and not np.isnan(last_high_fractal)
-        ):
-            trendline = last_high_fractal
-
-        ha.loc[i, "Trendline"] = trendline
-        ha.loc[i, "up_Trendline"] = trendline + band
-        ha.loc[i, "down_Trendline"] = trendline - band
-
-    if len(ha):
-        ha.loc[0, "up_Trendline"] = trendline + band if not np.isnan(trendline) else np.nan
-        ha.loc[0, "down_Trendline"] = trendline - band if not np.isnan(trendline) else np.nan
-    return ha
-
-
-# ============================================================
-# ANALYSIS ENGINE (inline so this stays one file)
-# ============================================================
-def analyse_trend(df, lookback_bars=16, flat_threshold_pct=0.3):
-    """Trend over last `lookback_bars` candles. 16 bars = 4h on 15m."""
-    window = df.tail(lookback_bars)
-    closes = window["Close"].to_numpy(float)
-    n = len(closes)
-    if n < 5:
-        return {"label": "sideways", "strength": 0.0, "slope_pct": 0.0,
-                "note": "Not enough data", "ema_fast": np.nan, "ema_slow": np.nan,
-                "bars": n}
-
-    x = np.arange(n)
-    slope, intercept = np.polyfit(x, closes, 1)
-    fit = slope * x + intercept
-    slope_pct = (fit[-1] - fit[0]) / fit[0] * 100.0
-
-    ss_res = np.sum((closes - fit) ** 2)
-    ss_tot = np.sum((closes - closes.mean()) ** 2)
-    r2 = max(0.0, min(1.0, 1 - ss_res / ss_tot if ss_tot > 0 else 0.0))
-
-    ema_fast = window["Close"].ewm(span=max(3, n // 6), adjust=False).mean().iloc[-1]
-    ema_slow = window["Close"].ewm(span=max(6, n // 3), adjust=False).mean().iloc[-1]
-
-    if abs(slope_pct) < flat_threshold_pct:
-        label, note = "sideways", f"Net move {slope_pct:+.2f}% inside flat band"
-    elif slope_pct > 0 and ema_fast >= ema_slow:
-        label, note = "up", "Rising regression + fast EMA above slow"
-    elif slope_pct < 0 and ema_fast <= ema_slow:
-        label, note = "down", "Falling regression + fast EMA below slow"
-    else:
-        label, note = "sideways", "Regression and EMA disagree (transition)"
-
-    strength = round(r2 * min(1.0, abs(slope_pct) / 2.0), 3)
-    return {"label": label, "strength": strength,
-            "slope_pct": round(slope_pct, 3), "note": note,
-            "ema_fast": round(float(ema_fast), 2),
-            "ema_slow": round(float(ema_slow), 2), "bars": n}
-
-
-def _swings(df, left=2, right=2):
-    H, L, idx = df["High"].to_numpy(float), df["Low"].to_numpy(float), df.index
-    highs, lows = [], []
-    for i in range(left, len(df) - right):
-        wh, wl = H[i - left:i + right + 1], L[i - left:i + right + 1]
-        if H[i] == wh.max() and wh.argmax() == left:
-            highs.append(H[i])
-        if L[i] == wl.min() and wl.argmin() == left:
-            lows.append(L[i])
-    return highs, lows
-
-
-def _cluster(levels, tol_pct):
-    if not levels:
-        return []
-    levels = sorted(levels)
-    groups, g = [], [levels[0]]
-    for p in levels[1:]:
-        if abs(p - g[-1]) / g[-1] * 100 <= tol_pct:
-            g.append(p)
-        else:
-            groups.append(g); g = [p]
-    groups.append(g)
-    out = [{"price": round(float(np.mean(x)), 2), "touches": len(x)} for x in groups]
-    out.sort(key=lambda d: (-d["touches"], d["price"]))
-    return out
-
-
-def support_resistance(df, lookback_bars=80, tol_pct=0.25, max_levels=4):
-    """80 bars = 20h on 15m."""
-    w = df.tail(lookback_bars)
-    price = float(w["Close"].iloc[-1])
-    highs, lows = _swings(w)
-    highs.append(float(w["High"].max()))
-    lows.append(float(w["Low"].min()))
-    res = [c for c in _cluster(highs, tol_pct) if c["price"] > price][:max_levels]
-    sup = [c for c in _cluster(lows, tol_pct) if c["price"] < price][:max_levels]
-    sup.sort(key=lambda c: -c["price"])
-    res.sort(key=lambda c: c["price"])
-    return {"price": round(price, 2), "supports": sup, "resistances": res}
-
-
-def buy_sell_zones(trend, sr, zone_pct=0.15):
-    zones = []
-
-    def band(level):
-        d = level * zone_pct / 100
-        return round(level - d, 2), round(level + d, 2)
 
-    if sr["supports"]:
-        s = sr["supports"][0]["price"]
-        lo, hi = band(s)
-        if trend["label"] == "up":
-            conf, basis = "high", "Buy-the-dip into support, trend up"
-        elif trend["label"] == "sideways":
-            conf, basis = "medium", "Range buy near support"
-        else:
-            conf, basis = "low", "Counter-trend buy (risky in downtrend)"
-        zones.append({"side": "buy", "low": lo, "high": hi,
-                      "basis": basis, "conf": conf})
-
-    if sr["resistances"]:
-        r = sr["resistances"][0]["price"]
-        lo, hi = band(r)
-        if trend["label"] == "down":
-            conf, basis = "high", "Sell-the-rally into resistance, trend down"
-        elif trend["label"] == "sideways":
-            conf, basis = "medium", "Range sell near resistance"
-        else:
-            conf, basis = "low", "Counter-trend sell (risky in uptrend)"
-        zones.append({"side": "sell", "low": lo, "high": hi,
-                      "basis": basis, "conf": conf})
-    return zones
+    def __init__(self):
+        self.buffers = {}       # symbol -> CandleBuffer
+        self.jobs = {}          # key -> {"result", "fetched_at", "seen", "error"}
+        self.lock = threading.Lock()
+        threading.Thread(target=self._run, daemon=True).start()
+
+    def _buffer(self, symbol):
+        with self.lock:
+            if symbol not in self.buffers:
+                self.buffers[symbol] = CandleBuffer(symbol)
+            return self.buffers[symbol]
+
+    def _compute(self, key, force=False):
+        symbol, days, trend_bars, sr_bars, band = key
+        job = self.jobs[key]
+        cached = job["fetched_at"] if job["result"] is not None else None
+        df, ha, fetched_at = self._buffer(symbol).snapshot(days, band, force=force,
+                                                            unless=cached)
+        if ha is None:
+            return job["result"]            # no new candles since last time
+
+        trend = analyse_trend(df, lookback_bars=trend_bars)
+        sr = support_resistance(df, lookback_bars=sr_bars)
+        job["result"] = {
+            "df": df,
+            "trend": trend,
+            "sr": sr,
+            "zones": buy_sell_zones(trend, sr),
+            "ha": ha,
+            "updated": time.time(),
+        }
+        job["fetched_at"] = fetched_at
+        job["error"] = None
+        return job["result"]
+
+    def get(self, symbol, days, trend_bars, sr_bars, band, force=False):
+        """
+        Latest result for this view. Computed inline only the first time
+        (or when forced); raises if there is nothing to show at all.
+        """
+        key = (symbol, days, trend_bars, sr_bars, float(band))
+        with self.lock:
+            job = self.jobs.setdefault(key, {"result": None, "fetched_at": None,
+                                             "seen": 0.0, "error": None})
+            job["seen"] = time.time()
+        if job["result"] is None or force:
+            try:
+                self._compute(key, force=force)
+            except Exception as e:
+                job["error"] = str(e)
+                if job["result"] is None:
+                    raise
+        return job["result"], job["error"]
+
+    def _run(self):
+        while True:
+            time.sleep(WORKER_POLL_SEC)
+            now = time.time()
+            with self.lock:
+                for key in [k for k, j in self.jobs.items()
+                            if now - j["seen"] > JOB_IDLE_SEC]:
+                    del self.jobs[key]
+                keys = list(self.jobs)
+                live = {k[0] for k in keys}
+                for symbol in [s for s in self.buffers if s not in live]:
+                    del self.buffers[symbol]
+            for key in keys:
+                try:
+                    self._compute(key)
+                except Exception as e:
+                    if key in self.jobs:
+                        self.jobs[key]["error"] = str(e)
+
+
+@st.cache_resource(show_spinner=False)
+def analytics_worker() -> AnalyticsWorker:
+    return AnalyticsWorker()
+
+
+@st.cache_resource(show_spinner=False)
+def scan_pool() -> ProcessPoolExecutor:
+    """Analysis processes for the scanner, started once per server."""
+    return ProcessPoolExecutor()
+
+
+@st.cache_data(ttl=SCAN_TTL_SEC, show_spinner=False)
+def run_scan(trend_bars: int, sr_bars: int):
+    symbols = catalog.symbols(contract_type="perpetual_futures")
+    table, errors = scan(symbols, days=SCAN_DAYS, trend_bars=trend_bars,
+                         sr_bars=sr_bars, pool=scan_pool())
+    return table, errors, len(symbols)
 
 
 # ============================================================
@@ -338,10 +259,12 @@ st.markdown("""
 # SIDEBAR CONTROLS
 # ============================================================
 st.sidebar.title("⚙️ Controls")
+mode = st.sidebar.radio("Mode", ["Single symbol", "Scanner"], horizontal=True)
 symbol = st.sidebar.text_input("Symbol", DEFAULT_SYMBOL).strip().upper()
 days = st.sidebar.slider("Days of data to download", 2, 30, 10)
+chart_days = st.sidebar.slider("Days on chart", 1, 30, 3)
 trend_hours = st.sidebar.slider("Hours to judge trend", 1, 12, 4)
-sr_hours = st.sidebar.slider("Hours of structure (S/R)", 4, 72, 20)
+sr_hours = st.sidebar.slider("Hours of structure (S/R)", 4, 336, 20)
 
 # ----- Heikin-Ashi trendline controls -----
 st.sidebar.markdown("### 📈 HA Trendline")
@@ -359,10 +282,9 @@ _interval_ms = {"Off": 0, "1 min": 60_000, "2 min": 120_000,
                 "5 min": 300_000, "10 min": 600_000,
                 "15 min": 900_000}[interval_label]
 
-refresh_count = 0
 if _interval_ms > 0:
     if _HAS_AUTOREFRESH:
-        refresh_count = st_autorefresh(interval=_interval_ms, key="live_refresh")
+        st_autorefresh(interval=_interval_ms, key="live_refresh")
     else:
         # Fallback: meta refresh tag (whole-page reload) if component missing
         st.markdown(
@@ -373,35 +295,61 @@ if _interval_ms > 0:
 else:
     st.sidebar.info("Auto-refresh off")
 
-if st.sidebar.button("🔄 Refresh now"):
-    st.cache_data.clear()
-    st.rerun()
+force_refresh = st.sidebar.button("🔄 Refresh now")
 
 st.sidebar.caption(f"Auto-downloads {RESOLUTION} candles from Delta public API.")
 
 trend_bars = max(5, int(trend_hours * 60 / BAR_MINUTES))
 sr_bars = max(20, int(sr_hours * 60 / BAR_MINUTES))
 
+# ============================================================
+# SCANNER MODE
+# ============================================================
+if mode == "Scanner":
+    st.title("🔎 Market Structure Scanner")
+    if force_refresh:
+        run_scan.clear()
+    t0 = time.time()
+    try:
+        with st.spinner("Scanning every Delta perpetual…"):
+            table, scan_errors, universe = run_scan(trend_bars, sr_bars)
+    except Exception as e:
+        st.error(f"Scan failed: {e}")
+        st.stop()
+
+    st.caption(f"{len(table)} of {universe} perpetuals analysed · "
+               f"{RESOLUTION}, {SCAN_DAYS} days · trend {trend_hours}h, "
+               f"S/R {sr_hours}h · ranked by trend strength, then distance "
+               f"to the nearest zone · {time.time() - t0:.1f}s")
+    st.dataframe(table, use_container_width=True, hide_index=True)
+    if scan_errors:
+        with st.expander(f"{len(scan_errors)} symbols failed to download"):
+            st.write(scan_errors)
+    st.stop()
+
 # ============================================================
 # DOWNLOAD + ANALYSE
 # ============================================================
 st.title("📊 Market Structure Dashboard")
 
+worker = analytics_worker()
 try:
     with st.spinner(f"Downloading {symbol} {RESOLUTION} candles…"):
-        df = download_candles(symbol, days, _bust=refresh_count)
+        result, refresh_error = worker.get(symbol, days, trend_bars, sr_bars,
+                                           trend_band, force=force_refresh)
 except Exception as e:
     st.error(f"Could not download data for {symbol}: {e}")
     st.caption("Check the symbol (e.g. BTCUSD, ETHUSD) and your internet. "
                "Delta India endpoint must be reachable from this machine.")
     st.stop()
 
-trend = analyse_trend(df, lookback_bars=trend_bars)
-sr = support_resistance(df, lookback_bars=sr_bars)
-zones = buy_sell_zones(trend, sr)
+if refresh_error:
+    st.warning(f"Showing the last good data — refresh failed: {refresh_error}")
 
-# Heikin-Ashi fractal trendline (computed on full df, positional index)
-ha = calculate_trendline(df, band=float(trend_band))
+# Ready-made by the worker; the HA trendline has a positional index
+# aligned with df.
+df = result["df"]
+trend, sr, zones, ha = result["trend"], result["sr"], result["zones"], result["ha"]
 
 price = float(df["Close"].iloc[-1])
 last_time = df.index[-1]
@@ -442,11 +390,17 @@ else:
 st.write("")
 
 # ----- chart -----
-chart_bars = min(300, len(df))
-plot_df = df.tail(chart_bars)
+# Long windows are merged into k-bar candles so the browser gets at most
+# MAX_CANDLES of them; the HA lines take each bucket's last value.
+chart_bars = min(chart_days * 24 * 60 // BAR_MINUTES, len(df))
+raw_df = df.tail(chart_bars)
+plot_df, bucket = aggregate_ohlc(raw_df)
 # Align HA trendline (positional) to the same tail window
-ha_plot = ha.tail(chart_bars).copy()
-ha_plot.index = plot_df.index   # map positional HA rows back to datetimes
+ha_tail = ha.tail(chart_bars).copy()
+ha_tail.index = raw_df.index    # map positional HA rows back to datetimes
+ha_plot = pd.DataFrame({col: aggregate_last(ha_tail[col], bucket)
+                        for col in ("Trendline", "up_Trendline", "down_Trendline")
+                        if col in ha_tail})
 
 fig = make_subplots(rows=2, cols=1, shared_xaxes=True,
                     row_heights=[0.78, 0.22], vertical_spacing=0.03)
@@ -462,20 +416,20 @@ fig.add_trace(go.Candlestick(
 if show_trendline and "Trendline" in ha_plot:
     # Upper/lower band as a shaded channel
     if trend_band > 0:
-        fig.add_trace(go.Scatter(
-            x=ha_plot.index, y=ha_plot["up_Trendline"],
+        fig.add_trace(line_trace(
+            ha_plot.index, ha_plot["up_Trendline"],
             line=dict(width=0), mode="lines",
             hoverinfo="skip", showlegend=False, name="up band"),
             row=1, col=1)
-        fig.add_trace(go.Scatter(
-            x=ha_plot.index, y=ha_plot["down_Trendline"],
+        fig.add_trace(line_trace(
+            ha_plot.index, ha_plot["down_Trendline"],
             line=dict(width=0), mode="lines", fill="tonexty",
             fillcolor="rgba(99,102,241,0.10)",
             hoverinfo="skip", showlegend=False, name="down band"),
             row=1, col=1)
     # Main trendline (step-like, since it jumps at breaks)
-    fig.add_trace(go.Scatter(
-        x=ha_plot.index, y=ha_plot["Trendline"],
+    fig.add_trace(line_trace(
+        ha_plot.index, ha_plot["Trendline"],
         mode="lines", line=dict(color="#6366f1", width=2, shape="hv"),
         name="HA Trendline"),
         row=1, col=1)
@@ -510,6 +464,9 @@ fig.update_layout(height=600, margin=dict(l=10, r=70, t=10, b=10),
 fig.update_xaxes(gridcolor="#f0f1f3")
 fig.update_yaxes(gridcolor="#f0f1f3")
 st.plotly_chart(fig, use_container_width=True)
+if bucket > 1:
+    st.caption(f"Chart shows {chart_bars} bars merged {bucket} per candle "
+               f"({bucket * BAR_MINUTES}m).")
 
 # ----- levels + zones -----
 left, right = st.columns(2)
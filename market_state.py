@@ -0,0 +1,141 @@
+"""
+market_state.py
+
+Per-symbol live market state with one writer (the websocket thread) and
+lock-free readers (the strategy loop).
+
+    state = MarketState(["1d"], max_candles=5000)
+    state.set_price(64000.5)                       # writer
+    state.upsert_candle("1d", t, o, h, l, c)       # writer
+
+    snap = state.snapshot                          # reader: immutable, never blocks
+    if snap.version != seen: df = snap.candles["1d"].frame()
+
+Every write publishes a new Snapshot by swapping one reference, so a
+reader holds a consistent (price, candles) pair for as long as it likes.
+Closed candles live in a preallocated array the writer only ever appends
+past: a snapshot's read-only view over rows[start:end] never changes under
+it. The forming candle is a separate tuple, so a tick on it or a price
+update is O(1) whatever max_candles is. Revising an older candle (rare)
+copies the array first.
+"""
+
+from typing import NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+FIELDS = 5                       # time, open, high, low, close
+COLUMNS = ["Open", "High", "Low", "Close"]
+
+
+def _frozen(view):
+    view.flags.writeable = False
+    return view
+
+
+_EMPTY = _frozen(np.empty((0, FIELDS)))
+
+
+class Candles(NamedTuple):
+    closed: np.ndarray           # (n, 5) read-only rows, oldest first
+    forming: Optional[tuple]     # (time, open, high, low, close) or None
+
+    def __len__(self):
+        return len(self.closed) + (self.forming is not None)
+
+    def frame(self):
+        """Frame indexed by candle start time with Open/High/Low/Close."""
+        rows = self.closed
+        if self.forming is not None:
+            rows = np.vstack([rows, self.forming])
+        df = pd.DataFrame(rows[:, 1:], index=rows[:, 0].astype("int64"),
+                          columns=COLUMNS)
+        df.index.name = "time"
+        return df
+
+
+class Snapshot(NamedTuple):
+    version: int
+    price: Optional[float]
+    candles: dict                # timeframe -> Candles
+
+
+class _CandleBuffer:
+    """Writer-side storage behind the Candles views of one timeframe."""
+
+    def __init__(self, max_candles):
+        self.max_candles = max_candles
+        self.rows = np.empty((2 * max_candles, FIELDS))
+        self.start = self.end = 0
+        self.forming = None
+
+    def _view(self):
+        return Candles(_frozen(self.rows[self.start:self.end]), self.forming)
+
+    def _append(self, row):
+        if self.end == len(self.rows):
+            # full: continue in a fresh array (old snapshots keep the old one)
+            keep = self.rows[self.start:self.end]
+            self.rows = np.empty_like(self.rows)
+            self.rows[:len(keep)] = keep
+            self.start, self.end = 0, len(keep)
+        self.rows[self.end] = row
+        self.end += 1
+        # closed + forming stays within max_candles
+        self.start = max(self.start, self.end - (self.max_candles - 1))
+
+    def load(self, rows):
+        rows = np.asarray(rows, dtype=float).reshape(-1, FIELDS)[-self.max_candles:]
+        self.rows = np.empty_like(self.rows)
+        closed = rows[:-1]
+        self.rows[:len(closed)] = closed
+        self.start, self.end = 0, len(closed)
+        self.forming = tuple(float(x) for x in rows[-1]) if len(rows) else None
+        return self._view()
+
+    def upsert(self, t, o, h, l, c):
+        """New Candles view, or None if t is an older candle we no longer have."""
+        row = (float(t), float(o), float(h), float(l), float(c))
+        forming = self.forming
+
+        if forming is None or row[0] > forming[0]:
+            if forming is not None:
+                self._append(forming)
+            self.forming = row
+        elif row[0] == forming[0]:
+            self.forming = row
+        else:
+            hit = np.flatnonzero(self.rows[self.start:self.end, 0] == row[0])
+            if not len(hit):
+                return None
+            self.rows = self.rows.copy()            # copy-on-write
+            self.rows[self.start + hit[0]] = row
+        return self._view()
+
+
+class MarketState:
+
+    def __init__(self, timeframes, max_candles):
+        self._buffers = {tf: _CandleBuffer(max_candles) for tf in timeframes}
+        self.snapshot = Snapshot(0, None, {tf: Candles(_EMPTY, None)
+                                           for tf in timeframes})
+
+    def _publish(self, **changes):
+        snap = self.snapshot
+        self.snapshot = snap._replace(version=snap.version + 1, **changes)
+
+    # ================= WRITER (single thread) =================
+
+    def set_price(self, price):
+        self._publish(price=price)
+
+    def upsert_candle(self, tf, t, o, h, l, c):
+        view = self._buffers[tf].upsert(t, o, h, l, c)
+        if view is not None:
+            self._publish(candles={**self.snapshot.candles, tf: view})
+
+    def load_candles(self, tf, rows):
+        """Replace a timeframe's candles; the last row is the forming one."""
+        view = self._buffers[tf].load(rows)
+        self._publish(candles={**self.snapshot.candles, tf: view})
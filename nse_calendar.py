@@ -0,0 +1,189 @@
+"""
+nse_calendar.py
+
+Local NSE calendar for the BankNifty bot: trading holidays, monthly
+expiries (raw and holiday-shifted) and the option symbol prefix for each
+expiry, for the current month and the next few.
+
+    cal = NseCalendar("data/Trend_Following/nse_calendar.json")
+    cal.ensure()                      # load from disk; refresh in background if old
+    cal.is_holiday(date)
+    cal.current_expiry(ist_now())     # table lookup
+    cal.option_prefix(ist_now())      # "NSE:BANKNIFTY26OCT"
+
+The NSE site is scraped at most every `max_age_days` and never on the
+startup path: with no file yet, expiries are built without holidays and
+corrected once the background refresh lands.
+"""
+
+import os
+import json
+import time
+import threading
+from datetime import date, datetime, timedelta, time as dtime
+
+import requests
+
+HOLIDAY_URL = "https://www.nseindia.com/api/holiday-master?type=trading"
+HEADERS = {"User-Agent": "Mozilla/5.0", "Accept": "application/json"}
+
+EXPIRY_CUTOFF = dtime(15, 30)   # expiry day counts as expired after this
+
+
+# NSE moved BANKNIFTY monthly expiry from the last THURSDAY to the last
+# TUESDAY of the month, effective Sep 2025 (circular 111/2025). Weekly
+# BankNifty options were discontinued (Nov 2024) — only the monthly series
+# trades. If the last Tuesday is an exchange holiday, expiry shifts to the
+# previous trading day.
+def last_tuesday(year, month):
+    last_day = date(year, month, 1) + timedelta(days=32)
+    last_day = last_day.replace(day=1) - timedelta(days=1)
+    while last_day.weekday() != 1:   # Tuesday == 1
+        last_day -= timedelta(days=1)
+    return last_day
+
+
+def shift_for_holiday(d, holidays):
+    # move back to the previous weekday/non-holiday if expiry lands on one
+    guard = 0
+    while (d.weekday() >= 5 or d in holidays) and guard < 10:
+        d -= timedelta(days=1)
+        guard += 1
+    return d
+
+
+def fetch_nse_holidays(timeout=5):
+    """Trading holidays from nseindia.com (cookie warm-up GET first)."""
+    session = requests.Session()
+    session.get("https://www.nseindia.com", headers=HEADERS, timeout=timeout)
+    data = session.get(HOLIDAY_URL, headers=HEADERS, timeout=timeout).json()
+    return {datetime.strptime(item["tradingDate"], "%d-%b-%Y").date()
+            for item in data["CM"]}
+
+
+class NseCalendar:
+
+    def __init__(self, path, underlying="BANKNIFTY", months=3,
+                 max_age_days=7, notify=None):
+        self.path = path
+        self.underlying = underlying
+        self.months = months
+        self.max_age = max_age_days * 86400
+        self.notify = notify or (lambda msg: None)
+
+        # Replaced as a whole by refresh(), so readers never see a mix.
+        self._state = self._build(set(), updated=0)
+        self._refreshing = threading.Lock()
+
+    # ================= BUILD =================
+
+    def _build(self, holidays, updated, start=None):
+        start = start or date.today().replace(day=1)
+        expiries = []
+        year, month = start.year, start.month
+        for _ in range(self.months + 1):
+            raw = last_tuesday(year, month)
+            expiry = shift_for_holiday(raw, holidays)
+            expiries.append({
+                "raw": raw,
+                "expiry": expiry,
+                "prefix": f"NSE:{self.underlying}{expiry.strftime('%y%b').upper()}",
+            })
+            month += 1
+            if month == 13:
+                month, year = 1, year + 1
+        return {"holidays": frozenset(holidays), "expiries": expiries,
+                "updated": updated}
+
+    # ================= DISK =================
+
+    def load(self):
+        """Load the JSON store. Returns False if missing or unreadable."""
+        try:
+            with open(self.path) as f:
+                raw = json.load(f)
+            self._state = {
+                "holidays": frozenset(date.fromisoformat(d) for d in raw["holidays"]),
+                "expiries": [{"raw": date.fromisoformat(e["raw"]),
+                              "expiry": date.fromisoformat(e["expiry"]),
+                              "prefix": e["prefix"]}
+                             for e in raw["expiries"]],
+                "updated": raw["updated"],
+            }
+            return True
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+    def _save(self, state):
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        out = {
+            "updated": state["updated"],
+            "holidays": sorted(d.isoformat() for d in state["holidays"]),
+            "expiries": [{"raw": e["raw"].isoformat(),
+                          "expiry": e["expiry"].isoformat(),
+                          "prefix": e["prefix"]}
+                         for e in state["expiries"]],
+        }
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(out, f, indent=1)
+        os.replace(tmp, self.path)
+
+    # ================= REFRESH =================
+
+    def refresh(self):
+        """Scrape holidays, rebuild the expiry table and save it."""
+        if not self._refreshing.acquire(blocking=False):
+            return                      # one refresh at a time
+        try:
+            holidays = fetch_nse_holidays()
+            state = self._build(holidays, updated=time.time())
+            self._save(state)
+            self._state = state
+            self.notify("✅ NSE Holidays Loaded")
+        except Exception as e:
+            self.notify(f"⚠ Holiday Fetch Failed {e}")
+        finally:
+            self._refreshing.release()
+
+    @property
+    def stale(self):
+        state = self._state
+        if time.time() - state["updated"] > self.max_age:
+            return True
+        # table must still cover next month's expiry
+        return state["expiries"][-1]["expiry"] < date.today() + timedelta(days=31)
+
+    def ensure(self):
+        """Load from disk; refresh in a background thread if too old."""
+        if not self.load():
+            # keep whatever we have, but cover the current months
+            self._state = self._build(self._state["holidays"],
+                                      self._state["updated"])
+        if self.stale:
+            threading.Thread(target=self.refresh, daemon=True).start()
+
+    # ================= LOOKUPS =================
+
+    def is_holiday(self, d):
+        return d in self._state["holidays"]
+
+    def _current(self, now):
+        today = now.date()
+        for e in self._state["expiries"]:
+            if today < e["expiry"] or (today == e["expiry"]
+                                       and now.time() < EXPIRY_CUTOFF):
+                return e
+        # past the table (refresh overdue): extend it in memory
+        state = self._state
+        self._state = self._build(state["holidays"], state["updated"],
+                                  start=today.replace(day=1))
+        return self._current(now)
+
+    def current_expiry(self, now):
+        """Monthly expiry trading at `now` (an IST datetime)."""
+        return self._current(now)["expiry"]
+
+    def option_prefix(self, now):
+        """Symbol prefix for that expiry, e.g. "NSE:BANKNIFTY26OCT"."""
+        return self._current(now)["prefix"]
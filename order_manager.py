@@ -7,6 +7,10 @@ import requests
 
 from dotenv import load_dotenv
 
+from rate_limiter import limiter, PRIORITY_ORDER
+from products import catalog
+from private_feed import FINAL_STATES
+
 load_dotenv()
 
 
@@ -23,12 +27,6 @@ API_SECRET = os.getenv("DELTA_API_SECRET")
 TG_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TG_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 
-# Symbol -> Delta product_id. Orders API requires product_id.
-# 27 is BTCUSD on Delta. VERIFY against /v2/products before live trading.
-PRODUCT_IDS = {
-    "BTCUSD": 27,
-}
-
 # How long to wait for the HTTP response. (connect, read) seconds.
 # Keep read tight so a hung order fails fast instead of blocking the loop.
 ORDER_TIMEOUT = (3, 5)
@@ -36,21 +34,36 @@ ORDER_TIMEOUT = (3, 5)
 # Retries on transient network/5xx errors only (never on a clean reject).
 MAX_RETRIES = 2
 
+# Longest we wait on the shared rate-limit budget before sending anyway.
+# Orders have first claim on the bucket, so this is normally ~0.
+ORDER_BUDGET_WAIT = 1.0
+
+# How long place_order waits for the private feed's order/fill events
+# before falling back to the synchronous REST response.
+FILL_CONFIRM_TIMEOUT = 1.0
+
 
 class OrderManager:
     """
     Fast, self-contained order layer for Delta Exchange.
 
-    Public method used by the strategy:
+    Public methods used by the strategy:
         place_order(size, side, symbol, reduce_only=False)
+        position(symbol)   # live signed size, needs a PrivateFeed
+
+    Pass feed=PrivateFeed() to confirm fills from the exchange's own
+    order/fill events instead of only the REST response.
 
     Returns a dict:
         {"success": True,  "order_id": ..., "state": ..., "filled": ...,
-         "avg_price": ..., "raw": {...}}
+         "avg_price": ..., "source": "ws"|"rest", "raw": {...}}
         {"success": False, "error": "<code/message>", "raw": {...}}
     """
 
-    def __init__(self):
+    def __init__(self, feed=None):
+        # Optional private websocket (orders / fills / positions).
+        self.feed = feed
+
         # Persistent session = reused TCP/TLS connection = much faster orders.
         self.session = requests.Session()
 
@@ -123,6 +136,9 @@ class OrderManager:
         last_err = None
 
         for attempt in range(MAX_RETRIES + 1):
+            # Orders outrank every other caller; if the budget is somehow
+            # still empty after ORDER_BUDGET_WAIT, send anyway.
+            limiter.acquire(PRIORITY_ORDER, timeout=ORDER_BUDGET_WAIT)
             # Re-sign every attempt: the timestamp must stay within 5s.
             headers = self._signed_headers("POST", path, "", body)
             try:
@@ -158,8 +174,10 @@ class OrderManager:
             ctx = err.get("context") if isinstance(err, dict) else None
 
             # Rate limit (429) is the one reject worth a brief retry.
+            # Tell the shared limiter so price/candle pollers back off first.
             if resp.status_code == 429:
                 last_err = f"rate_limited {code}"
+                limiter.backoff(resp)
                 time.sleep(0.3 * (attempt + 1))
                 continue
 
@@ -183,11 +201,23 @@ class OrderManager:
         symbol      : e.g. "BTCUSD"
         reduce_only : True for exits (won't flip into a new position)
         """
-        product_id = PRODUCT_IDS.get(symbol)
-        if product_id is None:
+        # Product ids come from the cached /v2/products catalogue. An unknown
+        # symbol may be a new listing, so refresh before giving up (the
+        # catalogue rate-limits forced downloads to one a minute).
+        product = catalog.get(symbol)
+        if product is None:
+            product = catalog.load(force=True).get(symbol)
+        if product is None:
             msg = f"❌ No product_id mapped for {symbol}"
             self._tg(msg)
             return {"success": False, "error": "no_product_id"}
+        product_id = product["id"]
+
+        if product["max_size"] and int(size) > product["max_size"]:
+            self._tg(
+                f"❌ {symbol} size {size} above limit {product['max_size']}"
+            )
+            return {"success": False, "error": "size_above_limit"}
 
         payload = {
             "product_id": product_id,
@@ -228,6 +258,21 @@ class OrderManager:
             or order.get("limit_price")
         )
 
+        # ---- Prefer the private feed's events when it's connected ----
+        # Events are the exchange's own record of the match; no extra REST
+        # call is made either way.
+        source = "rest"
+        if self.feed is not None and self.feed.ready.is_set() and order_id is not None:
+            event = self.feed.wait_for_order(order_id, timeout=FILL_CONFIRM_TIMEOUT)
+            # Only a final state is authoritative; an "open" event seen before
+            # the timeout must not override a REST result that says filled.
+            if event and event["state"] in FINAL_STATES:
+                state = event["state"]
+                filled = event["filled"]
+                unfilled = size_req - filled
+                avg_price = event["avg_price"] or avg_price
+                source = "ws"
+
         # A market/IOC order should be closed (fully filled) or partially filled.
         if state == "closed" and unfilled == 0:
             self._tg(
@@ -260,5 +305,14 @@ class OrderManager:
             "filled": filled,
             "avg_price": float(avg_price) if avg_price else None,
             "elapsed_ms": elapsed_ms,
+            "source": source,
             "raw": result,
-        }
\ No newline at end of file
+        }
+
+    # ================= POSITIONS =================
+
+    def position(self, symbol):
+        """Signed contracts held per the private feed, or None without one."""
+        if self.feed is None or not self.feed.ready.is_set():
+            return None
+        return self.feed.position_size(symbol)
\ No newline at end of file
@@ -0,0 +1,244 @@
+"""
+private_feed.py
+
+Authenticated Delta websocket for our own orders, fills and positions.
+
+Keeps an in-memory book per product that is updated by exchange events:
+    feed.orders[order_id]      latest order object
+    feed.fills[order_id]       list of fills (user_trades) for that order
+    feed.positions[product_id] latest position object
+
+OrderManager uses it to confirm a fill from the event stream instead of
+trusting only the synchronous order response, and strategies can read
+feed.position_size(symbol) to reconcile without a REST round trip.
+
+    feed = PrivateFeed()
+    feed.start()
+    om = OrderManager(feed=feed)
+"""
+
+import os
+import time
+import hmac
+import json
+import hashlib
+import threading
+
+import websocket  # pip install websocket-client
+
+from dotenv import load_dotenv
+
+from products import catalog
+
+load_dotenv()
+
+
+# ================= CONFIG =================
+
+WS_URL = os.getenv("DELTA_WS_URL", "wss://socket.india.delta.exchange")
+
+API_KEY = os.getenv("DELTA_API_KEY")
+API_SECRET = os.getenv("DELTA_API_SECRET")
+
+# Delta India expects "key-auth"; older deployments used "auth".
+WS_AUTH_TYPE = os.getenv("DELTA_WS_AUTH_TYPE", "key-auth")
+
+CHANNELS = ["orders", "user_trades", "positions"]
+
+# Orders in these states will not change any more.
+FINAL_STATES = ("closed", "cancelled")
+
+RECONNECT_SEC = 3
+
+
+class PrivateFeed:
+    """Live order / fill / position book fed by Delta's private channels."""
+
+    def __init__(self, url=WS_URL, on_event=None):
+        self.url = url
+        self.on_event = on_event        # optional callback(msg_type, msg)
+
+        self.orders = {}
+        self.fills = {}
+        self.positions = {}
+
+        self._cond = threading.Condition()
+        self.ready = threading.Event()  # set once authenticated + subscribed
+        self._ws = None
+
+    # ================= AUTH =================
+
+    def _auth_message(self):
+        # Same HMAC scheme as REST: method + timestamp + path.
+        timestamp = str(int(time.time()))
+        sig = hmac.new(
+            API_SECRET.encode("utf-8"),
+            ("GET" + timestamp + "/live").encode("utf-8"),
+            hashlib.sha256,
+        ).hexdigest()
+        return {
+            "type": WS_AUTH_TYPE,
+            "payload": {"api-key": API_KEY, "signature": sig,
+                        "timestamp": timestamp},
+        }
+
+    def _subscribe(self, ws):
+        channels = [{"name": name, "symbols": ["all"]} for name in CHANNELS]
+        ws.send(json.dumps({"type": "subscribe",
+                            "payload": {"channels": channels}}))
+        self.ready.set()
+
+    # ================= EVENT HANDLERS =================
+
+    def _on_order(self, msg):
+        order_id = msg.get("id")
+        if order_id is None:
+            return
+        with self._cond:
+            order = self.orders.setdefault(order_id, {})
+            order.update(msg)
+            self._cond.notify_all()
+
+    def _on_fill(self, msg):
+        order_id = msg.get("order_id")
+        if order_id is None:
+            return
+        with self._cond:
+            self.fills.setdefault(order_id, []).append(msg)
+            self._cond.notify_all()
+
+    def _on_position(self, msg):
+        with self._cond:
+            # Snapshot arrives right after subscribing: replace everything.
+            if msg.get("action") == "snapshot":
+                self.positions = {
+                    p["product_id"]: p for p in msg.get("result", [])
+                    if p.get("product_id") is not None
+                }
+            else:
+                pid = msg.get("product_id")
+                if pid is None:
+                    return
+                if msg.get("action") == "delete":
+                    self.positions.pop(pid, None)
+                else:
+                    self.positions.setdefault(pid, {}).update(msg)
+            self._cond.notify_all()
+
+    def _on_message(self, ws, message):
+        try:
+            msg = json.loads(message)
+        except ValueError:
+            return
+
+        msg_type = msg.get("type")
+
+        if msg_type == WS_AUTH_TYPE or msg_type == "success":
+            if msg.get("success", True) and msg.get("status", "") != "error":
+                self._subscribe(ws)
+            else:
+                print(f"PrivateFeed auth failed: {msg}")
+            return
+
+        if msg_type == "orders":
+            self._on_order(msg)
+        elif msg_type in ("user_trades", "fills"):
+            self._on_fill(msg)
+        elif msg_type == "positions":
+            self._on_position(msg)
+        else:
+            return
+
+        if self.on_event:
+            try:
+                self.on_event(msg_type, msg)
+            except Exception:
+                pass
+
+    def _on_open(self, ws):
+        ws.send(json.dumps(self._auth_message()))
+
+    def _on_close(self, ws, *args):
+        self.ready.clear()
+
+    # ================= LIFECYCLE =================
+
+    def _run(self):
+        while True:
+            try:
+                self._ws = websocket.WebSocketApp(
+                    self.url,
+                    on_open=self._on_open,
+                    on_message=self._on_message,
+                    on_close=self._on_close,
+                    on_error=lambda ws, err: print(f"PrivateFeed error: {err}"),
+                )
+                self._ws.run_forever(ping_interval=20, ping_timeout=10)
+            except Exception as e:
+                print(f"PrivateFeed crashed, reconnecting: {e}")
+            self.ready.clear()
+            time.sleep(RECONNECT_SEC)
+
+    def start(self, wait=10):
+        """Connect in a daemon thread; optionally wait until subscribed."""
+        if not API_KEY or not API_SECRET:
+            print("PrivateFeed: API key/secret missing in env")
+            return self
+        threading.Thread(target=self._run, daemon=True).start()
+        if wait:
+            self.ready.wait(timeout=wait)
+        return self
+
+    # ================= QUERIES =================
+
+    def _order_summary(self, order_id):
+        """Fill summary from the order + fill events we hold, or None."""
+        order = self.orders.get(order_id)
+        fills = self.fills.get(order_id, [])
+        if order is None and not fills:
+            return None
+
+        order = order or {}
+        size = int(order.get("size", 0) or 0)
+        if order.get("unfilled_size") is not None:
+            filled = size - int(order["unfilled_size"] or 0)
+        else:
+            filled = sum(int(f.get("size", 0) or 0) for f in fills)
+
+        avg_price = order.get("average_fill_price")
+        if not avg_price and fills:
+            qty = sum(float(f.get("size", 0) or 0) for f in fills)
+            if qty:
+                avg_price = sum(float(f.get("price", 0) or 0)
+                                * float(f.get("size", 0) or 0)
+                                for f in fills) / qty
+
+        return {
+            "state": order.get("state"),
+            "filled": filled,
+            "avg_price": float(avg_price) if avg_price else None,
+            "fills": len(fills),
+        }
+
+    def wait_for_order(self, order_id, timeout=1.0):
+        """
+        Block until the order reaches a final state on the stream (or
+        timeout). Returns the fill summary, or None if nothing arrived.
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while True:
+                summary = self._order_summary(order_id)
+                if summary and summary["state"] in FINAL_STATES:
+                    return summary
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return summary
+                self._cond.wait(remaining)
+
+    def position_size(self, symbol):
+        """Signed contracts held in `symbol` (0 if flat or unknown)."""
+        pid = catalog.product_id(symbol)
+        with self._cond:
+            pos = self.positions.get(pid)
+            return int(pos.get("size", 0) or 0) if pos else 0
@@ -0,0 +1,198 @@
+"""
+products.py
+
+Delta product catalogue, loaded once from GET /v2/products and cached on
+disk so a restart is one small file read.
+
+Each product is a plain dict:
+    {"id": 27, "symbol": "BTCUSD", "contract_size": 0.001, "tick_size": 0.5,
+     "min_size": 1, "max_size": 100000, "contract_type": "perpetual_futures",
+     "state": "live"}
+
+Lookups by symbol and by product id are dict hits. Replaces the hand-kept
+PRODUCT_IDS / CONTRACT_SIZE tables: a newly listed symbol is tradable
+without a code change.
+"""
+
+import os
+import json
+import time
+
+import requests
+
+from rate_limiter import limiter, PRIORITY_CANDLE
+
+
+# ================= CONFIG =================
+
+BASE_URL = os.getenv("DELTA_BASE_URL", "https://api.india.delta.exchange")
+
+CACHE_FILE = os.path.join(os.getcwd(), "data", "products.json")
+CACHE_TTL_SEC = 6 * 60 * 60     # contract specs change rarely
+
+MIN_FETCH_INTERVAL_SEC = 60   # forced / retried downloads at most this often
+
+PAGE_SIZE = 500
+FETCH_TIMEOUT = (3, 10)
+
+
+def _num(value, default=None):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _parse_product(raw):
+    """Trim a Delta product object down to the fields the bots use."""
+    max_size = raw.get("position_size_limit")
+    return {
+        "id": int(raw["id"]),
+        "symbol": raw["symbol"],
+        "contract_size": _num(raw.get("contract_value")),
+        "tick_size": _num(raw.get("tick_size")),
+        "min_size": 1,
+        "max_size": int(max_size) if max_size else None,
+        "contract_type": raw.get("contract_type"),
+        "state": raw.get("state"),
+    }
+
+
+class ProductCatalog:
+    """
+    Symbol / product-id index over Delta's products endpoint.
+
+        catalog.product_id("BTCUSD")         -> 27
+        catalog.contract_size("BTCUSD")      -> 0.001
+        catalog.contract_sizes(["BTCUSD"])   -> {"BTCUSD": 0.001}
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl=CACHE_TTL_SEC):
+        self.path = path
+        self.ttl = ttl
+        self._by_symbol = None
+        self._by_id = {}
+        self.loaded_at = 0.0
+        self.fetch_attempted_at = 0.0
+
+    # ================= LOADING =================
+
+    def _index(self, products, loaded_at):
+        self._by_symbol = {p["symbol"]: p for p in products}
+        self._by_id = {p["id"]: p for p in products}
+        self.loaded_at = loaded_at
+
+    def _read_cache(self):
+        try:
+            with open(self.path) as f:
+                data = json.load(f)
+            return data["loaded_at"], data["products"]
+        except (OSError, ValueError, KeyError):
+            return None, None
+
+    def _write_cache(self, products, loaded_at):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump({"loaded_at": loaded_at, "products": products}, f)
+        os.replace(tmp, self.path)   # readers never see a half-written file
+
+    def _fetch(self):
+        """Download every product page. Returns a list of parsed dicts."""
+        products, after = [], None
+        while True:
+            params = {"page_size": PAGE_SIZE}
+            if after:
+                params["after"] = after
+            limiter.acquire(PRIORITY_CANDLE)
+            r = requests.get(f"{BASE_URL}/v2/products",
+                             params=params, timeout=FETCH_TIMEOUT)
+            if r.status_code == 429:
+                limiter.backoff(r)
+            r.raise_for_status()
+            data = r.json()
+            for raw in data.get("result", []):
+                try:
+                    products.append(_parse_product(raw))
+                except (KeyError, TypeError, ValueError):
+                    continue
+            after = (data.get("meta") or {}).get("after")
+            if not after:
+                return products
+
+    def load(self, force=False):
+        """
+        Fill the index from the disk cache if it's younger than `ttl`,
+        otherwise from the API. Downloads (forced or not) happen at most
+        every MIN_FETCH_INTERVAL_SEC. A failed download keeps the current
+        index, or falls back to the cache at any age; with neither the
+        index stays unloaded and the next lookup tries again.
+        """
+        loaded_at, products = self._read_cache()
+        fresh = loaded_at is not None and time.time() - loaded_at < self.ttl
+        if fresh and not force:
+            self._index(products, loaded_at)
+            return self
+
+        if time.time() - self.fetch_attempted_at < MIN_FETCH_INTERVAL_SEC:
+            if self._by_symbol is None and products:
+                self._index(products, loaded_at)
+            return self
+        self.fetch_attempted_at = time.time()
+
+        try:
+            fetched = self._fetch()
+            if fetched:
+                now = time.time()
+                self._write_cache(fetched, now)
+                self._index(fetched, now)
+                return self
+        except (requests.exceptions.RequestException, ValueError):
+            pass
+
+        if self._by_symbol is None and products:
+            self._index(products, loaded_at)
+        return self
+
+    def _ensure(self):
+        if self._by_symbol is None:
+            self.load()
+        return self._by_symbol or {}
+
+    # ================= LOOKUPS =================
+
+    def get(self, symbol):
+        return self._ensure().get(symbol)
+
+    def by_id(self, product_id):
+        self._ensure()
+        return self._by_id.get(product_id)
+
+    def product_id(self, symbol):
+        p = self.get(symbol)
+        return p["id"] if p else None
+
+    def contract_size(self, symbol):
+        p = self.get(symbol)
+        return p["contract_size"] if p else None
+
+    def contract_sizes(self, symbols, fallback=None):
+        """{symbol: contract_size}, from `fallback` where the catalogue has
+        no entry (e.g. offline with no cache); raises if still unknown."""
+        fallback = fallback or {}
+        sizes = {s: self.contract_size(s) or fallback.get(s) for s in symbols}
+        missing = [s for s, v in sizes.items() if v is None]
+        if missing:
+            raise RuntimeError(f"No Delta product metadata for {missing}")
+        return sizes
+
+    def symbols(self, contract_type=None):
+        """Listed symbols, optionally only one contract type."""
+        return [
+            s for s, p in self._ensure().items()
+            if contract_type is None or p["contract_type"] == contract_type
+        ]
+
+
+# Shared, lazily loaded on first lookup.
+catalog = ProductCatalog()
@@ -0,0 +1,195 @@
+"""
+rate_limiter.py
+
+One token bucket shared by every Delta REST caller on this host.
+
+The grid, breakout and trend bots, the dashboard and OrderManager all draw
+from the same bucket. Its state lives in a tiny file guarded by flock, so
+separate processes see one budget; a threading lock covers the threads
+inside a process.
+
+Budget is handed out by priority:
+    PRIORITY_ORDER   orders       may drain the bucket to zero
+    PRIORITY_PRICE   price polls  must leave PRICE_RESERVE of the burst
+    PRIORITY_CANDLE  candles      must leave CANDLE_RESERVE of the burst
+
+A burst of candle downloads therefore stops while there is still room for
+an exit order. After a 429 the price/candle callers sit out the exchange's
+reset window; orders only keep their own short retry.
+"""
+
+import os
+import struct
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl            # POSIX only; without it the bucket is per-process
+except ImportError:
+    fcntl = None
+
+
+# ================= CONFIG =================
+
+PRIORITY_ORDER = 0
+PRIORITY_PRICE = 1
+PRIORITY_CANDLE = 2
+
+RATE_PER_SEC = float(os.getenv("DELTA_RATE_LIMIT_RPS", "20"))
+BURST = float(os.getenv("DELTA_RATE_LIMIT_BURST", "40"))
+
+# Share of the bucket each priority must leave for the ones above it.
+PRICE_RESERVE = 0.25
+CANDLE_RESERVE = 0.5
+
+STATE_FILE = os.getenv(
+    "DELTA_RATE_LIMIT_FILE",
+    os.path.join(tempfile.gettempdir(), "delta_rate_limit.state"),
+)
+
+# Used when a 429 carries no reset header.
+DEFAULT_BACKOFF_SEC = 1.0
+
+# Never sleep longer than this in one go, so a freed budget is seen quickly.
+MAX_SLEEP_SEC = 0.25
+
+# tokens, last refill (epoch s), low-priority penalty until (epoch s)
+_STATE = struct.Struct("<ddd")
+
+
+class RateLimiter:
+    """
+    Host-wide token bucket with priority reserves.
+
+        limiter.acquire(PRIORITY_CANDLE)   # blocks until budget is available
+        limiter.backoff(resp)              # call after an HTTP 429
+    """
+
+    def __init__(self, rate=RATE_PER_SEC, burst=BURST, path=STATE_FILE):
+        self.rate = rate
+        self.burst = burst
+        self.reserves = {
+            PRIORITY_ORDER: 0.0,
+            PRIORITY_PRICE: burst * PRICE_RESERVE,
+            PRIORITY_CANDLE: burst * CANDLE_RESERVE,
+        }
+        self._lock = threading.Lock()
+        self._local = [burst, time.time(), 0.0]   # used when no shared file
+        self._fd = None
+        # Without flock the file can't be shared safely, so stay in-process.
+        if fcntl is not None:
+            try:
+                self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+            except OSError:
+                pass
+
+    # ================= SHARED STATE =================
+
+    def _read(self):
+        if self._fd is None:
+            return list(self._local)
+        raw = os.pread(self._fd, _STATE.size, 0)
+        if len(raw) < _STATE.size:
+            return [self.burst, time.time(), 0.0]
+        return list(_STATE.unpack(raw))
+
+    def _write(self, state):
+        if self._fd is None:
+            self._local = list(state)
+            return
+        os.pwrite(self._fd, _STATE.pack(*state), 0)
+
+    def _update(self, fn):
+        """Run fn(state) -> result under the thread lock and the file lock."""
+        with self._lock:
+            if self._fd is not None:
+                fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                state = self._read()
+                result = fn(state)
+                self._write(state)
+                return result
+            finally:
+                if self._fd is not None:
+                    fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _refill(self, state, now):
+        """Credit tokens earned since the last refill and stamp it `now`."""
+        tokens, last = state[0], state[1]
+        state[0] = min(self.burst, tokens + max(0.0, now - last) * self.rate)
+        state[1] = now
+        return state[0]
+
+    # ================= PUBLIC =================
+
+    def _try_take(self, priority, cost):
+        """Take `cost` tokens if allowed. Returns 0, or seconds to wait."""
+        floor = self.reserves.get(priority, self.reserves[PRIORITY_CANDLE])
+
+        def take(state):
+            now = time.time()
+            tokens = self._refill(state, now)
+            penalty_until = state[2]
+
+            if priority != PRIORITY_ORDER and now < penalty_until:
+                return penalty_until - now
+            if tokens - cost >= floor:
+                state[0] = tokens - cost
+                return 0.0
+            return (floor + cost - tokens) / self.rate
+
+        return self._update(take)
+
+    def acquire(self, priority=PRIORITY_CANDLE, cost=1, timeout=None):
+        """
+        Block until `cost` tokens are granted at `priority`.
+        Returns False only if `timeout` (seconds) ran out first.
+        """
+        deadline = None if timeout is None else time.time() + timeout
+        while True:
+            wait = self._try_take(priority, cost)
+            if wait <= 0:
+                return True
+            if deadline is not None:
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    return False
+                wait = min(wait, remaining)
+            time.sleep(min(wait, MAX_SLEEP_SEC))
+
+    def backoff(self, resp=None, seconds=None):
+        """
+        Record a 429. Price and candle callers pause until the exchange's
+        reset time; orders are not blocked by it.
+        """
+        if seconds is None:
+            seconds = _reset_seconds(resp)
+
+        def penalize(state):
+            now = time.time()
+            state[2] = max(state[2], now + seconds)
+            # Settle the refill up to now before clamping, so idle time from
+            # before the 429 can't hand out a fresh burst on the next take.
+            tokens = self._refill(state, now)
+            state[0] = min(tokens, self.reserves[PRIORITY_PRICE])
+
+        self._update(penalize)
+
+
+def _reset_seconds(resp):
+    """Seconds until Delta resets the quota, from the 429 response headers."""
+    headers = getattr(resp, "headers", None) or {}
+    try:
+        # Delta sends the remaining window in milliseconds.
+        return max(0.0, float(headers["X-RATE-LIMIT-RESET"]) / 1000.0)
+    except (KeyError, TypeError, ValueError):
+        pass
+    try:
+        return max(0.0, float(headers["Retry-After"]))
+    except (KeyError, TypeError, ValueError):
+        return DEFAULT_BACKOFF_SEC
+
+
+# One bucket per process, backed by the shared state file.
+limiter = RateLimiter()
@@ -0,0 +1,281 @@
+"""
+shared_market.py
+
+Live prices and candle buffers in a named shared-memory segment, written
+by one bot and read by any local process (dashboards, sibling bots)
+without REST calls or locks.
+
+    market = SharedMarketWriter("trend_following_market", SYMBOLS, capacity=5000)
+    market.set_price("BTCUSD", 64000.5)
+    market.upsert_candle("BTCUSD", t_us, o, h, l, c)
+
+    reader = SharedMarketReader.attach("trend_following_market")   # None if absent
+    price, ts = reader.price("BTCUSD")
+    df = reader.frame("BTCUSD", last=200)     # Open/High/Low/Close by bar time
+
+Layout: a 4 KiB header (magic, JSON length, closed flag, writer pid, JSON
+with the symbols, capacity and timeframe), then one slot per symbol: eight 8-byte
+meta words [seq, count, price, price_ts, last_time, ...] and a ring of
+`capacity` (time, open, high, low, close) float64 rows.
+
+Each slot is guarded by a seqlock: the single writer makes `seq` odd,
+writes, and makes it even again; a reader copies what it needs and keeps
+the copy only if `seq` was even and unchanged across the copy. Readers
+never block the writer.
+
+A segment left by a writer that died is replaced; one whose writer pid is
+still alive is not, and a second writer on that name fails to start.
+"""
+
+import os
+import json
+import time
+import atexit
+import struct
+
+import numpy as np
+import pandas as pd
+from multiprocessing import shared_memory, resource_tracker
+
+MAGIC = b"SHMKT01\0"
+HEADER_SIZE = 4096
+META_WORDS = 8
+SEQ, COUNT, PRICE, PRICE_TS, LAST_TIME = range(5)
+FIELDS = 5                       # time, open, high, low, close
+READ_SPINS = 1000
+INFO_AT = 24                     # JSON offset (after magic, len, closed, pid)
+
+
+def _slot_size(capacity):
+    return 8 * (META_WORDS + capacity * FIELDS)
+
+
+def _attach(name):
+    """Map an existing segment without letting this process unlink it."""
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)   # 3.13+
+    except TypeError:
+        shm = shared_memory.SharedMemory(name=name)
+        # the writer owns the segment; don't unlink it when we exit
+        resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+def _pid_alive(pid):
+    if not pid:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True                 # exists, owned by another user
+    return True
+
+
+def _live_owner(shm):
+    """Pid of the running writer of an existing segment, else None."""
+    if bytes(shm.buf[:8]) != MAGIC:
+        return None
+    _, closed, pid = struct.unpack("<III", shm.buf[8:20])
+    return pid if not closed and _pid_alive(pid) else None
+
+
+class _Segment:
+
+    def _map(self, shm, symbols, capacity):
+        self.shm = shm
+        self.symbols = list(symbols)
+        self.capacity = capacity
+        self.slot = {s: i for i, s in enumerate(self.symbols)}
+        self._meta_u, self._meta_f, self._rows = [], [], []
+        for i in range(len(self.symbols)):
+            offset = HEADER_SIZE + i * _slot_size(capacity)
+            meta = np.ndarray((META_WORDS,), np.uint64, shm.buf, offset)
+            self._meta_u.append(meta)
+            self._meta_f.append(meta.view(np.float64))
+            self._rows.append(np.ndarray((capacity, FIELDS), np.float64, shm.buf,
+                                         offset + 8 * META_WORDS))
+
+    def _unmap(self):
+        # numpy views must go before the mapping can close
+        self._meta_u = self._meta_f = self._rows = []
+        self.shm.close()
+
+
+class SharedMarketWriter(_Segment):
+
+    def __init__(self, name, symbols, capacity, timeframe=None):
+        size = HEADER_SIZE + len(symbols) * _slot_size(capacity)
+        try:
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            existing = _attach(name)
+            owner = _live_owner(existing)
+            if owner is not None and owner != os.getpid():
+                existing.close()
+                raise FileExistsError(f"shared market {name} is in use by pid {owner}")
+            # left behind by a writer that died: replace it
+            existing.unlink()
+            existing.close()
+            shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+
+        info = json.dumps({"symbols": list(symbols), "capacity": capacity,
+                           "timeframe": timeframe}).encode()
+        if INFO_AT + len(info) > HEADER_SIZE:
+            shm.close()
+            shm.unlink()
+            raise ValueError("too many symbols for the shared market header")
+        shm.buf[:HEADER_SIZE] = bytes(HEADER_SIZE)
+        shm.buf[INFO_AT:INFO_AT + len(info)] = info
+        shm.buf[8:20] = struct.pack("<III", len(info), 0, os.getpid())
+        shm.buf[:8] = MAGIC                 # last: readers check it first
+
+        self.name = name
+        self._map(shm, symbols, capacity)
+        atexit.register(self.close)
+
+    # ================= SEQLOCK =================
+
+    def _begin(self, i):
+        self._meta_u[i][SEQ] += 1           # odd: write in progress
+
+    def _end(self, i):
+        self._meta_u[i][SEQ] += 1
+
+    # ================= WRITES =================
+
+    def set_price(self, symbol, price):
+        i = self.slot.get(symbol)
+        if i is None:
+            return
+        meta = self._meta_f[i]
+        self._begin(i)
+        meta[PRICE] = price
+        meta[PRICE_TS] = time.time()
+        self._end(i)
+
+    def upsert_candle(self, symbol, t, o, h, l, c):
+        """Update the candle starting at t, or append it if it is newer."""
+        i = self.slot.get(symbol)
+        if i is None:
+            return
+        meta_u, meta_f, rows = self._meta_u[i], self._meta_f[i], self._rows[i]
+        count = int(meta_u[COUNT])
+        append = not count or t > meta_f[LAST_TIME]
+
+        if append:
+            pos = count % self.capacity
+        elif t == meta_f[LAST_TIME]:
+            pos = (count - 1) % self.capacity
+        else:
+            # an older candle revised: find it in the ring
+            hit = np.flatnonzero(rows[:min(count, self.capacity), 0] == t)
+            if not len(hit):
+                return
+            pos = int(hit[0])
+
+        self._begin(i)
+        rows[pos] = (t, o, h, l, c)
+        if append:
+            meta_u[COUNT] = count + 1
+            meta_f[LAST_TIME] = t
+        self._end(i)
+
+    def load_candles(self, symbol, rows):
+        """Replace a symbol's buffer with rows of (time, open, high, low, close)."""
+        i = self.slot.get(symbol)
+        if i is None:
+            return
+        rows = np.asarray(rows, dtype=np.float64).reshape(-1, FIELDS)[-self.capacity:]
+        self._begin(i)
+        self._rows[i][:len(rows)] = rows
+        self._meta_u[i][COUNT] = len(rows)
+        self._meta_f[i][LAST_TIME] = rows[-1, 0] if len(rows) else 0.0
+        self._end(i)
+
+    def close(self):
+        if self.shm is None:
+            return
+        self.shm.buf[12:16] = struct.pack("<I", 1)    # tell readers to re-attach
+        self._unmap()
+        try:
+            self.shm.unlink()
+        except FileNotFoundError:
+            pass
+        self.shm = None
+
+
+class SharedMarketReader(_Segment):
+
+    def __init__(self, name, shm):
+        if bytes(shm.buf[:8]) != MAGIC:
+            shm.close()
+            raise ValueError(f"{name} is not a shared market segment")
+        length, _, self.pid = struct.unpack("<III", shm.buf[8:20])
+        info = json.loads(bytes(shm.buf[INFO_AT:INFO_AT + length]))
+        self.name = name
+        self.timeframe = info.get("timeframe")
+        self._map(shm, info["symbols"], info["capacity"])
+
+    @classmethod
+    def attach(cls, name):
+        """Reader on the named segment, or None if no writer has created it."""
+        try:
+            shm = _attach(name)
+        except FileNotFoundError:
+            return None
+        try:
+            return cls(name, shm)
+        except ValueError:
+            return None
+
+    @property
+    def closed(self):
+        """True once the writer has shut down; attach again for a new one."""
+        return struct.unpack("<I", self.shm.buf[12:16])[0] == 1
+
+    def close(self):
+        self._unmap()
+
+    # ================= SNAPSHOTS =================
+
+    def _read(self, symbol, copy):
+        i = self.slot.get(symbol)
+        if i is None:
+            return None
+        seq = self._meta_u[i][SEQ:SEQ + 1]
+        for _ in range(READ_SPINS):
+            before = int(seq[0])
+            if before & 1:
+                continue                    # writer mid-update
+            out = copy(self._meta_u[i], self._meta_f[i], self._rows[i])
+            if int(seq[0]) == before:
+                return out
+        return None
+
+    def price(self, symbol):
+        """(price, epoch seconds it was written), or (None, None)."""
+        out = self._read(symbol, lambda mu, mf, rows: (float(mf[PRICE]),
+                                                      float(mf[PRICE_TS])))
+        if not out or not out[1]:
+            return None, None
+        return out
+
+    def candles(self, symbol, last=None):
+        """Copy of the newest candles, oldest first, as an (n, 5) array."""
+        def copy(meta_u, meta_f, rows):
+            count = int(meta_u[COUNT])
+            n = min(count, self.capacity, last or self.capacity)
+            idx = (count - n + np.arange(n)) % self.capacity
+            return rows[idx]                 # fancy indexing copies
+        out = self._read(symbol, copy)
+        return np.empty((0, FIELDS)) if out is None else out
+
+    def frame(self, symbol, last=None):
+        """Candles as a frame with the bot's Open/High/Low/Close columns."""
+        rows = self.candles(symbol, last)
+        df = pd.DataFrame(rows[:, 1:], index=rows[:, 0].astype("int64"),
+                          columns=["Open", "High", "Low", "Close"])
+        df.index.name = "time"
+        return df
@@ -0,0 +1,199 @@
+"""
+trade_analytics.py
+
+Per-strategy performance aggregates, updated one trade at a time as the
+bots journal them, so the dashboard never rescans live_trades.csv.
+
+    store = TradeAnalytics.open(SAVE_DIR, TRADE_CSV)   # backfills from the CSV once
+    store.add(trade)                                  # next to save_trade()
+
+    summary = read_summary(SAVE_DIR)                  # dashboard: one small JSON
+    t, equity = read_equity(SAVE_DIR)                 # float64 arrays, memory-mapped
+
+Only the bot writes the store; readers (the dashboard) never create or
+rebuild it, and use summarize() in memory for a strategy without one.
+
+Kept per strategy folder:
+
+  • analytics.json   totals, win/loss, fees, hold time, equity peak and max
+                     drawdown, Welford mean/variance of trade PnL, and
+                     {n, wins, net, fees} buckets by symbol, side, exit hour
+                     and exit day. Its size depends on the number of
+                     buckets, not trades.
+  • equity.bin       (exit epoch, equity) float64 pairs, one per trade,
+                     appended as trades close.
+
+Fees are only known for trades passed to add() with a "fees" key; trades
+backfilled from the CSV count as fee-free.
+"""
+
+import os
+import json
+import math
+import threading
+
+import numpy as np
+import pandas as pd
+
+SUMMARY_FILE = "analytics.json"
+EQUITY_FILE = "equity.bin"
+VERSION = 1
+
+BREAKDOWNS = ("symbol", "side", "hour", "day")
+
+
+def _empty():
+    return {
+        "version": VERSION,
+        "trades": 0, "wins": 0, "losses": 0,
+        "net": 0.0, "gross_win": 0.0, "gross_loss": 0.0, "fees": 0.0,
+        "hold_sec": 0.0,
+        "equity": 0.0, "peak": 0.0, "max_drawdown": 0.0,
+        "mean": 0.0, "m2": 0.0,          # Welford running mean / sum of squares
+        "first_exit": None, "last_exit": None,
+        **{f"by_{k}": {} for k in BREAKDOWNS},
+    }
+
+
+def _std(n, m2):
+    return math.sqrt(m2 / (n - 1)) if n > 1 else 0.0
+
+
+def derived(state):
+    """Ratios computed from the stored aggregates (all O(buckets))."""
+    n = state["trades"]
+    std = _std(n, state["m2"])
+    daily = np.array([b["net"] for b in state["by_day"].values()], dtype=float)
+    daily_std = float(daily.std(ddof=1)) if len(daily) > 1 else 0.0
+    return {
+        "win_rate": state["wins"] / n if n else 0.0,
+        "avg_trade": state["mean"],
+        "profit_factor": (state["gross_win"] / -state["gross_loss"]
+                          if state["gross_loss"] else math.inf if state["gross_win"] else 0.0),
+        "avg_hold_min": state["hold_sec"] / n / 60 if n else 0.0,
+        "sharpe_trade": state["mean"] / std if std else 0.0,
+        "sharpe_daily": float(daily.mean()) / daily_std if daily_std else 0.0,
+    }
+
+
+def _apply(s, trade):
+    """Fold one trade into state s; returns its (exit epoch, equity) point."""
+    net = float(trade["net_pnl"])
+    fees = float(trade.get("fees") or 0.0)
+    entry = pd.Timestamp(trade["entry_time"])
+    exit_ = pd.Timestamp(trade["exit_time"])
+
+    s["trades"] += 1
+    n = s["trades"]
+    if net > 0:
+        s["wins"] += 1
+        s["gross_win"] += net
+    elif net < 0:
+        s["losses"] += 1
+        s["gross_loss"] += net
+    s["net"] += net
+    s["fees"] += fees
+    s["hold_sec"] += max((exit_ - entry).total_seconds(), 0.0)
+
+    s["equity"] += net
+    s["peak"] = max(s["peak"], s["equity"])
+    s["max_drawdown"] = max(s["max_drawdown"], s["peak"] - s["equity"])
+
+    delta = net - s["mean"]
+    s["mean"] += delta / n
+    s["m2"] += delta * (net - s["mean"])
+
+    s["first_exit"] = s["first_exit"] or exit_.isoformat()
+    s["last_exit"] = exit_.isoformat()
+
+    keys = {"symbol": str(trade["symbol"]), "side": str(trade["side"]),
+            "hour": f"{exit_.hour:02d}", "day": exit_.date().isoformat()}
+    for k, key in keys.items():
+        b = s[f"by_{k}"].setdefault(key, {"n": 0, "wins": 0, "net": 0.0, "fees": 0.0})
+        b["n"] += 1
+        b["wins"] += net > 0
+        b["net"] += net
+        b["fees"] += fees
+
+    return exit_.timestamp(), s["equity"]
+
+
+def summarize(trades):
+    """(state, exit epochs, equity) for a trades frame, in memory only."""
+    state = _empty()
+    points = np.array([_apply(state, t) for t in trades.to_dict("records")],
+                      dtype=np.float64).reshape(-1, 2)
+    return state, points[:, 0], points[:, 1]
+
+
+class TradeAnalytics:
+
+    def __init__(self, folder):
+        self.folder = folder
+        os.makedirs(folder, exist_ok=True)
+        self.summary_path = os.path.join(folder, SUMMARY_FILE)
+        self.equity_path = os.path.join(folder, EQUITY_FILE)
+        self.lock = threading.Lock()
+        self.state = read_summary(folder) or _empty()
+
+    @classmethod
+    def open(cls, folder, trades_csv=None):
+        """Load the store; rebuild it from trades_csv if it is missing or
+        does not cover the journal (older trades, or an interrupted write)."""
+        store = cls(folder)
+        if trades_csv and os.path.exists(trades_csv):
+            with open(trades_csv, "rb") as f:
+                rows = max(sum(1 for _ in f) - 1, 0)
+            records = (os.path.getsize(store.equity_path) // 16
+                       if os.path.exists(store.equity_path) else 0)
+            if rows != store.state["trades"] or records != rows:
+                store.rebuild(pd.read_csv(trades_csv))
+        return store
+
+    # ================= UPDATE =================
+
+    def add(self, trade):
+        """Fold one closed trade in and persist (equity point first)."""
+        with self.lock:
+            point = _apply(self.state, trade)
+            with open(self.equity_path, "ab") as f:
+                f.write(np.array(point, dtype=np.float64).tobytes())
+            self._save()
+
+    def rebuild(self, trades):
+        """Recompute everything from a trades frame (journal order)."""
+        with self.lock:
+            self.state = _empty()
+            points = [_apply(self.state, t) for t in trades.to_dict("records")]
+            tmp = self.equity_path + ".tmp"
+            np.array(points, dtype=np.float64).reshape(-1, 2).tofile(tmp)
+            os.replace(tmp, self.equity_path)
+            self._save()
+
+    def _save(self):
+        tmp = self.summary_path + ".tmp"
+        with open(tmp, "w") as f:
+            json.dump(self.state, f, separators=(",", ":"))
+        os.replace(tmp, self.summary_path)
+
+
+# ================= READERS =================
+
+def read_summary(folder):
+    """Stored aggregates, or None if the strategy has no store yet."""
+    try:
+        with open(os.path.join(folder, SUMMARY_FILE)) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return state if state.get("version") == VERSION else None
+
+
+def read_equity(folder):
+    """(exit epoch seconds, equity) arrays; empty if there is no store."""
+    path = os.path.join(folder, EQUITY_FILE)
+    size = os.path.getsize(path) // 16 * 16 if os.path.exists(path) else 0
+    if not size:
+        return np.empty(0), np.empty(0)
+    points = np.memmap(path, dtype=np.float64, mode="r", shape=(size // 16, 2))
+    return points[:, 0], points[:, 1]
@@ -6,7 +6,6 @@ import pandas as pd
 import numpy as np
 
 from datetime import datetime
-from collections import deque
 
 import websocket  # pip install websocket-client
 
@@ -14,7 +13,12 @@ from dotenv import load_dotenv
 
 import traceback
 
+from products import catalog
 from utils import TradingUtils
+from bar_log import BarLogWriter
+from shared_market import SharedMarketWriter
+from market_state import MarketState
+from ws_decode import FrameRouter
 
 load_dotenv()
 
@@ -28,7 +32,9 @@ SYMBOLS = ["BTCUSD", "ETHUSD", "SOLUSD"]
 START_BALANCE = 10000.0
 TAKER_FEE = 0.0005
 MIN_BALANCE = 1000
-CONTRACT_SIZE = {"BTCUSD": 0.001, "ETHUSD": 0.01, "SOLUSD": 1.0}
+# from /v2/products; the fixed sizes only apply offline with no cache
+CONTRACT_SIZE = catalog.contract_sizes(
+    SYMBOLS, fallback={"BTCUSD": 0.001, "ETHUSD": 0.01, "SOLUSD": 1.0})
 DEFAULT_CONTRACTS = {
     "BTCUSD": 1000,
     "ETHUSD": 1000,
@@ -113,32 +119,58 @@ SAVE_DIR = os.path.join(
 os.makedirs(SAVE_DIR, exist_ok=True)
 
 # ================= LIVE MARKET STATE (shared across threads) =================
+# The WS thread is the only writer; each update publishes a new immutable
+# snapshot (market[s].snapshot) that the strategy loop reads without a lock.
 
-def _new_tf_buffer():
-    return {
-        "candles": deque(maxlen=MAX_CANDLES),
-        "candle_index": {},
-        "last_seen_candle_start": None,
-    }
+market = {s: MarketState(ALL_TFS, MAX_CANDLES) for s in SYMBOLS}
 
+ws_ready = threading.Event()
 
-market = {
-    s: {
-        "price": None,
-        "tf": {tf: _new_tf_buffer() for tf in ALL_TFS},
-    } for s in SYMBOLS
-}
+# Same prices and exec-TF candles in shared memory for other local processes
+# (dashboards, sibling bots); written only by the seed and the WS thread.
+SHARED_MARKET_NAME = os.getenv("SHARED_MARKET_NAME", f"{BOT_NAME}_market")
+
+try:
+    shared_market = SharedMarketWriter(SHARED_MARKET_NAME, SYMBOLS, MAX_CANDLES,
+                                       timeframe=EXEC_TF)
+except (OSError, ValueError) as e:
+    shared_market = None
+    utils.log(f"⚠️ Shared market unavailable: {e}", tg=False)
 
-market_lock = threading.Lock()
-ws_ready = threading.Event()
 
+# ================= PUBLISH PROCESSED VIEW =================
+# Per-bar OHLC, Heikin-Ashi and signal flags go to an append-only binary
+# log per symbol (bar_log.py); get_testing.py tails it for new records.
 
-# ================= SAVE DATA =================
+VIEW_COLUMNS = [
+    "open", "high", "low", "close",
+    "HA_open", "HA_high", "HA_low", "HA_close",
+    "long_entry", "short_entry", "long_exit", "short_exit",
+]
+
+bar_logs = {
+    s: BarLogWriter(os.path.join(SAVE_DIR, f"{s}_bars.bin"), VIEW_COLUMNS)
+    for s in SYMBOLS
+}
 
-def save_processed_data(df, symbol):
-    """Persist the latest computed HA view."""
-    path = os.path.join(SAVE_DIR, f"{symbol}_processed.csv")
-    df.to_csv(path, index=True)
+
+def publish_view(symbol, df, ha):
+    """Append new (or changed forming) bars to the symbol's bar log."""
+    prev = ha.shift(1)
+    view = pd.DataFrame({
+        "open": df["Open"], "high": df["High"],
+        "low": df["Low"], "close": df["Close"],
+        "HA_open": ha["HA_Open"], "HA_high": ha["HA_High"],
+        "HA_low": ha["HA_Low"], "HA_close": ha["HA_Close"],
+        "long_entry": ha["HA_Close"] > prev["HA_Close"],
+        "short_entry": ha["HA_Close"] < prev["HA_Close"],
+        "long_exit": ha["HA_Close"] < prev["HA_Low"],
+        "short_exit": ha["HA_Close"] > prev["HA_High"],
+    }, index=df.index)
+    try:
+        bar_logs[symbol].publish(view.astype(float))
+    except OSError as e:
+        utils.log(f"⚠️ Bar log write failed {symbol}: {e}", tg=False)
 
 
 # ================= PAPER ORDER =================
@@ -181,6 +213,7 @@ def _close_position(symbol, pos, fill_price, state, now):
         "exit_price": fill_price,
         "qty": pos["qty"],
         "net_pnl": round(net, 6),
+        "fees": round(total_fee, 6),
         "entry_time": pos["entry_time"],
         "exit_time": now
     })
@@ -229,7 +262,7 @@ def _open_position(symbol, side, fill_price, state, now, candle_id):
 # prevents the same-candle enter->exit round-trip caused by the forming
 # HA close wobbling. After an exit, no re-entry on the same candle.
 
-def process_symbol(symbol, exec_df, state):
+def process_symbol(symbol, exec_df, state, publish=True):
 
     df = exec_df
 
@@ -242,6 +275,9 @@ def process_symbol(symbol, exec_df, state):
     if len(ha) < 2:
         return
 
+    if publish:
+        publish_view(symbol, df, ha)
+
     cur = ha.iloc[-1]    # today (forming) HA candle
     prev = ha.iloc[-2]   # yesterday (closed) HA candle
 
@@ -302,48 +338,14 @@ def process_symbol(symbol, exec_df, state):
 
 # ================= WEBSOCKET LAYER =================
 
-def _upsert_candle(symbol, tf, candle_start, o, h, l, c):
-    """Insert or update a candle keyed by its start time."""
-    m = market[symbol]["tf"][tf]
-    idx = m["candle_index"]
-
-    row = {"time": candle_start, "Open": o, "High": h, "Low": l, "Close": c}
-
-    if candle_start in idx:
-        pos = idx[candle_start]
-        m["candles"][pos] = row
-    else:
-        m["candles"].append(row)
-        idx.clear()
-        for p, r in enumerate(m["candles"]):
-            idx[r["time"]] = p
-        m["last_seen_candle_start"] = candle_start
-
-
-def _tf_from_type(msg_type):
-    """Map a Delta payload type like 'candlestick_1d' to '1d'."""
-    suffix = msg_type.split("candlestick_", 1)[-1]
-    return suffix if suffix in ALL_TFS else None
-
-
-def on_message(ws, message):
-    try:
-        msg = json.loads(message)
-    except Exception:
-        return
-
-    msg_type = msg.get("type")
+def _set_price(symbol, price):
+    market[symbol].set_price(price)
+    if shared_market is not None:
+        shared_market.set_price(symbol, price)
 
-    if msg_type and msg_type.startswith("candlestick"):
-
-        symbol = msg.get("symbol")
-        if symbol not in market:
-            return
-
-        tf = _tf_from_type(msg_type)
-        if tf is None:
-            return
 
+def _on_candle(tf):
+    def handle(symbol, msg):
         try:
             candle_start = int(msg["candle_start_time"])
             o = float(msg["open"])
@@ -353,27 +355,39 @@ def on_message(ws, message):
         except (KeyError, TypeError, ValueError):
             return
 
-        with market_lock:
-            _upsert_candle(symbol, tf, candle_start, o, h, l, c)
+        market[symbol].upsert_candle(tf, candle_start, o, h, l, c)
+        if shared_market is not None and tf == EXEC_TF:
+            shared_market.upsert_candle(symbol, candle_start, o, h, l, c)
+    return handle
 
-    elif msg_type == "mark_price":
-        raw = msg.get("symbol", "")
-        symbol = raw.replace("MARK:", "")
-        if symbol in market:
-            try:
-                with market_lock:
-                    market[symbol]["price"] = float(msg["price"])
-            except (KeyError, TypeError, ValueError):
-                pass
-
-    elif msg_type == "v2/ticker":
-        symbol = msg.get("symbol")
-        if symbol in market and msg.get("mark_price") is not None:
-            try:
-                with market_lock:
-                    market[symbol]["price"] = float(msg["mark_price"])
-            except (TypeError, ValueError):
-                pass
+
+def _on_mark_price(symbol, msg):
+    try:
+        _set_price(symbol, float(msg["price"]))
+    except (KeyError, TypeError, ValueError):
+        pass
+
+
+def _on_ticker(symbol, msg):
+    if msg.get("mark_price") is None:
+        return
+    try:
+        _set_price(symbol, float(msg["mark_price"]))
+    except (TypeError, ValueError):
+        pass
+
+
+# (type, symbol) -> handler; frames for anything else are dropped before
+# decoding. WS_RECORD_PATH records raw traffic for bench_ws_decode.py.
+router = FrameRouter(record_path=os.getenv("WS_RECORD_PATH"))
+for _tf in WS_RESOLUTIONS:
+    router.route(f"candlestick_{_tf}", SYMBOLS, _on_candle(_tf))
+router.route("mark_price", {f"MARK:{s}": s for s in SYMBOLS}, _on_mark_price)
+router.route("v2/ticker", SYMBOLS, _on_ticker)
+
+
+def on_message(ws, message):
+    router.dispatch(message)
 
 
 def on_error(ws, error):
@@ -423,23 +437,14 @@ def _seed_history():
                 if df is None or len(df) < MIN_BARS:
                     utils.log(f"⚠️ Thin/no history for {symbol} {tf}", tg=False)
                     continue
-                with market_lock:
-                    m = market[symbol]["tf"][tf]
-                    m["candles"].clear()
-                    m["candle_index"].clear()
-                    for ts, row in df.iterrows():
-                        key = int(pd.Timestamp(ts).value // 1000)
-                        m["candles"].append({
-                            "time": key,
-                            "Open": float(row["Open"]),
-                            "High": float(row["High"]),
-                            "Low": float(row["Low"]),
-                            "Close": float(row["Close"]),
-                        })
-                    for p, r in enumerate(m["candles"]):
-                        m["candle_index"][r["time"]] = p
-                    if m["candles"]:
-                        m["last_seen_candle_start"] = m["candles"][-1]["time"]
+                seeded = [
+                    (int(pd.Timestamp(ts).value // 1000), float(row["Open"]),
+                     float(row["High"]), float(row["Low"]), float(row["Close"]))
+                    for ts, row in df.iterrows()
+                ][-MAX_CANDLES:]
+                market[symbol].load_candles(tf, seeded)
+                if shared_market is not None and tf == EXEC_TF:
+                    shared_market.load_candles(symbol, seeded)
                 utils.log(f"📥 Seeded {len(df)} {tf} candles for {symbol}", tg=False)
             except Exception as e:
                 utils.log(f"⚠️ Seed failed {symbol} {tf}: {e}", tg=True)
@@ -481,22 +486,28 @@ def run():
 
     ws_ready.wait(timeout=15)
 
+    seen = dict.fromkeys(SYMBOLS)       # snapshot version last processed
+    published = dict.fromkeys(SYMBOLS)  # candles view last sent to the bar log
+
     while True:
 
         try:
 
             for symbol in SYMBOLS:
 
-                with market_lock:
-                    price = market[symbol]["price"]
-                    exec_candles = list(market[symbol]["tf"][EXEC_TF]["candles"])
+                snap = market[symbol].snapshot
+                if snap.version == seen[symbol]:
+                    continue                # nothing new since the last pass
+                seen[symbol] = snap.version
 
-                if price is None or len(exec_candles) < MIN_BARS + 2:
+                exec_candles = snap.candles[EXEC_TF]
+                if snap.price is None or len(exec_candles) < MIN_BARS + 2:
                     continue
 
-                exec_df = pd.DataFrame(exec_candles).set_index("time")
-
-                process_symbol(symbol, exec_df, state[symbol])
+                # a mark-price tick keeps the same candles view: nothing to log
+                process_symbol(symbol, exec_candles.frame(), state[symbol],
+                               publish=exec_candles is not published[symbol])
+                published[symbol] = exec_candles
 
             time.sleep(0.2)
 
@@ -6,6 +6,8 @@ from datetime import datetime, timedelta
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from rate_limiter import limiter, PRIORITY_PRICE, PRIORITY_CANDLE
+from trade_analytics import TradeAnalytics
 
 
 class TradingUtils:
@@ -29,26 +31,33 @@ class TradingUtils:
 
         self.TRADE_CSV = os.path.join(self.SAVE_DIR, "live_trades.csv")
 
+        # ANALYTICS (rolling aggregates next to the journal)
+        self.analytics = TradeAnalytics.open(self.SAVE_DIR, self.TRADE_CSV)
+
         # TELEGRAM
         self.TELEGRAM_TOKEN = telegram_token
         self.TELEGRAM_CHAT_ID = telegram_chat_id
         self._last_tg = {}
 
         # SESSION
+        # 429s are not retried here: the shared limiter owns rate-limit backoff.
         self.session = requests.Session()
         retry = Retry(total=5, backoff_factor=1,
-                      status_forcelist=[429, 500, 502, 503, 504])
+                      status_forcelist=[500, 502, 503, 504])
         adapter = HTTPAdapter(max_retries=retry)
         self.session.mount("https://", adapter)
 
     # ================= FIXED MULTI-TIMEFRAME CANDLES =================
 
-    def fetch_candles(self, symbol, timeframe=None):
+    def fetch_candles(self, symbol, timeframe=None, start=None):
 
         # default = original timeframe
         tf = timeframe if timeframe is not None else self.TIMEFRAME
 
-        start = int((datetime.now() - timedelta(days=self.DAYS)).timestamp())
+        # default = full DAYS window; pass an epoch `start` to fetch only
+        # the bars since then (incremental refresh)
+        if start is None:
+            start = int((datetime.now() - timedelta(days=self.DAYS)).timestamp())
 
         data = self.safe_get(
             "https://api.india.delta.exchange/v2/history/candles",
@@ -57,7 +66,8 @@ class TradingUtils:
                 "symbol": symbol,
                 "start": str(start),
                 "end": str(int(time.time()))
-            }
+            },
+            priority=PRIORITY_CANDLE
         )
 
         if not data or "result" not in data:
@@ -107,17 +117,23 @@ class TradingUtils:
         except:
             pass
 
-    def safe_get(self, url, params=None):
+    def safe_get(self, url, params=None, priority=PRIORITY_CANDLE):
         try:
+            limiter.acquire(priority)
             r = self.session.get(url, params=params, timeout=10)
             if r.status_code == 200:
                 return r.json()
+            if r.status_code == 429:
+                limiter.backoff(r)
         except:
             pass
         return None
 
     def fetch_price(self, symbol):
-        data = self.safe_get(f"https://api.india.delta.exchange/v2/tickers/{symbol}")
+        data = self.safe_get(
+            f"https://api.india.delta.exchange/v2/tickers/{symbol}",
+            priority=PRIORITY_PRICE
+        )
         try:
             return float(data["result"]["mark_price"])
         except:
@@ -140,4 +156,9 @@ class TradingUtils:
             mode="a",
             header=not os.path.exists(self.TRADE_CSV),
             index=False
-        )
\ No newline at end of file
+        )
+
+        try:
+            self.analytics.add(trade)
+        except Exception as e:
+            self.log(f"Analytics update failed: {e}")
\ No newline at end of file
@@ -0,0 +1,88 @@
+"""
+ws_decode.py
+
+Websocket frame routing for the Delta feed: cheap pre-filter on the raw
+text, one JSON decode for frames somebody wants, then a dict lookup on
+(type, symbol) instead of an if/elif chain.
+
+    router = FrameRouter(record_path=os.getenv("WS_RECORD_PATH"))
+    router.route("candlestick_1d", SYMBOLS, on_candle)           # on_candle(symbol, msg)
+    router.route("mark_price", {f"MARK:{s}": s for s in SYMBOLS}, on_mark)
+    ws = websocket.WebSocketApp(url, on_message=lambda ws, m: router.dispatch(m))
+
+Pre-filter: the frame's "type" and "symbol" string fields are pulled with a
+regex; if no (type, symbol) pair is routed the frame is dropped without
+decoding. Every occurrence is considered, so a nested field can only let a
+frame through to the exact lookup, never drop a wanted one.
+
+orjson is used when installed (pip install orjson), json otherwise.
+`record_path` appends every raw frame, one per line, for bench_ws_decode.py.
+"""
+
+import re
+import json
+
+try:
+    import orjson
+    loads = orjson.loads
+    _HAS_ORJSON = True
+except ImportError:
+    loads = json.loads
+    _HAS_ORJSON = False
+
+_TYPE_RE = re.compile(r'"type"\s*:\s*"([^"]*)"')
+_SYMBOL_RE = re.compile(r'"symbol"\s*:\s*"([^"]*)"')
+
+
+class FrameRouter:
+
+    def __init__(self, record_path=None):
+        self.handlers = {}              # (type, raw symbol) -> (handler, name)
+        self.types = {}                 # type -> set of raw symbols routed
+        self.dropped = 0
+        self.decoded = 0
+        self._record = open(record_path, "a", buffering=1) if record_path else None
+
+    def route(self, msg_type, symbols, handler):
+        """Send frames of msg_type for these symbols to handler(name, msg).
+
+        `symbols` is an iterable of symbols, or a {raw symbol: name} map
+        when the feed decorates them (e.g. "MARK:BTCUSD" -> "BTCUSD").
+        """
+        names = symbols if isinstance(symbols, dict) else {s: s for s in symbols}
+        for raw, name in names.items():
+            self.handlers[(msg_type, raw)] = (handler, name)
+            self.types.setdefault(msg_type, set()).add(raw)
+
+    def wanted(self, frame):
+        """Cheap test on the raw text: could any routed handler want it?"""
+        for msg_type in _TYPE_RE.findall(frame):
+            symbols = self.types.get(msg_type)
+            if symbols and not symbols.isdisjoint(_SYMBOL_RE.findall(frame)):
+                return True
+        return False
+
+    def dispatch(self, frame):
+        """Route one raw frame. Returns True if a handler ran."""
+        if isinstance(frame, (bytes, bytearray)):
+            frame = frame.decode()
+        if self._record is not None:
+            self._record.write(frame.replace("\n", " ") + "\n")
+
+        if not self.wanted(frame):
+            self.dropped += 1
+            return False
+        try:
+            msg = loads(frame)
+        except ValueError:              # orjson.JSONDecodeError is a ValueError
+            return False
+        self.decoded += 1
+        if not isinstance(msg, dict):
+            return False
+
+        entry = self.handlers.get((msg.get("type"), msg.get("symbol")))
+        if entry is None:
+            return False
+        handler, name = entry
+        handler(name, msg)
+        return True